@@ -4,9 +4,8 @@ Script para aplicar automaticamente a correção da página activities
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,11 +19,6 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def create_test_user():
     """Criar usuário de teste na tabela profiles"""
     try:
@@ -38,7 +32,7 @@ def create_test_user():
             "role": "admin"
         }
         
-        response = requests.post(f"{SUPABASE_URL}/rest/v1/profiles", 
+        response = http("POST", f"{SUPABASE_URL}/rest/v1/profiles", 
                                headers=headers, 
                                json=test_user)
         
@@ -62,7 +56,7 @@ def create_test_activity():
         log("🔧 Criando atividade de teste...")
         
         # Primeiro, obter o ID do usuário de teste
-        profiles_response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles?select=id&limit=1", headers=headers)
+        profiles_response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles?select=id&limit=1", headers=headers)
         
         if profiles_response.status_code == 200:
             profiles = profiles_response.json()
@@ -84,7 +78,7 @@ def create_test_activity():
                     "tags": ["teste", "sistema"]
                 }
                 
-                response = requests.post(f"{SUPABASE_URL}/rest/v1/activities", 
+                response = http("POST", f"{SUPABASE_URL}/rest/v1/activities", 
                                        headers=headers, 
                                        json=test_activity)
                 
@@ -113,7 +107,7 @@ def test_activities_page():
     try:
         log("🧪 Testando página de activities...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=5", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=5", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -146,7 +140,7 @@ def test_rls_functionality():
             "type": "task"
         }
         
-        response = requests.post(f"{SUPABASE_URL}/rest/v1/activities", 
+        response = http("POST", f"{SUPABASE_URL}/rest/v1/activities", 
                                headers=headers, 
                                json=test_activity_no_owner)
         
@@ -167,11 +161,11 @@ def verify_system_status():
         log("🔍 Verificando status geral do sistema...")
         
         # Verificar tabela activities
-        activities_response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
+        activities_response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
         activities_count = len(activities_response.json()) if activities_response.status_code == 200 else 0
         
         # Verificar tabela profiles
-        profiles_response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
+        profiles_response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
         profiles_count = len(profiles_response.json()) if profiles_response.status_code == 200 else 0
         
         log(f"📊 Status do Sistema:")
@@ -244,6 +238,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
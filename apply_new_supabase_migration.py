@@ -6,9 +6,8 @@ VBSolution - Sistema CRM Completo com RLS e Autenticação
 
 import os
 import sys
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do novo Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -22,17 +21,12 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_connection():
     """Testar conexão com o Supabase"""
     try:
         log("🔗 Testando conexão com o Supabase...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             log("✅ Conexão estabelecida com sucesso!")
@@ -92,14 +86,16 @@ def apply_migration():
                 
                 # Para comandos que criam tabelas, usar o endpoint SQL
                 if any(keyword in command.upper() for keyword in ['CREATE TABLE', 'CREATE INDEX', 'CREATE POLICY', 'CREATE FUNCTION', 'CREATE TRIGGER']):
-                    response = requests.post(
+                    response = http(
+                        "POST",
                         f"{SUPABASE_URL}/rest/v1/rpc/exec_sql",
                         headers=headers,
                         json={'sql': command}
                     )
                 else:
                     # Para outros comandos, usar o endpoint padrão
-                    response = requests.post(
+                    response = http(
+                        "POST",
                         f"{SUPABASE_URL}/rest/v1/",
                         headers=headers,
                         json={'query': command}
@@ -135,7 +131,7 @@ def verify_tables():
     try:
         log("🔍 Verificando tabelas criadas...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             tables = response.json()
@@ -181,7 +177,7 @@ def test_rls():
         log("🔒 Testando políticas RLS...")
         
         # Tentar acessar dados sem autenticação (deve falhar)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
         
         if response.status_code in [401, 403]:
             log("✅ Políticas RLS estão ativas (acesso negado sem autenticação)")
@@ -272,6 +268,7 @@ def main():
     return True
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         sys.exit(0 if success else 1)
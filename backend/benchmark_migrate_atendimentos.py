@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark da migração de atendimentos: caminho no cliente x RPC no servidor
+(os dois contra o local_standin, com os mesmos dados sintéticos)
+
+Gera atendimentos e mensagens com generate_synthetic_dataset.py, tira parte das
+mensagens (para exercitar a criação) e roda as fases de status e criação de cada
+caminho numa cópia do mesmo banco, comparando tempo e número de requisições.
+
+Execute: python backend/benchmark_migrate_atendimentos.py --scale 0.1
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import supabase_rest
+import instrumentation
+from instrumentation import log, print_summary_at_exit
+from local_standin import StandIn, start_background
+from migration_journal import MigrationJournal
+from generate_synthetic_dataset import build_plan, generate, StandInLoader
+import migrate_atendimentos
+import migrate_atendimentos_server
+
+def preparar_dados(path, scale, seed, sem_mensagens):
+    """Banco base: atendimentos + mensagens, com uma fração dos atendimentos sem mensagens"""
+    standin = StandIn(db_path=path)
+    plan = build_plan(seed, scale)
+    generate(plan, StandInLoader(standin), tables=["whatsapp_atendimentos", "whatsapp_mensagens"])
+    with standin.lock:
+        standin.conn.execute(
+            "DELETE FROM whatsapp_mensagens WHERE atendimento_id IN "
+            "(SELECT id FROM whatsapp_atendimentos WHERE abs(random()) % 1000 < ?)", (int(sem_mensagens * 1000),)
+        )
+        counts = [standin.conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+                  for t in ("whatsapp_atendimentos", "whatsapp_mensagens")]
+    standin.conn.close()
+    return counts
+
+def requisicoes():
+    return sum(row["count"] for row in instrumentation.summary() if row["name"].split(" ")[0] in ("GET", "POST", "PATCH", "DELETE"))
+
+def rodar(base, workdir, nome, executar):
+    """Copiar o banco base, subir um stand-in e medir um caminho de migração"""
+    path = os.path.join(workdir, f"{nome}.sqlite3")
+    shutil.copy(base, path)
+    standin = StandIn(db_path=path)
+    migrate_atendimentos_server.register_standin_rpcs(standin)
+    server, url = start_background(standin)
+    supabase_rest.SUPABASE_URL = url
+
+    journal = MigrationJournal(os.path.join(workdir, f"{nome}.journal.sqlite3"), migrate_atendimentos.MIGRACAO_NOME)
+    antes = requisicoes()
+    inicio = time.perf_counter()
+    try:
+        executar(journal)
+        elapsed = time.perf_counter() - inicio
+        feitas = requisicoes() - antes
+        aprovado, resumo = migrate_atendimentos.verificar_migracao(journal)
+    finally:
+        journal.close()
+        server.shutdown()
+
+    with standin.lock:
+        mensagens = standin.conn.execute("SELECT count(*) FROM whatsapp_mensagens").fetchone()[0]
+    return {"nome": nome, "segundos": elapsed, "requisicoes": feitas, "mensagens": mensagens,
+            "aprovado": aprovado, "resumo": resumo}
+
+def caminho_cliente(journal):
+    migrate_atendimentos.run_fase(journal, "status", migrate_atendimentos.update_mensagens_status)
+    migrate_atendimentos.run_fase(journal, "criacao", migrate_atendimentos.criar_mensagens_do_lote)
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar a migração no cliente com a RPC no servidor")
+    parser.add_argument("--scale", type=float, default=0.1, help="Escala do generate_synthetic_dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sem-mensagens", type=float, default=0.1, help="Fração de atendimentos sem mensagens")
+    parser.add_argument("--lote", type=int, default=migrate_atendimentos_server.LOTE_PADRAO)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_atendimentos_")
+    base = os.path.join(workdir, "base.sqlite3")
+    log("🎲 Gerando dados...")
+    atendimentos, mensagens = preparar_dados(base, args.scale, args.seed, args.sem_mensagens)
+    log(f"📋 {atendimentos} atendimentos, {mensagens} mensagens")
+
+    resultados = [
+        rodar(base, workdir, "cliente", caminho_cliente),
+        rodar(base, workdir, "servidor", lambda journal: migrate_atendimentos_server.migrar_no_servidor(journal, args.lote)),
+    ]
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 70)
+    print("📊 MIGRAÇÃO: CLIENTE x SERVIDOR")
+    print("=" * 70)
+    for r in resultados:
+        print(f"{r['nome']:<10} {r['segundos']:>8.2f}s {r['requisicoes']:>8} requisições "
+              f"{r['mensagens']:>10} mensagens  verificação {'✅' if r['aprovado'] else '❌'}")
+    cliente, servidor = resultados
+    if servidor["segundos"]:
+        print(f"\nServidor {cliente['segundos'] / servidor['segundos']:.1f}x mais rápido, "
+              f"{cliente['requisicoes'] - servidor['requisicoes']} requisições a menos")
+    return all(r["aprovado"] for r in resultados) and cliente["mensagens"] == servidor["mensagens"]
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Simulação (dry-run) da migração de atendimentos: quanto ela vai custar antes de rodar
+
+Usa só leituras: contagens (Prefer: count=exact, limit=0), uma amostra aleatória de
+atendimentos com as suas mensagens e um GET vazio (para medir a ida e volta de uma
+requisição sem corpo de resposta, usada como latência de PATCH/POST). Com isso estima, por fase e para cada tamanho
+de lote candidato, as requisições (GET/PATCH/POST/RPC), os bytes e o tempo na
+latência medida, e indica o lote mais rápido que cabe no limite de URL.
+
+O tempo previsto é ida e volta + transferência; o trabalho do banco em cada PATCH
+e POST além disso não entra (a amostra não escreve nada).
+
+Execute: python backend/migrate_atendimentos.py --simular [--dono <uuid>] [--lotes 100,150,300]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import statistics
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import http
+from supabase_rest import rest_url
+from rest_pagination import DEFAULT_PAGE_SIZE, filter_literal
+from rest_bulk import MAX_PAYLOAD_BYTES, chunk_in_values
+from purge_table import count_rows, DEFAULT_BATCH_SIZE as PURGE_BATCH_SIZE, MAX_BATCH_SIZE as PURGE_MAX_BATCH_SIZE
+import migrate_atendimentos
+
+AMOSTRA_PADRAO = 500
+SONDAGENS = 5
+LOTES_CANDIDATOS = (100, 150, 200, 300, 500)
+
+def medir_get(table, params):
+    """GET medido: (linhas, bytes, segundos)"""
+    inicio = time.perf_counter()
+    response = http("GET", rest_url(table), params=params, headers=migrate_atendimentos.headers)
+    elapsed = time.perf_counter() - inicio
+    if response.status_code != 200:
+        raise RuntimeError(f"Erro ao ler {table}: {response.status_code} - {response.text}")
+    return response.json(), len(response.content), elapsed
+
+def amostrar(dono=None, tamanho=AMOSTRA_PADRAO):
+    """Atendimentos a partir de ids aleatórios (algumas sondagens por keyset) e as mensagens deles"""
+    filtros = [("owner_id", f"eq.{dono}")] if dono else []
+    por_sondagem = max(1, math.ceil(tamanho / SONDAGENS))
+    atendimentos, vistos = [], set()
+    bytes_atendimentos, tempos = 0, []
+    for _ in range(SONDAGENS):
+        params = [("select", migrate_atendimentos.Atendimento.SELECT), ("order", "id.asc"),
+                  ("limit", str(por_sondagem)), ("id", f"gt.{uuid.uuid4()}")] + filtros
+        linhas, tamanho_bytes, elapsed = medir_get("whatsapp_atendimentos", params)
+        tempos.append(elapsed)
+        bytes_atendimentos += tamanho_bytes
+        for linha in linhas:
+            if linha["id"] not in vistos:
+                vistos.add(linha["id"])
+                atendimentos.append(linha)
+
+    mensagens, bytes_mensagens = [], 0
+    ids = [a["id"] for a in atendimentos]
+    for lote in chunk_in_values(ids, len(rest_url("whatsapp_mensagens")) + 100):
+        params = [("select", migrate_atendimentos.Mensagem.SELECT),
+                  ("atendimento_id", "in.(" + ",".join(filter_literal(i) for i in lote) + ")")]
+        linhas, tamanho_bytes, elapsed = medir_get("whatsapp_mensagens", params)
+        tempos.append(elapsed)
+        bytes_mensagens += tamanho_bytes
+        mensagens.extend(linhas)
+
+    return {
+        "atendimentos": atendimentos,
+        "mensagens": mensagens,
+        "bytes_atendimento": bytes_atendimentos / max(len(atendimentos), 1),
+        "bytes_mensagem": bytes_mensagens / max(len(mensagens), 1),
+        "latencia_get": statistics.median(tempos),
+        "vazao": (bytes_atendimentos + bytes_mensagens) / max(sum(tempos), 1e-9),
+    }
+
+def latencia_escrita(repeticoes=3):
+    """Ida e volta de uma leitura que não devolve linhas (nenhuma mensagem tem id nulo)
+
+    Mesmo um PATCH que não casa com nada pega lock ROW EXCLUSIVE e dispara os triggers
+    de statement, então a simulação não escreve: a latência de escrita é a ida e volta
+    de um GET vazio, e o trabalho do banco em cada escrita fica fora da estimativa.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        http("GET", rest_url("whatsapp_mensagens"), params=[("select", "id"), ("id", "is.null"), ("limit", "1")],
+             headers=migrate_atendimentos.headers)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+def estatisticas(amostra):
+    """Frequências por status, fração sem mensagens e fração divergente, vindas da amostra"""
+    status_mensagens = {}
+    for mensagem in amostra["mensagens"]:
+        status_mensagens.setdefault(mensagem["atendimento_id"], []).append(mensagem["status"])
+
+    n = max(len(amostra["atendimentos"]), 1)
+    por_status, divergentes_por_status = Counter(), Counter()
+    sem_mensagens = 0
+    for atendimento in amostra["atendimentos"]:
+        atuais = status_mensagens.get(atendimento["id"])
+        if not atuais:
+            sem_mensagens += 1
+        if atendimento["status"]:
+            por_status[atendimento["status"]] += 1
+            if atuais and any(s != atendimento["status"] for s in atuais):
+                divergentes_por_status[atendimento["status"]] += 1
+
+    sinteticas = [migrate_atendimentos.mensagem_sintetica(a) for a in amostra["atendimentos"][:50]]
+    return {
+        "p_status": {s: c / n for s, c in por_status.items()},
+        "p_divergente": {s: c / n for s, c in divergentes_por_status.items()},
+        "p_sem_mensagens": sem_mensagens / n,
+        "mensagens_por_atendimento": len(amostra["mensagens"]) / n,
+        "bytes_sintetica": (len(json.dumps(sinteticas, default=str)) / len(sinteticas)) if sinteticas else 400,
+        "ids_por_url": ids_por_url(amostra["atendimentos"]),
+    }
+
+def ids_por_url(atendimentos):
+    """Quantos ids cabem num atendimento_id=in.(...) junto com o filtro de status do PATCH"""
+    ids = [a["id"] for a in atendimentos] or [str(uuid.uuid4())]
+    base = len(rest_url("whatsapp_mensagens")) + len("or=(status.neq.XXXXXXXXXXXX,status.is.null)") * 3 + 20
+    return len(next(chunk_in_values(ids * (2000 // len(ids) + 1), base)))
+
+def grupos_esperados(frequencias, lote, ids_url):
+    """PATCHes esperados num lote: um por status presente, mais um a cada ids_url atendimentos do status"""
+    return sum((1 - (1 - p) ** lote) * max(1, math.ceil(lote * p / ids_url)) for p in frequencias.values())
+
+def paginas(linhas, tamanho):
+    """GETs de uma leitura por keyset: as páginas com linhas e a página vazia que encerra"""
+    return math.ceil(linhas / tamanho) + 1
+
+def plano(contagens, est, medidas, lote, modo):
+    """Fases com requisições, bytes e tempo previsto para um tamanho de lote"""
+    n, m = contagens["atendimentos"], contagens["mensagens"]
+    lotes = math.ceil(n / lote) if n else 0
+    bytes_sinteticas = n * est["p_sem_mensagens"] * est["bytes_sintetica"]
+    posts = lotes * (1 - (1 - est["p_sem_mensagens"]) ** lote) * max(1, math.ceil(lote * est["p_sem_mensagens"] * est["bytes_sintetica"] / MAX_PAYLOAD_BYTES))
+    get_atendimentos = {"GET": paginas(n, lote), "bytes_in": n * medidas["bytes_atendimento"]}
+
+    fases = []
+    if modo == "merge":
+        divergentes = sum(est["p_divergente"].values())
+        fases.append({
+            "fase": "merge", "linhas": n + m,
+            "GET": get_atendimentos["GET"] + paginas(m, DEFAULT_PAGE_SIZE),
+            "PATCH": lotes * grupos_esperados(est["p_divergente"], lote, est["ids_por_url"]),
+            "POST": posts,
+            "bytes_in": get_atendimentos["bytes_in"] + m * medidas["bytes_mensagem"],
+            "bytes_out": bytes_sinteticas,
+            "linhas_alteradas": n * (divergentes + est["p_sem_mensagens"]),
+        })
+    else:
+        fases.append({
+            "fase": "status", "linhas": n, "GET": get_atendimentos["GET"],
+            "PATCH": lotes * grupos_esperados(est["p_status"], lote, est["ids_por_url"]), "POST": 0,
+            "bytes_in": get_atendimentos["bytes_in"], "bytes_out": 0,
+            "linhas_alteradas": n * sum(est["p_divergente"].values()),
+        })
+        mensagens_por_lote = lote * est["mensagens_por_atendimento"]
+        fases.append({
+            "fase": "criacao", "linhas": n + m,
+            "GET": get_atendimentos["GET"] + lotes * paginas(mensagens_por_lote, DEFAULT_PAGE_SIZE),
+            "PATCH": 0, "POST": posts,
+            "bytes_in": get_atendimentos["bytes_in"] + m * medidas["bytes_mensagem"], "bytes_out": bytes_sinteticas,
+            "linhas_alteradas": n * est["p_sem_mensagens"],
+        })
+
+    fases.append({"fase": "verificacao", "linhas": n + m, "GET": 0, "PATCH": 0, "POST": 0, "RPC": 1,
+                  "bytes_in": 0, "bytes_out": 0, "linhas_alteradas": 0})
+
+    # A exclusão começa em PURGE_BATCH_SIZE e cresce 1,5x por lote rápido, até o teto
+    restantes, tamanho, chamadas = n, PURGE_BATCH_SIZE, 1
+    while restantes > 0:
+        restantes -= tamanho
+        tamanho = min(PURGE_MAX_BATCH_SIZE, int(tamanho * 1.5))
+        chamadas += 1
+    fases.append({"fase": "exclusao", "linhas": n, "GET": 1, "PATCH": 0, "POST": 0, "RPC": chamadas,
+                  "bytes_in": 0, "bytes_out": 0, "linhas_alteradas": n})
+
+    for fase in fases:
+        fase.setdefault("RPC", 0)
+        leituras = fase["GET"]
+        escritas = fase["PATCH"] + fase["POST"] + fase["RPC"]
+        fase["requisicoes"] = leituras + escritas
+        fase['segundos'] = (leituras * medidas["latencia_get"] + escritas * medidas["latencia_escrita"]
+                            + (fase["bytes_in"] + fase["bytes_out"]) / medidas["vazao"])
+
+    viavel = modo == "merge" or lote <= est["ids_por_url"]
+    return {"lote": lote, "modo": modo, "fases": fases, "viavel": viavel,
+            "requisicoes": sum(f["requisicoes"] for f in fases), "segundos": sum(f['segundos'] for f in fases)}
+
+def simular(dono=None, modo="lotes", lotes=LOTES_CANDIDATOS, tamanho_amostra=AMOSTRA_PADRAO):
+    """Contar, amostrar, medir latência e imprimir o plano de cada lote candidato; devolve o melhor"""
+    print("📏 Contando linhas...")
+    contagens = {
+        "atendimentos": count_rows("whatsapp_atendimentos", dono, migrate_atendimentos.headers) or 0,
+        "mensagens": count_rows("whatsapp_mensagens", dono, migrate_atendimentos.headers) or 0,
+    }
+    print(f"📋 {contagens['atendimentos']:,} atendimentos, {contagens['mensagens']:,} mensagens")
+    if not contagens["atendimentos"]:
+        print("✅ Nada a migrar")
+        return None
+
+    print(f"🎲 Amostrando ~{tamanho_amostra} atendimentos...")
+    amostra = amostrar(dono, tamanho_amostra)
+    medidas = {
+        "latencia_get": amostra["latencia_get"],
+        "latencia_escrita": latencia_escrita(),
+        "vazao": amostra["vazao"],
+        "bytes_atendimento": amostra["bytes_atendimento"],
+        "bytes_mensagem": amostra["bytes_mensagem"],
+    }
+    est = estatisticas(amostra)
+    print(f"Amostra: {len(amostra['atendimentos'])} atendimentos | sem mensagens: {est['p_sem_mensagens']:.1%} | "
+          f"status divergente: {sum(est['p_divergente'].values()):.1%} | {est['mensagens_por_atendimento']:.1f} mensagens/atendimento")
+    print(f"Latência: GET {medidas['latencia_get'] * 1000:.0f} ms, escrita {medidas['latencia_escrita'] * 1000:.0f} ms, "
+          f"vazão {medidas['vazao'] / 1e6:.1f} MB/s | {est['ids_por_url']} ids por URL")
+
+    planos = [plano(contagens, est, medidas, lote, modo) for lote in lotes]
+    print("\n" + "=" * 96)
+    print(f"📊 PLANO ({modo})")
+    print("=" * 96)
+    for p in planos:
+        marca = "" if p["viavel"] else "  ⚠️ in.(...) passa do limite de URL"
+        print(f"\nLote {p['lote']}: {p['requisicoes']:,.0f} requisições, ~{p['segundos']:,.1f}s{marca}")
+        print(f"  {'fase':<12} {'linhas':>10} {'alteradas':>10} {'GET':>7} {'PATCH':>7} {'POST':>7} {'RPC':>5} {'MB in':>8} {'MB out':>8} {'tempo':>8}")
+        for f in p["fases"]:
+            print(f"  {f['fase']:<12} {f['linhas']:>10,.0f} {f['linhas_alteradas']:>10,.0f} {f['GET']:>7,.0f} {f['PATCH']:>7,.0f} "
+                  f"{f['POST']:>7,.0f} {f['RPC']:>5,.0f} {f['bytes_in'] / 1e6:>8.1f} {f['bytes_out'] / 1e6:>8.1f} {f['segundos']:>7,.1f}s")
+
+    viaveis = [p for p in planos if p["viavel"]]
+    melhor = min(viaveis, key=lambda p: p['segundos']) if viaveis else None
+    if melhor:
+        print(f"\n✅ Lote sugerido: {melhor['lote']} (~{melhor['segundos']:,.1f}s, {melhor['requisicoes']:,.0f} requisições); "
+              f"rode com --lote {melhor['lote']}")
+    return melhor
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Migração de whatsapp_atendimentos para whatsapp_mensagens executada no banco
+(RPC migrate_atendimentos_batch, migração 20251019_migrate_atendimentos_rpc.sql)
+
+Em vez de trazer as duas tabelas para o cliente, cada chamada faz o UPDATE ... FROM
+e o INSERT ... SELECT de um lote de atendimentos de um dono. Os lotes ficam no
+mesmo diário do migrador em Python (um checkpoint por dono), a verificação e a
+exclusão são as mesmas de migrate_atendimentos.py.
+
+Execute: python backend/migrate_atendimentos_server.py [--lote 500] [--sem-exclusao]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import http, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+from migration_journal import MigrationJournal
+import migrate_atendimentos
+from verify_migracao_atendimentos import verificar_por_checksum
+
+LOTE_PADRAO = 500
+
+def call_rpc(name, params, headers=None):
+    # As RPCs da migração são repetíveis (ids determinísticos, ON CONFLICT DO NOTHING)
+    response = http("POST", rest_url(f"rpc/{name}"), json=params, headers=headers or rest_headers(),
+                    idempotent=True)
+    if response.status_code != 200:
+        raise RuntimeError(f"Erro na RPC {name}: {response.status_code} - {response.text}")
+    return response.json()
+
+def migrar_dono(journal, owner_id, lote=LOTE_PADRAO):
+    """Chamar a RPC em lotes até o dono não ter mais atendimentos depois do checkpoint"""
+    fase = f"rpc:{owner_id}"
+    if journal.is_complete(fase):
+        return {"atendimentos": 0, "updated": 0, "inserted": 0, "batches": 0}
+
+    total = {"atendimentos": 0, "updated": 0, "inserted": 0, "batches": 0}
+    after = journal.resume_key(fase)
+    while True:
+        resultado = call_rpc("migrate_atendimentos_batch",
+                             {"p_owner_id": owner_id, "p_after_id": after, "p_batch_size": lote})
+        if not resultado["atendimentos"]:
+            break
+        journal.commit_chunk(fase, after, resultado["last_id"], resultado["atendimentos"])
+        after = resultado["last_id"]
+        total["batches"] += 1
+        for chave in ("atendimentos", "updated", "inserted"):
+            total[chave] += resultado[chave]
+
+    journal.complete_phase(fase)
+    return total
+
+def migrar_no_servidor(journal, lote=LOTE_PADRAO):
+    """Migrar todos os donos, um de cada vez"""
+    donos = call_rpc("migrate_atendimentos_tenants", {})
+    print(f"📋 {len(donos)} donos com atendimentos")
+
+    geral = {"atendimentos": 0, "updated": 0, "inserted": 0, "batches": 0}
+    for dono in donos:
+        inicio = time.perf_counter()
+        total = migrar_dono(journal, dono["owner_id"], lote)
+        for chave in geral:
+            geral[chave] += total[chave]
+        if total["batches"]:
+            print(f"✅ Dono {dono['owner_id']}: {total['atendimentos']} atendimentos, {total['updated']} mensagens "
+                  f"atualizadas, {total['inserted']} criadas em {total['batches']} lotes ({time.perf_counter() - inicio:.2f}s)")
+    return geral
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrar whatsapp_atendimentos via RPC no banco")
+    parser.add_argument("--journal", default=migrate_atendimentos.JOURNAL_PATH)
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="Atendimentos por chamada (transação)")
+    parser.add_argument("--reiniciar", action="store_true")
+    parser.add_argument("--sem-exclusao", action="store_true")
+    args = parser.parse_args()
+
+    print("🚀 Iniciando migração no servidor...")
+    journal = MigrationJournal(args.journal, migrate_atendimentos.MIGRACAO_NOME)
+    if args.reiniciar:
+        journal.reset()
+
+    try:
+        geral = migrar_no_servidor(journal, args.lote)
+        print(f"📊 Total: {json.dumps(geral)}")
+
+        print("🔍 Verificando migração...")
+        aprovado, resumo = verificar_por_checksum(journal)
+        print(f"Atendimentos: {resumo['atendimentos']} | sem mensagens: {resumo['sem_mensagens']} | "
+              f"status divergente: {resumo['status_divergente']}")
+        if not aprovado:
+            print("❌ Verificação reprovada; a exclusão de whatsapp_atendimentos não será feita")
+            return False
+        if args.sem_exclusao:
+            print("✅ Migração verificada (exclusão não solicitada)")
+            return True
+
+        print("🗑️ Deletando tabela whatsapp_atendimentos...")
+        return migrate_atendimentos.delete_atendimentos_table(journal)
+    finally:
+        journal.close()
+
+# ------------------------------------------------------- stand-in (SQLite)
+
+def register_standin_rpcs(standin):
+    """Implementar as duas RPCs no local_standin com o mesmo SQL set-based (dialeto SQLite)"""
+    namespace = migrate_atendimentos.MIGRACAO_NAMESPACE
+    standin.conn.create_function("uuid5", 1, lambda value: str(uuid.uuid5(namespace, value)), deterministic=True)
+
+    def tenants(standin, params, headers):
+        with standin.lock:
+            rows = standin.conn.execute(
+                'SELECT owner_id, count(*) FROM whatsapp_atendimentos GROUP BY owner_id ORDER BY count(*) DESC'
+            ).fetchall()
+        return [{"owner_id": owner_id, "atendimentos": count} for owner_id, count in rows]
+
+    def batch(standin, params, headers):
+        owner_id, after, size = params["p_owner_id"], params.get("p_after_id"), int(params.get("p_batch_size", LOTE_PADRAO))
+        with standin.lock:
+            conn = standin.conn
+            conn.execute("BEGIN")
+            try:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM whatsapp_atendimentos WHERE owner_id IS ? AND (? IS NULL OR id > ?) ORDER BY id LIMIT ?",
+                    (owner_id, after, after, size)
+                )]
+                if not ids:
+                    conn.execute("COMMIT")
+                    return {"atendimentos": 0, "updated": 0, "inserted": 0, "last_id": None}
+
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_atendimentos (id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM lote_atendimentos")
+                conn.executemany("INSERT INTO lote_atendimentos VALUES (?)", [(i,) for i in ids])
+
+                updated = conn.execute("""
+                    UPDATE whatsapp_mensagens SET status = a.status
+                    FROM whatsapp_atendimentos a JOIN lote_atendimentos l ON l.id = a.id
+                    WHERE whatsapp_mensagens.atendimento_id = a.id
+                      AND a.status IS NOT NULL AND whatsapp_mensagens.status IS NOT a.status
+                """).rowcount
+                inserted = conn.execute("""
+                    INSERT INTO whatsapp_mensagens (id, owner_id, atendimento_id, chat_id, message_id, conteudo, tipo,
+                                                    status, remetente, "timestamp", lida, created_at)
+                    SELECT uuid5(a.id), coalesce(a.owner_id, '00000000-0000-0000-0000-000000000000'), a.id, a.chat_id,
+                           'migracao-atendimento:' || a.id, coalesce(a.ultima_mensagem, 'Mensagem de atendimento'),
+                           'TEXTO', a.status, 'ATENDENTE', coalesce(a.ultima_mensagem, a.data_inicio), 0, a.created_at
+                    FROM whatsapp_atendimentos a JOIN lote_atendimentos l ON l.id = a.id
+                    WHERE NOT EXISTS (SELECT 1 FROM whatsapp_mensagens m WHERE m.atendimento_id = a.id)
+                    ON CONFLICT (id) DO NOTHING
+                """).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return {"atendimentos": len(ids), "updated": updated, "inserted": inserted, "last_id": ids[-1]}
+
+    standin.register_rpc("migrate_atendimentos_tenants", tenants)
+    standin.register_rpc("migrate_atendimentos_batch", batch)
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Verificação por checksum da migração de whatsapp_atendimentos para whatsapp_mensagens
+
+Em vez de baixar as duas tabelas, compara impressões digitais por balde: para cada
+dono (e, dentro de um dono divergente, para cada chat) o banco devolve o total, o
+histograma de status e a soma de um hash de "id:status" dos atendimentos (origem) e
+do status que as mensagens de cada atendimento carregam (destino). Baldes iguais
+estão migrados; só os chats divergentes são conferidos linha a linha.
+
+As impressões vêm da RPC atendimentos_fingerprints (migração
+20251019_atendimentos_fingerprints_rpc.sql). Sem a RPC, são calculadas aqui
+lendo as tabelas uma vez.
+
+Execute: python backend/verify_migracao_atendimentos.py [--dono <uuid>] [--max-chats 20]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instrumentation import http, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+from migration_journal import MigrationJournal
+import migrate_atendimentos
+
+SEM_STATUS = "*"
+# Dono a detalhar quando o balde divergente é o dos atendimentos sem owner_id
+DONO_NULO = object()
+STATUS_MISTO = "<misto>"
+MAX_CHATS_DETALHADOS = 20
+
+def fingerprint(item_id, status):
+    """Hash de 32 bits de "id:status" (os 8 primeiros hex do md5, como na RPC)"""
+    return int(hashlib.md5(f"{item_id}:{status}".encode("utf-8")).hexdigest()[:8], 16)
+
+def nova_impressao():
+    return {"total": 0, "por_status": {}, "hash": 0}
+
+def somar(impressao, item_id, status):
+    impressao["total"] += 1
+    impressao["por_status"][status] = impressao["por_status"].get(status, 0) + 1
+    impressao["hash"] += fingerprint(item_id, status)
+
+def status_destino(atendimento_status, mensagens_status):
+    """Status que as mensagens de um atendimento carregam (None se não há mensagens)"""
+    if not mensagens_status:
+        return None
+    if not atendimento_status:
+        return SEM_STATUS
+    unicos = set(mensagens_status)
+    return unicos.pop() if len(unicos) == 1 and None not in unicos else STATUS_MISTO
+
+def impressoes_servidor(owner_id=None):
+    """{(dono, chat): {"origem": ..., "destino": ...}} pela RPC; None se a RPC não existe
+
+    Sem owner_id os baldes são por dono; com um dono (ou DONO_NULO), por chat desse dono.
+    """
+    params = ({"p_owner_id": None, "p_owner_is_null": True} if owner_id is DONO_NULO
+              else {"p_owner_id": owner_id})
+    response = http("POST", rest_url("rpc/atendimentos_fingerprints"), json=params,
+                    headers=rest_headers(), idempotent=True)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"Erro na RPC atendimentos_fingerprints: {response.status_code} - {response.text}")
+
+    baldes = defaultdict(dict)
+    for linha in response.json():
+        por_status = linha["por_status"]
+        if isinstance(por_status, str):
+            por_status = json.loads(por_status)
+        baldes[(linha["owner_id"], linha["chat_id"])][linha["lado"]] = {
+            "total": int(linha["total"]), "por_status": por_status, "hash": int(linha["hash"])
+        }
+    return dict(baldes)
+
+def impressoes_cliente(owner_id=None):
+    """Mesmas impressões, por (dono, chat), lendo atendimentos e mensagens em lotes"""
+    filtros = [filtro_igual("owner_id", None if owner_id is DONO_NULO else owner_id)] if owner_id else None
+    baldes = defaultdict(lambda: {"origem": nova_impressao(), "destino": nova_impressao()})
+    for lote in migrate_atendimentos.lotes_atendimentos(filtros=filtros):
+        status_mensagens = defaultdict(list)
+        for mensagem in migrate_atendimentos.get_mensagens([a['id'] for a in lote]):
+            status_mensagens[mensagem['atendimento_id']].append(mensagem['status'])
+        for atendimento in lote:
+            balde = baldes[(atendimento['owner_id'], atendimento['chat_id'])]
+            somar(balde["origem"], atendimento['id'], atendimento['status'] or SEM_STATUS)
+            destino = status_destino(atendimento['status'], status_mensagens.get(atendimento['id']))
+            if destino is not None:
+                somar(balde["destino"], atendimento['id'], destino)
+    return dict(baldes)
+
+def por_dono(baldes):
+    """Somar impressões por chat no nível do dono (mesmo resultado da RPC sem p_owner_id)"""
+    donos = defaultdict(lambda: {"origem": nova_impressao(), "destino": nova_impressao()})
+    for (owner_id, _), lados in baldes.items():
+        for lado, impressao in lados.items():
+            alvo = donos[(owner_id, None)][lado]
+            alvo["total"] += impressao["total"]
+            alvo["hash"] += impressao["hash"]
+            for status, n in impressao["por_status"].items():
+                alvo["por_status"][status] = alvo["por_status"].get(status, 0) + n
+    return dict(donos)
+
+def divergencias(baldes):
+    """Baldes cujas impressões de origem e destino diferem, com o que difere"""
+    encontrados = []
+    for chave, lados in sorted(baldes.items(), key=lambda item: tuple(str(k) for k in item[0])):
+        origem, destino = lados.get("origem") or nova_impressao(), lados.get("destino") or nova_impressao()
+        campos = [campo for campo in ("total", "por_status", "hash") if origem[campo] != destino[campo]]
+        if campos:
+            encontrados.append({"owner_id": chave[0], "chat_id": chave[1], "campos": campos,
+                                "origem": origem, "destino": destino})
+    return encontrados
+
+def filtro_igual(coluna, valor):
+    return (coluna, "is.null") if valor is None else (coluna, f"eq.{valor}")
+
+def verificar_por_checksum(journal=None, owner_id=None, max_chats=MAX_CHATS_DETALHADOS):
+    """Comparar impressões por dono, depois por chat nos donos divergentes, e só então linha a linha"""
+    inicio = time.perf_counter()
+    resumo = {"atendimentos": 0, "sem_mensagens": 0, "status_divergente": 0, "exemplos": [],
+              "donos": 0, "donos_divergentes": 0, "chats_divergentes": 0, "chats_detalhados": 0, "origem": "rpc"}
+
+    por_chat = None
+    donos = impressoes_servidor(owner_id)
+    if donos is None:
+        print("⚠️ RPC atendimentos_fingerprints indisponível; calculando as impressões no cliente")
+        resumo["origem"] = "cliente"
+        por_chat = impressoes_cliente(owner_id)
+        donos = por_dono(por_chat)
+    elif owner_id:
+        # Com um dono, a RPC já responde por chat
+        por_chat, donos = donos, por_dono(donos)
+
+    resumo["donos"] = len(donos)
+    resumo["atendimentos"] = sum(lados.get("origem", nova_impressao())["total"] for lados in donos.values())
+    donos_divergentes = divergencias(donos)
+    resumo["donos_divergentes"] = len(donos_divergentes)
+
+    chats_divergentes = []
+    for dono in donos_divergentes:
+        chats = por_chat if por_chat is not None else impressoes_servidor(
+            DONO_NULO if dono["owner_id"] is None else dono["owner_id"])
+        chats_divergentes.extend(c for c in divergencias(chats) if c["owner_id"] == dono["owner_id"])
+    resumo["chats_divergentes"] = len(chats_divergentes)
+
+    for chat in chats_divergentes[:max_chats]:
+        detalhe = migrate_atendimentos.comparar_linhas([filtro_igual("owner_id", chat["owner_id"]),
+                                                        filtro_igual("chat_id", chat["chat_id"])])
+        resumo["chats_detalhados"] += 1
+        resumo["sem_mensagens"] += detalhe["sem_mensagens"]
+        resumo["status_divergente"] += detalhe["status_divergente"]
+        for exemplo in detalhe["exemplos"]:
+            if len(resumo["exemplos"]) < 10:
+                resumo["exemplos"].append({"owner_id": chat["owner_id"], "chat_id": chat["chat_id"], **exemplo})
+
+    aprovado = not chats_divergentes and not donos_divergentes
+    resumo["segundos"] = round(time.perf_counter() - inicio, 2)
+    if journal is not None:
+        journal.record_verification(aprovado, resumo)
+    return aprovado, resumo
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificar a migração de atendimentos por checksum")
+    parser.add_argument("--journal", default=migrate_atendimentos.JOURNAL_PATH)
+    parser.add_argument("--dono", default=None, help="Verificar só este owner_id")
+    parser.add_argument("--max-chats", type=int, default=MAX_CHATS_DETALHADOS, help="Chats divergentes conferidos linha a linha")
+    args = parser.parse_args()
+
+    print("🔍 Verificando migração por checksum...")
+    nome = f"{migrate_atendimentos.MIGRACAO_NOME}:{args.dono}" if args.dono else migrate_atendimentos.MIGRACAO_NOME
+    journal = MigrationJournal(args.journal, nome)
+    try:
+        aprovado, resumo = verificar_por_checksum(journal, args.dono, args.max_chats)
+    finally:
+        journal.close()
+
+    print(f"Donos: {resumo['donos']} ({resumo['donos_divergentes']} divergentes) | atendimentos: {resumo['atendimentos']} | "
+          f"chats divergentes: {resumo['chats_divergentes']} | impressões: {resumo['origem']} | {resumo['segundos']}s")
+    if not aprovado:
+        print(f"❌ Verificação reprovada ({resumo['chats_detalhados']} chats conferidos linha a linha: "
+              f"{resumo['sem_mensagens']} sem mensagens, {resumo['status_divergente']} status divergentes)")
+        print(json.dumps(resumo["exemplos"], indent=2, ensure_ascii=False))
+        return False
+    print("✅ Migração verificada")
+    return True
+
+# ------------------------------------------------------- stand-in (SQLite)
+
+def register_standin_rpcs(standin):
+    """Implementar atendimentos_fingerprints no local_standin (mesma agregação, dialeto SQLite)"""
+    standin.conn.create_function("fingerprint", 2, fingerprint, deterministic=True)
+
+    def fingerprints(standin, params, headers):
+        owner_id = params.get("p_owner_id")
+        owner_is_null = bool(params.get("p_owner_is_null"))
+        with standin.lock:
+            rows = standin.conn.execute(f"""
+                WITH mensagens AS (
+                    SELECT atendimento_id, min(status) AS status_min, max(status) AS status_max,
+                           count(*) - count(status) AS sem_status
+                    FROM whatsapp_mensagens WHERE atendimento_id IS NOT NULL GROUP BY atendimento_id
+                ), itens AS (
+                    SELECT a.owner_id, CASE WHEN :owner IS NULL AND NOT :owner_is_null THEN NULL ELSE a.chat_id END AS chat_id, a.id,
+                           coalesce(a.status, '{SEM_STATUS}') AS origem,
+                           CASE WHEN m.atendimento_id IS NULL THEN NULL
+                                WHEN a.status IS NULL THEN '{SEM_STATUS}'
+                                WHEN m.status_min = m.status_max AND m.sem_status = 0 THEN m.status_min
+                                ELSE '{STATUS_MISTO}' END AS destino
+                    FROM whatsapp_atendimentos a LEFT JOIN mensagens m ON m.atendimento_id = a.id
+                    WHERE (:owner IS NULL AND NOT :owner_is_null) OR a.owner_id IS :owner
+                ), lados AS (
+                    SELECT owner_id, chat_id, 'origem' AS lado, origem AS status, fingerprint(id, origem) AS h FROM itens
+                    UNION ALL
+                    SELECT owner_id, chat_id, 'destino', destino, fingerprint(id, destino) FROM itens WHERE destino IS NOT NULL
+                ), por_status AS (
+                    SELECT owner_id, chat_id, lado, status, count(*) AS n, sum(h) AS h
+                    FROM lados GROUP BY owner_id, chat_id, lado, status
+                )
+                SELECT owner_id, chat_id, lado, sum(n), json_group_object(status, n), sum(h)
+                FROM por_status GROUP BY owner_id, chat_id, lado
+            """, {"owner": owner_id, "owner_is_null": owner_is_null}).fetchall()
+        return [{"owner_id": o, "chat_id": c, "lado": lado, "total": total, "por_status": json.loads(hist), "hash": h}
+                for o, c, lado, total, hist, h in rows]
+
+    standin.register_rpc("atendimentos_fingerprints", fingerprints)
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência por página, com histórico por commit e detecção de regressão
+VBSolution - Sistema CRM Completo
+
+Cada página do PAGE_TABLE_MAPPING (verificar_mapeamento_sistema.py) é "carregada" N
+vezes: as consultas REST das suas tabelas, com os filtros, ordenação e limites que os
+hooks do frontend usam (TABLE_QUERIES de explain_page_queries.py), disparadas em
+paralelo como o navegador faz. Por página ficam o p50/p95/p99 do tempo até a última
+resposta chegar e os bytes recebidos.
+
+Os resultados vão para benchmark_results.json, por alvo e por commit do git. A base de
+comparação é --base, a base fixada com --set-baseline ou a execução mais recente de
+outro commit; uma página mais lenta no p95 (ou mais pesada em bytes) que o limite
+relativo faz o script sair com erro.
+
+Com --standin o benchmark sobe um local_standin semeado pelo generate_synthetic_dataset,
+com latência injetada (--latency-ms/--jitter-ms), sem tocar no projeto real.
+
+Execute: python benchmark_pages.py --standin [--latency-ms 20 --jitter-ms 5] [--set-baseline]
+         python benchmark_pages.py --user-id <uuid> --token <jwt do usuário>
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import supabase_rest
+from instrumentation import log, http, percentile, print_summary_at_exit
+from schema_cache import schema_from_openapi
+from supabase_rest import rest_url, rest_headers
+from verificar_mapeamento_sistema import PAGE_TABLE_MAPPING
+from explain_page_queries import TABLE_QUERIES, DEFAULT_QUERY
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.getenv("BENCHMARK_RESULTS", os.path.join(ROOT_DIR, "benchmark_results.json"))
+
+PAGE_TABLES = sorted({table for tables in PAGE_TABLE_MAPPING.values() for table in tables})
+
+# Conexões simultâneas por host de um navegador em HTTP/1.1
+BROWSER_CONNECTIONS = 6
+
+# Regressão: p95 acima da base além do limite relativo e do absoluto; bytes só pelo relativo
+REGRESSION_THRESHOLD = 0.20
+REGRESSION_MIN_MS = 2.0
+
+_local = threading.local()
+
+def session():
+    """Uma requests.Session (keep-alive) por thread do pool"""
+    if not hasattr(_local, "session"):
+        import requests
+
+        _local.session = requests.Session()
+    return _local.session
+
+def git_commit():
+    """Commit atual (12 dígitos), com -dirty se há alterações não commitadas em arquivos versionados"""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        commit = git("rev-parse", "--short=12", "HEAD")
+        dirty = git("status", "--porcelain", "--untracked-files=no")
+    except (OSError, subprocess.CalledProcessError):
+        return "sem-git"
+    return f"{commit}-dirty" if dirty else commit
+
+def page_queries(tables, schema, user_id, company_id):
+    """Consultas de uma página → ([(tabela, parâmetros)], [tabelas ausentes])"""
+    queries, missing = [], []
+    for table in tables:
+        if table not in schema:
+            missing.append(table)
+            continue
+
+        columns = schema[table]["columns"]
+        shape = TABLE_QUERIES.get(table, DEFAULT_QUERY)
+        params = {"select": "*", "limit": str(shape["limit"])}
+
+        filter_column = shape["filter"]
+        if filter_column == "company_id" and (not company_id or "company_id" not in columns):
+            filter_column = "owner_id"
+        if user_id and filter_column in columns:
+            params[filter_column] = f"eq.{company_id if filter_column == 'company_id' else user_id}"
+        if shape["order"] and shape["order"] in columns:
+            params["order"] = f"{shape['order']}.desc"
+
+        queries.append((table, params))
+    return queries, missing
+
+def fetch(table, params, headers):
+    started = time.perf_counter()
+    response = http("GET", rest_url(table), retries=0, session=session(), params=params, headers=headers)
+    return {
+        "table": table,
+        "ms": (time.perf_counter() - started) * 1000,
+        "bytes": len(response.content),
+        "ok": response.status_code == 200,
+    }
+
+def load_page(pool, queries, headers):
+    """Uma carga da página: todas as consultas em paralelo, tempo até a última resposta"""
+    started = time.perf_counter()
+    futures = [pool.submit(fetch, table, params, headers) for table, params in queries]
+    results = [future.result() for future in futures]
+    return (time.perf_counter() - started) * 1000, results
+
+def summarize_page(samples, missing):
+    walls = sorted(wall for wall, _ in samples)
+    page_bytes = sorted(sum(r["bytes"] for r in results) for _, results in samples)
+    per_table = {}
+    for _, results in samples:
+        for result in results:
+            entry = per_table.setdefault(result["table"], {"ms": [], "bytes": 0, "errors": 0})
+            entry["ms"].append(result["ms"])
+            entry["bytes"] = result["bytes"]
+            entry["errors"] += not result["ok"]
+
+    return {
+        "p50_ms": round(percentile(walls, 50), 2),
+        "p95_ms": round(percentile(walls, 95), 2),
+        "p99_ms": round(percentile(walls, 99), 2),
+        "bytes": page_bytes[len(page_bytes) // 2],
+        "errors": sum(entry["errors"] for entry in per_table.values()),
+        "missing": missing,
+        "tables": {
+            table: {"p50_ms": round(percentile(sorted(entry["ms"]), 50), 2), "bytes": entry["bytes"],
+                    "errors": entry["errors"]}
+            for table, entry in per_table.items()
+        },
+    }
+
+def run_pages(schema, user_id, company_id, iterations, warmup, headers, page_filter=None):
+    """Medir todas as páginas do mapeamento; devolve {página: resumo}"""
+    pages = {}
+    with ThreadPoolExecutor(BROWSER_CONNECTIONS) as pool:
+        for page_name, tables in PAGE_TABLE_MAPPING.items():
+            if page_filter and page_filter.lower() not in page_name.lower():
+                continue
+
+            queries, missing = page_queries(tables, schema, user_id, company_id)
+            if not queries:
+                log(f"⏭️ {page_name}: nenhuma tabela existe no alvo")
+                continue
+
+            for _ in range(warmup):
+                load_page(pool, queries, headers)
+            samples = [load_page(pool, queries, headers) for _ in range(iterations)]
+
+            page = pages[page_name] = summarize_page(samples, missing)
+            errors = f", ❌ {page['errors']} erros" if page["errors"] else ""
+            absent = f", ausentes: {', '.join(missing)}" if missing else ""
+            log(f"📱 {page_name}: p50 {page['p50_ms']:.1f} ms, p95 {page['p95_ms']:.1f} ms, "
+                f"p99 {page['p99_ms']:.1f} ms, {page['bytes']:,} bytes{errors}{absent}")
+    return pages
+
+# ---------------------------------------------------------------- histórico
+
+def load_store(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return {"targets": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_store(store, path=RESULTS_PATH):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def pick_baseline(history, commit, requested=None):
+    """Commit de comparação: o pedido, a base fixada ou a execução mais recente de outro commit"""
+    if requested:
+        return requested if requested in history["runs"] else None
+    if history.get("baseline") and history["baseline"] != commit:
+        return history["baseline"] if history["baseline"] in history["runs"] else None
+    others = [c for c in history["runs"] if c != commit]
+    return max(others, key=lambda c: history["runs"][c]["run_at"]) if others else None
+
+def find_regressions(current, base, threshold=REGRESSION_THRESHOLD, min_ms=REGRESSION_MIN_MS):
+    """Páginas mais lentas (p95), mais pesadas (bytes) ou com erros novos em relação à base"""
+    regressions = []
+    for page_name, page in current.items():
+        before = base["pages"].get(page_name)
+        if not before:
+            continue
+        delta = page["p95_ms"] - before["p95_ms"]
+        if delta > min_ms and delta > before["p95_ms"] * threshold:
+            regressions.append(f"{page_name}: p95 {before['p95_ms']:.1f} ms → {page['p95_ms']:.1f} ms")
+        if page["bytes"] > before["bytes"] * (1 + threshold):
+            regressions.append(f"{page_name}: {before['bytes']:,} → {page['bytes']:,} bytes")
+        if page["errors"] and not before["errors"]:
+            regressions.append(f"{page_name}: {page['errors']} erros (a base não tinha)")
+    return regressions
+
+# ---------------------------------------------------------------- stand-in
+
+def start_standin(latency_ms, jitter_ms, scale, seed):
+    """Stand-in semeado com latência injetada → (servidor, url, user_id, company_id)"""
+    from local_standin import StandIn, start_background
+    from generate_synthetic_dataset import build_plan, generate, StandInLoader
+
+    standin = StandIn(latency_ms=latency_ms, jitter_ms=jitter_ms)
+    plan = build_plan(seed, scale)
+    log(f"🧪 Semeando o stand-in (escala {scale}, semente {seed})...")
+    generate(plan, StandInLoader(standin), tables=[t for t in PAGE_TABLES if t in standin.tables])
+    server, url = start_background(standin)
+    tenant = plan["tenants"][0]  # a maior empresa (distribuição de Zipf)
+    return server, url, tenant["owner_id"], tenant["company_id"]
+
+def user_company(user_id, headers):
+    response = http("GET", rest_url("profiles"), retries=0, headers=headers,
+                    params={"select": "company_id", "id": f"eq.{user_id}"})
+    rows = response.json() if response.status_code == 200 else []
+    return rows[0].get("company_id") if rows else None
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de latência por página com histórico por commit")
+    parser.add_argument("--standin", action="store_true", help="Medir contra um stand-in local semeado")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latência injetada no stand-in")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Cauda exponencial injetada no stand-in")
+    parser.add_argument("--scale", type=float, default=0.01, help="Escala dos dados do stand-in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--user-id", default=os.getenv("TEST_USER_ID"), help="UUID do usuário dos filtros")
+    parser.add_argument("--token", default=os.getenv("TEST_USER_TOKEN"), help="JWT do usuário (RLS como no app)")
+    parser.add_argument("--page", default=None, help="Filtrar páginas pelo nome")
+    parser.add_argument("--iterations", type=int, default=30, help="Cargas medidas por página")
+    parser.add_argument("--warmup", type=int, default=3, help="Cargas descartadas por página")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Regressão relativa tolerada")
+    parser.add_argument("--min-ms", type=float, default=REGRESSION_MIN_MS, help="Regressão absoluta mínima do p95")
+    parser.add_argument("--base", default=None, help="Commit de comparação")
+    parser.add_argument("--set-baseline", action="store_true", help="Fixar este commit como base do alvo")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    server = None
+    if args.standin:
+        server, url, user_id, company_id = start_standin(args.latency_ms, args.jitter_ms, args.scale, args.seed)
+        supabase_rest.SUPABASE_URL = url
+        target = f"standin {args.latency_ms:g}+{args.jitter_ms:g}ms escala {args.scale:g}"
+    else:
+        user_id = args.user_id
+        target = urlsplit(supabase_rest.SUPABASE_URL).hostname
+    headers = rest_headers(token=None if args.standin else args.token)
+
+    try:
+        response = http("GET", rest_url(), retries=1, headers=headers)
+        if response.status_code != 200:
+            log(f"❌ API respondeu {response.status_code}: {response.text[:200]}", "ERROR")
+            return False
+        schema = schema_from_openapi(response.json())
+        if not args.standin:
+            if not user_id:
+                log("⚠️ Sem --user-id: as consultas vão sem o filtro por usuário/empresa", "WARNING")
+            company_id = user_company(user_id, headers) if user_id else None
+
+        commit = git_commit()
+        log(f"⏱️ BENCHMARK POR PÁGINA: {target}, commit {commit}, {args.iterations} cargas por página")
+        log("=" * 80)
+        pages = run_pages(schema, user_id, company_id, max(1, args.iterations), max(0, args.warmup),
+                          headers, args.page)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    store = load_store(args.results)
+    history = store["targets"].setdefault(target, {"baseline": None, "runs": {}})
+    base_commit = pick_baseline(history, commit, args.base)
+    base = history["runs"].get(base_commit)
+
+    history["runs"][commit] = {
+        "run_at": datetime.now().isoformat(),
+        "iterations": args.iterations,
+        "user_id": user_id,
+        "pages": pages,
+    }
+    if args.set_baseline:
+        history["baseline"] = commit
+    save_store(store, args.results)
+
+    log("\n" + "=" * 80)
+    log("📊 RESUMO:")
+    log(f"   📁 Resultados em {args.results} (alvo \"{target}\", commit {commit})")
+    if args.set_baseline:
+        log(f"   📌 {commit} é a nova base deste alvo")
+
+    if base is None:
+        if args.base:
+            log(f"   ❌ Commit {args.base} sem resultados para este alvo", "ERROR")
+            return False
+        log("   ℹ️ Sem execução anterior de outro commit - nada para comparar")
+        return True
+
+    regressions = find_regressions(pages, base, args.threshold, args.min_ms)
+    if not regressions:
+        log(f"   ✅ Nenhuma regressão em relação a {base_commit}")
+        return True
+
+    log(f"   ❌ {len(regressions)} regressões em relação a {base_commit}:", "WARNING")
+    for item in regressions:
+        log(f"      {item}", "WARNING")
+    return False
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Benchmark interrompido pelo usuário", "WARNING")
+        sys.exit(1)
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Carga em lote genérica para qualquer tabela do CRM
+VBSolution - Sistema CRM Completo
+
+Um comando só para importar NDJSON, CSV ou Parquet (XLSX também) em qualquer
+tabela do cache de schema: o arquivo é lido em streaming, cada valor é convertido
+para o tipo da coluna (números, booleanos, datas dd/mm/aaaa, jsonb, arrays, uuid),
+colunas desconhecidas são ignoradas e linhas que faltam colunas obrigatórias vão
+para o arquivo de erros.
+
+Dois caminhos de escrita:
+- API (padrão): lotes em POSTs de array enviados por várias threads, com no máximo
+  2 lotes por thread em voo (a leitura espera quando o servidor não acompanha).
+  Lotes recusados são divididos até isolar as linhas ruins.
+- COPY: com uma connection string do Postgres (--dsn ou DATABASE_URL), as linhas
+  vão direto por COPY FROM STDIN, muito mais rápido que a API. Sem upsert: uma linha
+  ruim aborta a carga inteira. O COPY leva todas as colunas conhecidas da tabela (a
+  chave que falta numa linha vira NULL, como no INSERT), menos as colunas com DEFAULT
+  que a primeira linha não traz, que ficam com o DEFAULT.
+
+Execute: python bulk_load.py load products produtos.ndjson [--on-conflict id] [--workers 4]
+         python bulk_load.py load leads leads.csv --dsn postgresql://...
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import itertools
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from instrumentation import log, print_summary_at_exit
+from supabase_rest import rest_headers
+from rest_bulk import bulk_insert, AMBIGUOUS_STATUSES
+from row_models import NUMERIC_TYPES, FLOAT_TYPES
+from schema_cache import load_schema_cache, schema_from_migrations
+from tabular_input import read_rows, ErrorFile, READERS
+
+DEFAULT_BATCH_ROWS = 1000
+DEFAULT_WORKERS = 4
+TRUE_VALUES = {"true", "t", "1", "sim", "s", "yes", "y", "verdadeiro"}
+FALSE_VALUES = {"false", "f", "0", "nao", "não", "n", "no", "falso"}
+DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S")
+TEXT_TYPES = {"text", "character varying", "varchar", "character", "char", "citext"}
+
+class RowError(ValueError):
+    pass
+
+def table_schema(table):
+    """Colunas da tabela pelo cache de schema; sem cache, pelas migrações do repositório"""
+    tables = load_schema_cache() or schema_from_migrations(merge=True)
+    if table not in tables:
+        raise RuntimeError(f"Tabela {table} não está no schema (atualize com: python schema_cache.py)")
+    return tables[table]
+
+def base_type(column_type):
+    """'varchar(255)' → ('varchar', 255); 'text[]' → ('text[]', None)"""
+    text = (column_type or "text").strip().lower()
+    if "(" in text and not text.endswith("[]"):
+        name, _, size = text.partition("(")
+        size = size.rstrip(")").split(",")[0].strip()
+        return name.strip(), int(size) if size.isdigit() else None
+    return text, None
+
+def parse_number(value):
+    """Decimal de 12.5, '12,5', '1.234,56' ou '1,234.56'"""
+    if isinstance(value, bool):
+        raise RowError(f"número inválido: {value}")
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    text = str(value).strip().replace(" ", "")
+    if "," in text and "." in text:
+        text = text.replace(".", "").replace(",", ".") if text.rfind(",") > text.rfind(".") else text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise RowError(f"número inválido: {value}")
+
+def parse_timestamp(value, only_date=False):
+    """ISO 8601 (com ou sem fuso, 'Z') ou dd/mm/aaaa [hh:mm[:ss]] → texto ISO"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        return value.isoformat()
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            for pattern in DATE_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, pattern)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise RowError(f"data inválida: {value}")
+    return parsed.date().isoformat() if only_date else parsed.isoformat()
+
+def parse_array(value):
+    """Lista a partir de lista, JSON '["a","b"]', literal do Postgres '{a,b}' ou 'a;b' / 'a,b'"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    text = str(value).strip()
+    if text.startswith("["):
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise RowError(f"array inválido: {value}")
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    separator = ";" if ";" in text else ","
+    return [item.strip().strip('"') for item in text.split(separator) if item.strip()]
+
+def coerce(value, column_type):
+    """Valor do arquivo → valor JSON para a coluna (RowError se não converte)"""
+    if value is None or (isinstance(value, str) and value.strip() == ""):
+        return None
+    name, size = base_type(column_type)
+
+    if name.endswith("[]"):
+        return [coerce(item, name[:-2]) for item in parse_array(value)]
+    if name in NUMERIC_TYPES:
+        number = parse_number(value)
+        if number != number.to_integral_value():
+            raise RowError(f"inteiro inválido: {value}")
+        return int(number)
+    if name in FLOAT_TYPES:
+        number = parse_number(value)
+        # numeric/decimal vão como texto para não perder precisão em float
+        return str(number) if name in ("numeric", "decimal") else float(number)
+    if name == "boolean":
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise RowError(f"booleano inválido: {value}")
+    if name in ("jsonb", "json"):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                raise RowError(f"JSON inválido: {value[:80]}")
+        return value
+    if name == "uuid":
+        try:
+            return str(uuid.UUID(str(value).strip()))
+        except ValueError:
+            raise RowError(f"uuid inválido: {value}")
+    if name == "date":
+        return parse_timestamp(value, only_date=True)
+    if name.startswith("timestamp"):
+        return parse_timestamp(value)
+
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+    if size and name in TEXT_TYPES and len(text) > size:
+        raise RowError(f"texto passa de {size} caracteres")
+    return text
+
+class RowConverter:
+    """Converter as linhas do arquivo para as colunas da tabela"""
+
+    def __init__(self, table, schema, ignored=None):
+        self.table = table
+        self.types = {name: column["type"] for name, column in schema["columns"].items()}
+        self.defaulted = {name for name, column in schema["columns"].items() if column.get("default") is not None}
+        self.required = [
+            name for name, column in schema["columns"].items()
+            if column.get("not_null") and column.get("default") is None
+        ]
+        self.ignored = ignored if ignored is not None else set()  # compartilhado entre arquivos: avisa uma vez
+
+    def convert(self, row):
+        record = {}
+        for key, value in row.items():
+            column_type = self.types.get(key)
+            if column_type is None:
+                if key not in self.ignored:
+                    self.ignored.add(key)
+                    log(f"⚠️ Coluna {key} não existe em {self.table}; ignorada", "WARNING")
+                continue
+            try:
+                record[key] = coerce(value, column_type)
+            except RowError as exc:
+                raise RowError(f"{key}: {exc}")
+        missing = [column for column in self.required if record.get(column) is None]
+        if missing:
+            raise RowError(f"colunas obrigatórias sem valor: {', '.join(missing)}")
+        return record
+
+def converted_rows(path, file_format, converter, errors, summary):
+    """(linha, original, convertida) das linhas válidas; as inválidas vão para o arquivo de erros"""
+    for line_number, row in read_rows(path, file_format):
+        summary["read"] += 1
+        try:
+            yield line_number, row, converter.convert(row)
+        except RowError as exc:
+            errors.write(line_number, str(exc), row)
+
+def insert_isolating(table, batch, on_conflict, headers):
+    """POST do lote; partes recusadas são divididas ao meio até isolar as linhas ruins
+
+    Cada POST é atômico: uma parte recusada pelo banco (4xx, 500) não gravou nada e pode
+    ser reenviada. Uma falha do gateway (502/503/504) pode chegar depois do COMMIT; sem
+    upsert, reenviar duplicaria as linhas, então a parte inteira vai para o arquivo de
+    erros como incerta. Devolve (gravadas, requisições, [(linha, erro, original)]). Roda nas threads.
+    """
+    results = bulk_insert(table, [record for _, _, record in batch], on_conflict=on_conflict,
+                          headers=headers, missing_default=True)
+    inserted, requests, failures = 0, len(results), []
+    offset = 0
+    for result in results:
+        part = batch[offset:offset + result["rows"]]
+        offset += result["rows"]
+        if result["ok"]:
+            inserted += len(part)
+        elif len(part) == 1:
+            line_number, original, _ = part[0]
+            failures.append((line_number, f"servidor {result['status']}: {result['error']}", original))
+        elif result["status"] in AMBIGUOUS_STATUSES and not on_conflict:
+            error = f"servidor {result['status']}: lote pode ter sido gravado; confira antes de reenviar (ou use --on-conflict)"
+            failures += [(line_number, error, original) for line_number, original, _ in part]
+        else:
+            middle = len(part) // 2
+            for half in (part[:middle], part[middle:]):
+                half_inserted, half_requests, half_failures = insert_isolating(table, half, on_conflict, headers)
+                inserted += half_inserted
+                requests += half_requests
+                failures += half_failures
+    return inserted, requests, failures
+
+def load_rest(table, rows, summary, errors, on_conflict=None, workers=DEFAULT_WORKERS,
+              batch_rows=DEFAULT_BATCH_ROWS, headers=None):
+    """Lotes em paralelo pela API, com no máximo 2 lotes por thread em voo"""
+    headers = headers or rest_headers()
+    pending = set()
+    started = last_report = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            inserted, requests, failures = future.result()
+            summary["loaded"] += inserted
+            summary["requests"] += requests
+            for line_number, error, original in failures:
+                errors.write(line_number, error, original)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) < batch_rows:
+                continue
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(insert_isolating, table, batch, on_conflict, headers))
+            batch = []
+
+            if time.perf_counter() - last_report > 5:
+                last_report = time.perf_counter()
+                rate = summary["loaded"] / (last_report - started)
+                log(f"📦 {summary['read']:,} lidas, {summary['loaded']:,} gravadas ({rate:,.0f} linhas/s, {len(pending)} lotes em voo)")
+        if batch:
+            pending.add(executor.submit(insert_isolating, table, batch, on_conflict, headers))
+        collect(wait(pending).done)
+
+def copy_columns(available, converter, first):
+    """Colunas do COPY: as da tabela que o schema conhece, menos as com DEFAULT ausentes na 1ª linha"""
+    return [column for column in available
+            if column in converter.types and (column in first or column not in converter.defaulted)]
+
+def copy_records(rows, columns, available, converter, errors):
+    """Linhas convertidas para o COPY; as que não cabem na lista fixa de colunas vão para os erros
+
+    No COPY não há como pedir o DEFAULT para uma linha só: uma coluna com DEFAULT precisa
+    faltar em todas as linhas (fica fora do COPY) ou em nenhuma (vai no COPY).
+    """
+    listed = set(columns)
+    required = [column for column in columns if column in converter.defaulted]
+    skipped = [column for column in available if column in converter.defaulted and column not in listed]
+    for line_number, original, record in rows:
+        problems = ([f"{c} ausente (as primeiras linhas têm valor)" for c in required if c not in record]
+                    + [f"{c} presente (as primeiras linhas usam o DEFAULT)" for c in skipped
+                       if record.get(c) is not None])
+        if problems:
+            errors.write(line_number, f"COPY: {'; '.join(problems)}", original)
+            continue
+        yield record
+
+def load_copy(table, rows, summary, errors, converter, dsn=None, disable_triggers=False):
+    """COPY FROM STDIN direto no Postgres (uma transação; sem upsert)"""
+    from postgres_direct import connect
+    from generate_synthetic_dataset import CopyLoader
+
+    conn = connect(dsn)
+    try:
+        loader = CopyLoader(conn, disable_triggers)
+        available = loader.columns(table)
+        first = next(rows, None)
+        if first is None:
+            return
+        columns = copy_columns(available, converter, first[2])
+        records = copy_records(itertools.chain([first], rows), columns, available, converter, errors)
+        summary["loaded"] += loader.load(table, columns, records)
+        summary["requests"] += 1
+    finally:
+        conn.close()
+
+def bulk_load(table, path, file_format=None, on_conflict=None, workers=DEFAULT_WORKERS, batch_rows=DEFAULT_BATCH_ROWS,
+              dsn=None, error_path=None, headers=None, disable_triggers=False, ignored_columns=None):
+    """Carregar o arquivo na tabela; devolve o resumo (lidas, gravadas, rejeitadas, segundos, via)"""
+    converter = RowConverter(table, table_schema(table), ignored_columns)
+    errors = ErrorFile(error_path or f"{path}.erros.csv")
+    summary = {"table": table, "read": 0, "loaded": 0, "requests": 0, "via": "copy" if dsn else "rest"}
+    started = time.perf_counter()
+
+    try:
+        rows = converted_rows(path, file_format, converter, errors, summary)
+        if dsn:
+            if on_conflict:
+                log("⚠️ COPY não faz upsert; --on-conflict ignorado", "WARNING")
+            load_copy(table, rows, summary, errors, converter, dsn, disable_triggers)
+        else:
+            load_rest(table, rows, summary, errors, on_conflict, workers, batch_rows, headers)
+    finally:
+        errors.close()
+
+    elapsed = time.perf_counter() - started
+    summary.update({"rejected": errors.count, "ignored_columns": sorted(converter.ignored), "seconds": elapsed,
+                    "rows_per_second": summary["loaded"] / elapsed if elapsed else 0,
+                    "error_path": errors.path if errors.count else None})
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga em lote de NDJSON/CSV/Parquet em qualquer tabela do CRM")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Carregar um arquivo numa tabela")
+    load.add_argument("table")
+    load.add_argument("path")
+    load.add_argument("--format", choices=sorted(READERS), default=None, help="Padrão: pela extensão")
+    load.add_argument("--on-conflict", default=None, help="Colunas do upsert (ex: id); sem isso, só insere")
+    load.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads de envio pela API")
+    load.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Linhas por lote")
+    load.add_argument("--dsn", default=None, help="Connection string do Postgres: carga por COPY")
+    load.add_argument("--copy", action="store_true", help="Usar COPY com DATABASE_URL")
+    load.add_argument("--errors", default=None, help="Arquivo das linhas rejeitadas (padrão: <arquivo>.erros.csv)")
+    args = parser.parse_args()
+
+    dsn = args.dsn or (os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL") if args.copy else None)
+    if args.copy and not dsn:
+        log("❌ --copy precisa de --dsn ou DATABASE_URL", "ERROR")
+        return False
+
+    log(f"📥 Carregando {args.path} em {args.table} via {'COPY' if dsn else 'API'}...")
+    try:
+        summary = bulk_load(args.table, args.path, args.format, args.on_conflict, max(1, args.workers),
+                            max(1, args.batch_rows), dsn, args.errors)
+    except (OSError, RuntimeError, ValueError) as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+
+    log(f"✅ {summary['loaded']:,} de {summary['read']:,} linhas gravadas em {summary['table']} em {summary['seconds']:.1f}s "
+        f"({summary['rows_per_second']:,.0f} linhas/s, {summary['requests']} requisições, via {summary['via']})")
+    if summary["ignored_columns"]:
+        log(f"🙈 Colunas ignoradas: {', '.join(summary['ignored_columns'])}")
+    if summary["rejected"]:
+        log(f"⚠️ {summary['rejected']:,} linhas rejeitadas em {summary['error_path']}", "WARNING")
+    return summary["loaded"] > 0 or summary["read"] == 0
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
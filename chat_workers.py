@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Execução paralela com ordem garantida por conversa (chat_id)
+VBSolution - Sistema CRM Completo
+
+Só as mensagens de uma mesma conversa precisam ser escritas em ordem. O
+ChatShardedExecutor tem N threads, cada uma com a sua fila; a tarefa vai para a
+thread crc32(chat_id) % N, então tudo de um chat roda em sequência, na ordem de
+envio, enquanto chats diferentes andam em paralelo. As filas são limitadas: quem
+envia espera quando os workers estão atrás (memória não cresce com a tabela).
+
+RateLimiter é um balde de fichas global para as requisições REST. Registrado com
+instrumentation.set_rate_limiter, cada http() pega uma ficha antes de sair; quando
+o servidor devolve 429/503 a taxa cai pela metade e todas as threads esperam o
+Retry-After, voltando aos poucos à taxa configurada.
+
+Uso:   with ChatShardedExecutor(workers=8) as executor:
+           futuro = executor.submit(mensagem["chat_id"], gravar, mensagem)
+"""
+
+import time
+import zlib
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+DEFAULT_QUEUE_SIZE = 4
+
+class RateLimiter:
+    """Balde de fichas compartilhado entre threads, que recua quando o servidor reclama"""
+
+    def __init__(self, rate, burst=None, min_rate=1.0, recovery=10.0):
+        if rate <= 0:
+            raise ValueError("A taxa precisa ser positiva")
+        self.target = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self.min_rate = min(float(min_rate), self.target)
+        self.recovery = recovery  # segundos para voltar de min_rate à taxa cheia
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.pushbacks = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        if self.rate < self.target:
+            self.rate = min(self.target, self.rate + self.target * elapsed / self.recovery)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def acquire(self):
+        """Esperar uma ficha (e o fim de uma pausa pedida pelo servidor)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pushback(self, delay=None):
+        """O servidor pediu calma (429/503): taxa pela metade e pausa global de `delay` segundos"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if delay:
+                self.paused_until = max(self.paused_until, now + delay)
+            self.pushbacks += 1
+
+def shard_of(chat_id, workers):
+    """Worker de um chat: estável entre execuções (crc32, não hash() do Python)"""
+    return zlib.crc32(str(chat_id).encode("utf-8")) % workers
+
+class ChatShardedExecutor:
+    """N threads com uma fila cada; tarefas do mesmo chat_id sempre na mesma thread, em ordem"""
+
+    def __init__(self, workers=4, queue_size=DEFAULT_QUEUE_SIZE, name="chat-worker"):
+        if workers < 1:
+            raise ValueError("É preciso ao menos um worker")
+        self.workers = workers
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(q,), name=f"{name}-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        self._closed = False
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def _run(tasks):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def shard(self, chat_id):
+        return shard_of(chat_id, self.workers)
+
+    def partition(self, items, chat_key):
+        """Separar itens por worker, mantendo a ordem original dentro de cada parte"""
+        parts = defaultdict(list)
+        for item in items:
+            parts[self.shard(chat_key(item))].append(item)
+        return dict(parts)
+
+    def submit_shard(self, shard, fn, *args, **kwargs):
+        """Enfileirar no worker `shard` (bloqueia enquanto a fila dele estiver cheia)"""
+        if self._closed:
+            raise RuntimeError("Executor já encerrado")
+        future = Future()
+        self._queues[shard].put((future, fn, args, kwargs))
+        return future
+
+    def submit(self, chat_id, fn, *args, **kwargs):
+        return self.submit_shard(self.shard(chat_id), fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._queues:
+            tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+        return False
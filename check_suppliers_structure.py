@@ -3,8 +3,8 @@
 Script para verificar a estrutura da tabela suppliers
 """
 
-import requests
 import json
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -18,19 +18,13 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def check_suppliers_structure():
     """Verificar a estrutura da tabela suppliers"""
     try:
         log("🔍 Verificando estrutura da tabela suppliers...")
         
         # Tentar buscar dados da tabela (sem filtros)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/suppliers", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/suppliers", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -44,7 +38,8 @@ def check_suppliers_structure():
                 log("📋 Tabela vazia - verificando estrutura via SELECT vazio")
                 
                 # Tentar SELECT vazio para ver a estrutura
-                response = requests.get(
+                response = http(
+                    "GET",
                     f"{SUPABASE_URL}/rest/v1/suppliers?select=*&limit=0", 
                     headers=headers
                 )
@@ -74,7 +69,8 @@ def test_simple_insert():
             "name": "Teste Simples"
         }
         
-        response = requests.post(
+        response = http(
+            "POST",
             f"{SUPABASE_URL}/rest/v1/suppliers",
             headers=headers,
             json=test_data
@@ -108,7 +104,8 @@ def check_required_columns():
         for i, test_case in enumerate(test_cases, 1):
             log(f"🧪 Teste {i}: {test_case}")
             
-            response = requests.post(
+            response = http(
+                "POST",
                 f"{SUPABASE_URL}/rest/v1/suppliers",
                 headers=headers,
                 json=test_case
@@ -139,4 +136,5 @@ def main():
     log("✅ Verificação concluída!")
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
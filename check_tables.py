@@ -4,9 +4,9 @@ Script para verificar todas as tabelas existentes no Supabase e analisar sincron
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, span, print_summary_at_exit
+from table_probe import ESSENTIAL_TABLES, UP_STATUSES, DENIED_STATUSES, probe_headers, probe_table
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,44 +20,37 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def get_all_tables():
     """Listar todas as tabelas disponíveis"""
     try:
         log("🔍 Listando todas as tabelas disponíveis...")
         
         # Tentar acessar diferentes tabelas conhecidas
-        known_tables = [
-            'profiles', 'companies', 'employees', 'products', 'suppliers',
-            'inventory', 'leads', 'deals', 'activities', 'projects',
-            'work_groups', 'whatsapp_atendimentos', 'whatsapp_mensagens',
+        known_tables = ESSENTIAL_TABLES + [
             'customers', 'orders', 'payments', 'tasks', 'notes',
             'documents', 'files', 'settings', 'notifications'
         ]
         
         available_tables = []
         accessible_tables = []
+        probe_headers_anon = probe_headers(SUPABASE_ANON_KEY)
         
         for table in known_tables:
-            try:
-                response = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
-                
-                if response.status_code == 200:
-                    available_tables.append(table)
-                    accessible_tables.append(table)
-                    log(f"✅ Tabela {table} - ACESSÍVEL")
-                elif response.status_code in [401, 403]:
-                    available_tables.append(table)
-                    log(f"🔒 Tabela {table} - COM RLS ATIVO")
-                else:
-                    log(f"❌ Tabela {table} - Status {response.status_code}")
-                    
-            except Exception as e:
-                log(f"⚠️ Erro ao testar tabela {table}: {str(e)}", "WARNING")
+            with span(f"HEAD {table}") as current:
+                result = probe_table(table, probe_headers_anon, base_url=SUPABASE_URL)
+                current.status = result["status"]
+            
+            if result["status"] in UP_STATUSES:
+                available_tables.append(table)
+                accessible_tables.append(table)
+                log(f"✅ Tabela {table} - ACESSÍVEL")
+            elif result["status"] in DENIED_STATUSES:
+                available_tables.append(table)
+                log(f"🔒 Tabela {table} - COM RLS ATIVO")
+            elif result["failure"]:
+                log(f"⚠️ Erro ao testar tabela {table}: {result['failure']}", "WARNING")
+            else:
+                log(f"❌ Tabela {table} - Status {result['status']}")
         
         return available_tables, accessible_tables
         
@@ -68,7 +61,7 @@ def get_all_tables():
 def check_table_structure(table_name):
     """Verificar estrutura de uma tabela específica"""
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=1", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -212,6 +205,7 @@ def main():
     return is_synchronized
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
@@ -3,8 +3,8 @@
 Script para criar a tabela suppliers via API REST do Supabase
 """
 
-import requests
 import json
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -18,18 +18,12 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_connection():
     """Testar conexão com o Supabase"""
     try:
         log("🔗 Testando conexão com o Supabase...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             log("✅ Conexão estabelecida com sucesso!")
@@ -48,7 +42,7 @@ def check_table_exists():
         log("🔍 Verificando se a tabela suppliers existe...")
         
         # Tentar acessar a tabela suppliers
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/suppliers", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/suppliers", headers=headers)
         
         if response.status_code == 200:
             log("✅ Tabela suppliers já existe!")
@@ -80,7 +74,8 @@ def create_suppliers_table():
         }
         
         # Tentar inserir (isso pode criar a tabela automaticamente)
-        response = requests.post(
+        response = http(
+            "POST",
             f"{SUPABASE_URL}/rest/v1/suppliers",
             headers=headers,
             json=test_supplier
@@ -129,7 +124,8 @@ def insert_sample_suppliers():
         successful_inserts = 0
         
         for supplier in sample_suppliers:
-            response = requests.post(
+            response = http(
+                "POST",
                 f"{SUPABASE_URL}/rest/v1/suppliers",
                 headers=headers,
                 json=supplier
@@ -180,4 +176,5 @@ def main():
         log("💡 Você pode precisar executar o SQL manualmente no Supabase")
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
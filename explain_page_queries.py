@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Executar as consultas reais de cada página sob EXPLAIN (ANALYZE, BUFFERS)
+VBSolution - Sistema CRM Completo
+
+Transforma o PAGE_TABLE_MAPPING de verificar_mapeamento_sistema.py nas consultas
+que o frontend faz (filtro por owner_id/company_id, ordenação e limite), roda cada
+uma como um usuário de teste com RLS aplicado e guarda planos e tempos por página.
+Scans sequenciais e regressões em relação à execução anterior são sinalizados.
+
+Execute: python explain_page_queries.py --user-id <uuid do usuário de teste>
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from postgres_direct import connect, act_as_user, table_columns
+from verificar_mapeamento_sistema import PAGE_TABLE_MAPPING
+from instrumentation import log, print_summary_at_exit
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "explain_results")
+
+# Forma da consulta que as páginas fazem em cada tabela (hooks do frontend)
+DEFAULT_QUERY = {"filter": "owner_id", "order": "created_at", "limit": 100}
+TABLE_QUERIES = {
+    "activities": {"filter": "company_id", "order": "created_at", "limit": 100},
+    "profiles": {"filter": "id", "order": None, "limit": 1},
+    "company_settings": {"filter": "company_id", "order": None, "limit": 1},
+    "whatsapp_atendimentos": {"filter": "owner_id", "order": "ultima_mensagem", "limit": 50},
+    "whatsapp_mensagens": {"filter": "owner_id", "order": "timestamp", "limit": 50},
+}
+
+# Regressão: mais lento que a execução anterior além do limite relativo e absoluto
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_MIN_MS = 1.0
+
+def get_user_company(cursor, user_id):
+    """Buscar o company_id do usuário de teste"""
+    cursor.execute("SELECT company_id FROM public.profiles WHERE id = %s", (user_id,))
+    row = cursor.fetchone()
+    return str(row[0]) if row and row[0] else None
+
+def build_page_query(cursor, table_name, user_id, company_id):
+    """Montar a consulta da página para uma tabela, adaptada às colunas existentes"""
+    from psycopg2 import sql
+
+    columns = table_columns(cursor, table_name)
+    if not columns:
+        return None, None
+
+    shape = TABLE_QUERIES.get(table_name, DEFAULT_QUERY)
+    filter_column = shape["filter"]
+    if filter_column == "company_id" and (not company_id or "company_id" not in columns):
+        filter_column = "owner_id"
+    if filter_column not in columns:
+        filter_column = None
+
+    query = sql.SQL("SELECT * FROM public.{}").format(sql.Identifier(table_name))
+    params = []
+
+    if filter_column:
+        query += sql.SQL(" WHERE {} = %s").format(sql.Identifier(filter_column))
+        params.append(company_id if filter_column == "company_id" else user_id)
+
+    if shape["order"] and shape["order"] in columns:
+        query += sql.SQL(" ORDER BY {} DESC").format(sql.Identifier(shape["order"]))
+
+    query += sql.SQL(" LIMIT %s")
+    params.append(shape["limit"])
+
+    return query, params
+
+def collect_plan_stats(plan):
+    """Percorrer o plano e extrair scans sequenciais e buffers"""
+    seq_scans = []
+    buffers = {"shared_hit": 0, "shared_read": 0}
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan":
+            seq_scans.append({
+                "relation": node.get("Relation Name"),
+                "rows": node.get("Actual Rows", 0),
+                "rows_removed": node.get("Rows Removed by Filter", 0)
+            })
+        for child in node.get("Plans", []):
+            walk(child)
+
+    root = plan["Plan"]
+    walk(root)
+    buffers["shared_hit"] = root.get("Shared Hit Blocks", 0)
+    buffers["shared_read"] = root.get("Shared Read Blocks", 0)
+    return seq_scans, buffers
+
+def explain_query(conn, query, params, user_id, repeat):
+    """Rodar EXPLAIN ANALYZE como o usuário de teste e ficar com a execução mediana"""
+    from psycopg2 import sql
+
+    explain = sql.SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ") + query
+    samples = []
+
+    for _ in range(repeat):
+        with conn.cursor() as cursor:
+            act_as_user(cursor, user_id)
+            cursor.execute(explain, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            samples.append(plan[0])
+        conn.rollback()
+
+    samples.sort(key=lambda p: p["Execution Time"])
+    plan = samples[len(samples) // 2]
+    seq_scans, buffers = collect_plan_stats(plan)
+
+    return {
+        "sql": query.as_string(conn),
+        "execution_ms": plan["Execution Time"],
+        "planning_ms": plan["Planning Time"],
+        "rows": plan["Plan"].get("Actual Rows", 0),
+        "seq_scans": seq_scans,
+        **buffers,
+        "plan": plan
+    }
+
+def run_pages(conn, user_id, repeat, page_filter=None):
+    """Executar as consultas de todas as páginas do mapeamento"""
+    with conn.cursor() as cursor:
+        company_id = get_user_company(cursor, user_id)
+    conn.rollback()
+
+    log(f"👤 Usuário de teste: {user_id} (empresa: {company_id or 'nenhuma'})")
+    results = {}
+    cache = {}
+
+    for page_name, tables in PAGE_TABLE_MAPPING.items():
+        if page_filter and page_filter.lower() not in page_name.lower():
+            continue
+
+        log(f"\n📱 {page_name}")
+        log("-" * 60)
+        page = {"total_ms": 0.0, "queries": {}}
+
+        for table in tables:
+            if table not in cache:
+                with conn.cursor() as cursor:
+                    query, params = build_page_query(cursor, table, user_id, company_id)
+                conn.rollback()
+                cache[table] = explain_query(conn, query, params, user_id, repeat) if query else None
+
+            result = cache[table]
+            if result is None:
+                log(f"  {table}: ❌ Tabela não encontrada")
+                page["queries"][table] = {"missing": True}
+                continue
+
+            page["queries"][table] = result
+            page["total_ms"] += result["execution_ms"]
+            seq = " ⚠️ SEQ SCAN" if result["seq_scans"] else ""
+            log(f"  {table}: {result['execution_ms']:.2f} ms, {result['rows']} linhas, "
+                f"buffers {result['shared_hit']} hit / {result['shared_read']} read{seq}")
+
+        log(f"  ⏱️ Total da página: {page['total_ms']:.2f} ms")
+        results[page_name] = page
+
+    return results
+
+def load_previous_run(results_dir):
+    """Carregar a execução anterior mais recente"""
+    if not os.path.isdir(results_dir):
+        return None
+
+    runs = sorted(name for name in os.listdir(results_dir) if name.endswith(".json"))
+    if not runs:
+        return None
+
+    with open(os.path.join(results_dir, runs[-1]), encoding="utf-8") as f:
+        return json.load(f)
+
+def find_regressions(current, previous, threshold):
+    """Comparar tempos por consulta com a execução anterior"""
+    regressions = []
+
+    for page_name, page in current.items():
+        previous_page = previous.get("pages", {}).get(page_name)
+        if not previous_page:
+            continue
+
+        for table, result in page["queries"].items():
+            before = previous_page["queries"].get(table, {})
+            if result.get("missing") or before.get("missing") or "execution_ms" not in before:
+                continue
+
+            delta = result["execution_ms"] - before["execution_ms"]
+            if delta > REGRESSION_MIN_MS and delta > before["execution_ms"] * threshold:
+                regressions.append({
+                    "page": page_name,
+                    "table": table,
+                    "before_ms": before["execution_ms"],
+                    "after_ms": result["execution_ms"]
+                })
+
+            if result["seq_scans"] and not before.get("seq_scans"):
+                regressions.append({"page": page_name, "table": table, "new_seq_scan": True})
+
+    return regressions
+
+def save_run(results_dir, user_id, pages):
+    """Gravar planos e tempos desta execução"""
+    os.makedirs(results_dir, exist_ok=True)
+    run_at = datetime.now()
+    path = os.path.join(results_dir, run_at.strftime("%Y%m%d-%H%M%S") + ".json")
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run_at": run_at.isoformat(), "user_id": user_id, "pages": pages}, f, indent=2, ensure_ascii=False)
+
+    return path
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE das consultas de cada página")
+    parser.add_argument("--user-id", default=os.getenv("TEST_USER_ID"), help="UUID do usuário de teste")
+    parser.add_argument("--dsn", default=None, help="Connection string (padrão: DATABASE_URL)")
+    parser.add_argument("--page", default=None, help="Filtrar páginas pelo nome")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por consulta (usa a mediana)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Regressão relativa tolerada")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    if not args.user_id:
+        log("❌ Informe --user-id ou a variável TEST_USER_ID", "ERROR")
+        return False
+
+    log("🔬 EXPLAIN ANALYZE DAS CONSULTAS POR PÁGINA")
+    log("=" * 80)
+
+    previous = load_previous_run(args.results_dir)
+    conn = connect(args.dsn)
+    try:
+        pages = run_pages(conn, args.user_id, max(args.repeat, 1), args.page)
+    finally:
+        conn.close()
+
+    path = save_run(args.results_dir, args.user_id, pages)
+
+    seq_tables = sorted({
+        table for page in pages.values()
+        for table, result in page["queries"].items() if result.get("seq_scans")
+    })
+
+    log("\n" + "=" * 80)
+    log("📊 RESUMO:")
+    log(f"   📁 Resultados salvos em {path}")
+    log(f"   🐢 Tabelas com scan sequencial: {', '.join(seq_tables) if seq_tables else 'nenhuma'}")
+
+    if previous is None:
+        log("   ℹ️ Primeira execução - sem base para comparar regressões")
+        return True
+
+    regressions = find_regressions(pages, previous, args.threshold)
+    if not regressions:
+        log(f"   ✅ Nenhuma regressão desde {previous['run_at']}")
+        return True
+
+    log(f"   ❌ {len(regressions)} regressões desde {previous['run_at']}:", "WARNING")
+    for item in regressions:
+        if item.get("new_seq_scan"):
+            log(f"      {item['page']} → {item['table']}: novo scan sequencial", "WARNING")
+        else:
+            log(f"      {item['page']} → {item['table']}: {item['before_ms']:.2f} ms → {item['after_ms']:.2f} ms", "WARNING")
+    return False
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Execução interrompida pelo usuário", "WARNING")
+        sys.exit(1)
+    except Exception as e:
+        log(f"\n❌ Erro inesperado: {str(e)}", "ERROR")
+        sys.exit(1)
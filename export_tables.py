@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Exportação paralela de tabelas para NDJSON, CSV ou Parquet
+VBSolution - Sistema CRM Completo
+
+Cada tabela é dividida em faixas (da chave primária uuid/inteira ou de created_at)
+e as faixas são lidas ao mesmo tempo, cada uma por keyset em páginas, e gravadas
+em streaming num arquivo próprio comprimido (zstd, senão gzip; Parquet usa a
+compressão interna, um grupo de linhas por página). A memória fica em algumas
+páginas por thread, qualquer que seja o tamanho da tabela.
+
+Consistência: a API não compartilha um snapshot entre requisições. Em tabelas com
+created_at, só entram as linhas criadas até o início da exportação (o corte vai para
+o manifesto); alterações feitas durante a exportação podem ou não aparecer.
+
+O manifesto (manifest.json) registra, por tabela, o total esperado (count=exact),
+o total exportado e, por arquivo, a faixa, as linhas, os bytes e o SHA-256.
+Os arquivos NDJSON/CSV voltam pelo bulk_load.py (que lê .gz e .zst).
+
+Execute: python export_tables.py whatsapp_mensagens leads --saida exportacao/ [--formato csv] [--faixas 16]
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import gzip
+import time
+import hashlib
+import importlib.util
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from instrumentation import log, http, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+from rest_bulk import parse_count
+from rest_pagination import keyset_pages, filter_literal
+from row_models import NUMERIC_TYPES, FLOAT_TYPES
+from bulk_load import table_schema, base_type
+
+DEFAULT_RANGES = 16
+DEFAULT_WORKERS = 8
+DEFAULT_PAGE_SIZE = 1000
+FORMATS = ("ndjson", "csv", "parquet")
+UUID_ZERO_SUFFIX = "0000-0000-0000-000000000000"
+
+# ------------------------------------------------------------------ compressão
+
+def default_compression():
+    return "zstd" if importlib.util.find_spec("zstandard") else "gzip"
+
+def open_compressed(path, compression):
+    """Arquivo binário de escrita com compressão em streaming"""
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstandard não instalado. Execute: pip install zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"))
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    return open(path, "wb")
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ------------------------------------------------------------------ gravadores
+
+def text_value(value):
+    """Valor de célula CSV/Parquet: jsonb e arrays em JSON, nulo vazio"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+class NdjsonWriter:
+    extension = "ndjson"
+
+    def __init__(self, path, columns, types, compression):
+        self.file = open_compressed(path, compression)
+
+    def write(self, rows):
+        self.file.write(b"".join(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n" for row in rows))
+
+    def close(self):
+        self.file.close()
+
+class CsvWriter:
+    extension = "csv"
+
+    def __init__(self, path, columns, types, compression):
+        self.file = io.TextIOWrapper(open_compressed(path, compression), encoding="utf-8", newline="")
+        self.columns = columns
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows([text_value(row.get(c)) for c in self.columns] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+def arrow_schema(columns, types):
+    """Inteiros → int64, float/real → float64, boolean → bool; o resto (numeric, datas, jsonb...) como texto"""
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        name, _ = base_type(types.get(column))
+        if name in NUMERIC_TYPES:
+            arrow_type = pa.int64()
+        elif name in FLOAT_TYPES and name not in ("numeric", "decimal"):
+            arrow_type = pa.float64()
+        elif name == "boolean":
+            arrow_type = pa.bool_()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields, metadata={"postgres_types": json.dumps({c: types.get(c) for c in columns})})
+
+class ParquetWriter:
+    """Um grupo de linhas por página; compressão zstd/gzip do próprio Parquet"""
+    extension = "parquet"
+
+    def __init__(self, path, columns, types, compression):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow não instalado. Execute: pip install pyarrow")
+        self.pa = pa
+        self.columns = columns
+        self.schema = arrow_schema(columns, types)
+        self.text = {f.name for f in self.schema if f.type == pa.string()}
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression if compression != "nenhuma" else "none")
+
+    def value(self, row, column):
+        value = row.get(column)
+        if value is None or column not in self.text or isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+
+    def write(self, rows):
+        data = {c: [self.value(row, c) for row in rows] for c in self.columns}
+        self.writer.write_table(self.pa.Table.from_pydict(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+# ------------------------------------------------------------------ faixas
+
+def edge_value(table, column, descending=False, filters=None, headers=None):
+    """Primeiro (ou último) valor não nulo de uma coluna"""
+    params = [("select", column), ("order", f"{column}.{'desc' if descending else 'asc'}"),
+              (column, "not.is.null"), ("limit", "1")] + list(filters or [])
+    response = http("GET", rest_url(table), params=params, headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f"Erro ao ler {table}: {response.status_code} - {response.text}")
+    rows = response.json()
+    return rows[0][column] if rows else None
+
+def uuid_ranges(count):
+    """Faixas [início, fim) do espaço de uuids pelos 4 primeiros dígitos hexadecimais"""
+    bounds = [f"{i * 0x10000 // count:04x}0000-{UUID_ZERO_SUFFIX}" for i in range(count)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+def integer_ranges(low, high, count):
+    step = max(1, (high - low + count) // count)
+    bounds = list(range(low, high + 1, step))
+    return list(zip(bounds, bounds[1:] + [None]))
+
+def timestamp_ranges(low, high, count):
+    start, end = (datetime.fromisoformat(v.replace("Z", "+00:00")) for v in (low, high))
+    step = (end - start) / count
+    bounds = [low] + [(start + step * i).isoformat() for i in range(1, count)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+def plan_ranges(table, schema, by, count, filters, headers):
+    """(coluna, ordem, [(início, fim)]) para dividir a tabela; fim None = sem limite superior"""
+    if by == "created_at":
+        if "created_at" not in schema["columns"]:
+            raise RuntimeError(f"{table} não tem created_at")
+        low = edge_value(table, "created_at", filters=filters, headers=headers)
+        high = edge_value(table, "created_at", descending=True, filters=filters, headers=headers)
+        ranges = timestamp_ranges(low, high, count) if low and high and low != high else [(low, None)]
+        # Linhas sem created_at ficam numa faixa própria no fim
+        return "created_at", ("created_at", "id"), ranges + [("null", None)]
+
+    primary_key = schema.get("primary_key") or ["id"]
+    if len(primary_key) != 1:
+        return None, tuple(primary_key), [(None, None)]
+    column = primary_key[0]
+    name, _ = base_type(schema["columns"].get(column, {}).get("type"))
+    if name == "uuid":
+        return column, (column,), uuid_ranges(count)
+    if name in NUMERIC_TYPES:
+        low = edge_value(table, column, filters=filters, headers=headers)
+        high = edge_value(table, column, descending=True, filters=filters, headers=headers)
+        return column, (column,), integer_ranges(low, high, count) if low is not None else [(None, None)]
+    return column, (column,), [(None, None)]
+
+def range_filters(column, start, end):
+    if column is None or start is None:
+        return []
+    if start == "null":
+        return [(column, "is.null")]
+    return [(column, f"gte.{start}")] + ([(column, f"lt.{end}")] if end is not None else [])
+
+# ------------------------------------------------------------------ exportação
+
+class Progress:
+    def __init__(self):
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def add(self, rows):
+        with self.lock:
+            self.rows += rows
+
+def export_range(table, path, writer_class, columns, types, compression, order, filters, page_size, headers, progress):
+    """Ler uma faixa por keyset e gravar o arquivo; devolve as linhas, bytes e SHA-256"""
+    writer = writer_class(path, columns, types, compression)
+    rows = 0
+    try:
+        for page in keyset_pages(table, order=order, filters=filters, page_size=page_size, headers=headers):
+            writer.write(page)
+            rows += len(page)
+            progress.add(len(page))
+    finally:
+        writer.close()
+    return {"rows": rows, "bytes": os.path.getsize(path), "sha256": file_digest(path)}
+
+def count_rows(table, filters, headers):
+    response = http("GET", rest_url(table), params=[("select", "*"), ("limit", "0")] + filters,
+                    headers={**headers, "Prefer": "count=exact"})
+    return parse_count(response) if response.status_code in (200, 206) else None
+
+def export_tables(tables, output_dir, file_format="ndjson", compression=None, by="pk", ranges=DEFAULT_RANGES,
+                  workers=DEFAULT_WORKERS, page_size=DEFAULT_PAGE_SIZE, cutoff=True, headers=None):
+    """Exportar as tabelas em paralelo para output_dir; devolve o manifesto"""
+    headers = headers or rest_headers()
+    compression = compression or (default_compression() if file_format != "parquet" else "zstd")
+    writer_class = WRITERS[file_format]
+    suffix = {"zstd": ".zst", "gzip": ".gz"}.get(compression, "") if file_format != "parquet" else ""
+    started_at = datetime.now(timezone.utc).isoformat()
+    manifest = {"generated_at": started_at, "format": file_format, "compression": compression, "split_by": by, "tables": {}}
+    progress = Progress()
+    started = time.perf_counter()
+
+    tasks = []
+    for table in tables:
+        schema = table_schema(table)
+        types = {name: column["type"] for name, column in schema["columns"].items()}
+        base_filters = [("or", f"(created_at.lte.{filter_literal(started_at)},created_at.is.null)")] \
+            if cutoff and "created_at" in types else []
+        column, order, table_ranges = plan_ranges(table, schema, by, ranges, base_filters, headers)
+        expected = count_rows(table, base_filters, headers)
+        os.makedirs(os.path.join(output_dir, table), exist_ok=True)
+        manifest["tables"][table] = {"expected_rows": expected, "rows": 0, "cutoff": started_at if base_filters else None,
+                                     "order": list(order), "columns": types, "parts": []}
+        log(f"📋 {table}: {expected if expected is not None else '?'} linhas em {len(table_ranges)} faixas de {column or 'tabela inteira'}")
+
+        for index, (start, end) in enumerate(table_ranges):
+            name = f"part-{index:05d}.{writer_class.extension}{suffix}"
+            part = {"file": f"{table}/{name}", "column": column, "start": start, "end": end}
+            manifest["tables"][table]["parts"].append(part)
+            tasks.append((table, part, (os.path.join(output_dir, table, name), writer_class, list(types), types,
+                                        compression, order, base_filters + range_filters(column, start, end),
+                                        page_size, headers, progress)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(export_range, table, *args): (table, part) for table, part, args in tasks}
+        while pending:
+            done, _ = wait(pending, timeout=5, return_when=FIRST_COMPLETED)
+            for future in done:
+                table, part = pending.pop(future)
+                part.update(future.result())
+                manifest["tables"][table]["rows"] += part["rows"]
+            elapsed = time.perf_counter() - started
+            log(f"📦 {progress.rows:,} linhas ({progress.rows / elapsed:,.0f}/s), {len(tasks) - len(pending)}/{len(tasks)} faixas")
+
+    manifest["seconds"] = round(time.perf_counter() - started, 2)
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar tabelas em paralelo para NDJSON, CSV ou Parquet")
+    parser.add_argument("tables", nargs="+")
+    parser.add_argument("--saida", default="exportacao", help="Diretório de saída (manifest.json + uma pasta por tabela)")
+    parser.add_argument("--formato", choices=FORMATS, default="ndjson")
+    parser.add_argument("--compressao", choices=["zstd", "gzip", "nenhuma"], default=None,
+                        help="Padrão: zstd se instalado, senão gzip")
+    parser.add_argument("--por", choices=["pk", "created_at"], default="pk", help="Coluna usada para dividir as faixas")
+    parser.add_argument("--faixas", type=int, default=DEFAULT_RANGES, help="Faixas por tabela")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--pagina", type=int, default=DEFAULT_PAGE_SIZE, help="Linhas por página")
+    parser.add_argument("--sem-corte", action="store_true", help="Não limitar às linhas criadas até o início")
+    args = parser.parse_args()
+
+    log(f"📤 Exportando {', '.join(args.tables)} para {args.saida}/ ({args.formato})...")
+    try:
+        manifest = export_tables(args.tables, args.saida, args.formato, args.compressao, args.por, max(1, args.faixas),
+                                 max(1, args.workers), args.pagina, not args.sem_corte)
+    except (OSError, RuntimeError, ValueError) as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+
+    ok = True
+    for table, info in manifest["tables"].items():
+        if info["expected_rows"] is not None and info["rows"] != info["expected_rows"]:
+            ok = False
+            log(f"⚠️ {table}: {info['rows']:,} exportadas, {info['expected_rows']:,} esperadas "
+                "(linhas alteradas durante a exportação?)", "WARNING")
+        else:
+            log(f"✅ {table}: {info['rows']:,} linhas em {len(info['parts'])} arquivos")
+    log(f"🏁 {sum(t['rows'] for t in manifest['tables'].values()):,} linhas em {manifest['seconds']:.1f}s; "
+        f"manifesto em {os.path.join(args.saida, 'manifest.json')}")
+    return ok
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
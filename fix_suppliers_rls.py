@@ -4,8 +4,8 @@ Script para corrigir as políticas RLS da tabela suppliers
 """
 
 import os
-import requests
 import json
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -19,18 +19,12 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_connection():
     """Testar conexão com o Supabase"""
     try:
         log("🔗 Testando conexão com o Supabase...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             log("✅ Conexão estabelecida com sucesso!")
@@ -89,7 +83,8 @@ def apply_suppliers_fix():
                 log(f"🔧 Executando comando {i}/{len(commands)}...")
                 
                 # Usar o endpoint SQL para executar comandos
-                response = requests.post(
+                response = http(
+                    "POST",
                     f"{SUPABASE_URL}/rest/v1/rpc/exec_sql",
                     headers=headers,
                     json={'sql': command}
@@ -136,4 +131,5 @@ def main():
         log("❌ Falha ao aplicar correção. Verifique os logs acima.", "ERROR")
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
@@ -5,9 +5,8 @@ Script para corrigir RLS das tabelas WhatsApp
 
 import os
 import sys
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -21,11 +20,6 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def execute_sql(sql_query):
     """Executa uma query SQL no Supabase"""
     try:
@@ -35,7 +29,7 @@ def execute_sql(sql_query):
             "query": sql_query
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = http("POST", url, headers=headers, json=payload)
         
         if response.status_code == 200:
             log(f"✅ SQL executado com sucesso")
@@ -83,4 +77,5 @@ def main():
         log(f"⚠️ {success_count}/{len(sql_queries)} correções foram aplicadas", "WARNING")
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Snapshots de fixtures: capturar um conjunto de tabelas e restaurar depressa
+VBSolution - Sistema CRM Completo
+
+Em vez de limpar e semear as tabelas de novo a cada rodada de depuração
+(LIMPAR_DADOS_MOCKADOS.sql, INSERIR_PROJETO_TESTE.sql, scripts de seed), tire um
+snapshot uma vez e restaure quando precisar:
+
+- snapshot: exporta as tabelas pelo export_tables.py para snapshots/<nome>/ em
+  Parquet (o schema Arrow leva os tipos do Postgres nos metadados) ou NDJSON
+  comprimido, com o manifesto (linhas, SHA-256 e a ordem das FKs).
+- restore: confere os SHA-256, opcionalmente apaga as tabelas (na ordem inversa
+  das FKs) e carrega na ordem das FKs pelo bulk_load.py: COPY com --dsn ou
+  DATABASE_URL (segundos para ~1M linhas num Postgres local), senão upsert em
+  lotes pela chave primária pela API.
+
+--limpar é recusado se alguma FK ON DELETE CASCADE leva a exclusão para uma tabela
+fora do conjunto restaurado (17 FKs apontam para companies em cascata, por
+exemplo): ou elas entram no snapshot, ou são listadas em --cascata. Fora de um banco
+local (--dsn localhost ou stand-in), --limpar também exige --live.
+
+Execute: python fixture_snapshots.py snapshot base companies employees leads deals
+         python fixture_snapshots.py restore base --limpar [--dsn postgresql://localhost/postgres]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from graphlib import TopologicalSorter, CycleError
+from urllib.parse import urlsplit
+
+import supabase_rest
+from instrumentation import log, print_summary_at_exit
+from bulk_load import bulk_load, table_schema
+from export_tables import export_tables, file_digest, DEFAULT_WORKERS
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOTS_DIR = os.getenv("SNAPSHOTS_DIR", os.path.join(ROOT_DIR, "snapshots"))
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", ""}
+
+def fk_order(tables, schemas):
+    """Tabelas do conjunto em ordem de dependência: referenciadas antes de quem as referencia"""
+    graph = {
+        table: {
+            fk["ref_table"] for fk in schemas[table].get("foreign_keys", [])
+            if fk["ref_table"] in tables and fk["ref_table"] != table
+        }
+        for table in tables
+    }
+    try:
+        return list(TopologicalSorter(graph).static_order())
+    except CycleError as exc:
+        log(f"⚠️ FKs em ciclo ({' → '.join(exc.args[1])}); mantendo a ordem informada", "WARNING")
+        return list(tables)
+
+def snapshot_dir(name):
+    return os.path.join(SNAPSHOTS_DIR, name)
+
+def load_manifest(name):
+    path = os.path.join(snapshot_dir(name), "manifest.json")
+    if not os.path.exists(path):
+        raise RuntimeError(f"Snapshot {name} não encontrado em {path}")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def snapshot(name, tables, file_format="parquet", workers=DEFAULT_WORKERS):
+    """Exportar as tabelas para snapshots/<nome>/ e gravar a ordem das FKs no manifesto"""
+    schemas = {table: table_schema(table) for table in tables}
+    output_dir = snapshot_dir(name)
+    manifest = export_tables(tables, output_dir, file_format, workers=workers)
+    manifest.update({
+        "name": name,
+        "fk_order": fk_order(tables, schemas),
+        "primary_keys": {table: schemas[table].get("primary_key") or ["id"] for table in tables},
+    })
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+def verify_files(name, manifest):
+    """Conferir bytes e SHA-256 de cada arquivo contra o manifesto"""
+    for table, info in manifest["tables"].items():
+        for part in info["parts"]:
+            path = os.path.join(snapshot_dir(name), part["file"])
+            if not os.path.exists(path):
+                raise RuntimeError(f"Arquivo do snapshot ausente: {part['file']}")
+            if os.path.getsize(path) != part["bytes"] or file_digest(path) != part["sha256"]:
+                raise RuntimeError(f"Arquivo do snapshot alterado ou corrompido: {part['file']}")
+
+def catalog_cascades(conn, table):
+    """FKs ON DELETE CASCADE disparadas ao apagar `table`, pelo catálogo (em largura)"""
+    found, pending, seen = [], [table], {table}
+    with conn.cursor() as cursor:
+        while pending:
+            parent = pending.pop(0)
+            cursor.execute(
+                "SELECT ch.relname, a.attname FROM pg_constraint c "
+                "JOIN pg_class ch ON ch.oid = c.conrelid "
+                "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+                "WHERE c.contype = 'f' AND c.confdeltype = 'c' AND c.confrelid = %s::regclass ORDER BY 1, 2",
+                (f'public."{parent}"',),
+            )
+            for child, column in cursor.fetchall():
+                found.append({"table": child, "columns": [column], "ref_table": parent})
+                if child not in seen:
+                    seen.add(child)
+                    pending.append(child)
+    conn.commit()
+    return found
+
+def cascades_outside(tables, dsn=None):
+    """FKs em cascata que levam a exclusão de `tables` para tabelas fora do conjunto"""
+    if dsn:
+        from postgres_direct import connect
+
+        conn = connect(dsn)
+        try:
+            cascades = [fk for table in tables for fk in catalog_cascades(conn, table)]
+        finally:
+            conn.close()
+    else:
+        from purge_table import cascading_references
+
+        cascades = [fk for table in tables for fk in cascading_references(table)]
+    return [fk for fk in cascades if fk["table"] not in tables]
+
+def clear_tables(tables, dsn=None):
+    """Apagar as tabelas na ordem dada (a inversa das FKs); as cascatas já foram conferidas por restore()"""
+    if dsn:
+        from postgres_direct import connect
+
+        conn = connect(dsn)
+        try:
+            with conn.cursor() as cursor:
+                for table in tables:
+                    cursor.execute(f'DELETE FROM public."{table}"')
+                    log(f"🧹 {table}: {cursor.rowcount:,} linhas apagadas")
+            conn.commit()
+        finally:
+            conn.close()
+        return
+
+    from purge_table import purge
+
+    for table in tables:
+        summary = purge(table, max_lag=0, cascade=True)
+        log(f"🧹 {table}: {summary['deleted']:,} linhas apagadas")
+
+def restore(name, dsn=None, clean=False, tables=None, workers=DEFAULT_WORKERS, disable_triggers=False, cascade=()):
+    """Restaurar o snapshot na ordem das FKs; devolve {tabela: linhas carregadas}
+
+    Com clean, recusa a limpeza se uma FK ON DELETE CASCADE alcança tabela fora do
+    conjunto que não esteja em `cascade`.
+    """
+    manifest = load_manifest(name)
+    verify_files(name, manifest)
+    order = [table for table in manifest["fk_order"] if not tables or table in tables]
+    missing = set(tables or ()) - set(order)
+    if missing:
+        raise RuntimeError(f"Tabelas fora do snapshot {name}: {', '.join(sorted(missing))}")
+
+    if clean:
+        outside = cascades_outside(order, dsn)
+        listed = ", ".join(f"{fk['table']}.{'/'.join(fk['columns'])} → {fk['ref_table']}" for fk in outside)
+        unconfirmed = sorted({fk["table"] for fk in outside} - set(cascade))
+        if unconfirmed:
+            raise RuntimeError(f"--limpar apagaria em cascata tabelas fora do snapshot ({listed}); inclua-as "
+                               f"no snapshot ou confirme com --cascata {' '.join(unconfirmed)}")
+        if outside:
+            log(f"⚠️ --limpar apaga em cascata: {listed}", "WARNING")
+        clear_tables(list(reversed(order)), dsn)
+    elif dsn:
+        log("⚠️ COPY não faz upsert: sem --limpar, linhas que já existem abortam a carga da tabela", "WARNING")
+
+    loaded = {}
+    for table in order:
+        started = time.perf_counter()
+        on_conflict = ",".join(manifest["primary_keys"][table])
+        loaded[table] = 0
+        ignored = set()
+        for part in manifest["tables"][table]["parts"]:
+            if not part["rows"]:
+                continue
+            summary = bulk_load(table, os.path.join(snapshot_dir(name), part["file"]), on_conflict=on_conflict,
+                                workers=workers, dsn=dsn, disable_triggers=disable_triggers, ignored_columns=ignored)
+            loaded[table] += summary["loaded"]
+            if summary["rejected"]:
+                raise RuntimeError(f"{table}: {summary['rejected']} linhas rejeitadas (veja {summary['error_path']})")
+        expected = manifest["tables"][table]["rows"]
+        log(f"{'✅' if loaded[table] == expected else '⚠️'} {table}: {loaded[table]:,}/{expected:,} linhas "
+            f"em {time.perf_counter() - started:.1f}s")
+    return loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots de fixtures: capturar e restaurar conjuntos de tabelas")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    take = commands.add_parser("snapshot", help="Capturar tabelas em snapshots/<nome>/")
+    take.add_argument("name")
+    take.add_argument("tables", nargs="+")
+    take.add_argument("--formato", choices=["parquet", "ndjson"], default="parquet")
+    take.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    back = commands.add_parser("restore", help="Restaurar um snapshot")
+    back.add_argument("name")
+    back.add_argument("--tabelas", nargs="+", default=None, help="Só estas tabelas do snapshot")
+    back.add_argument("--limpar", action="store_true", help="Apagar as tabelas antes de carregar")
+    back.add_argument("--cascata", nargs="+", default=(), metavar="TABELA",
+                      help="Tabelas fora do snapshot que o --limpar pode apagar em cascata")
+    back.add_argument("--live", action="store_true", help="Permitir --limpar fora de um banco local")
+    back.add_argument("--dsn", default=None, help="Connection string do Postgres: carga por COPY")
+    back.add_argument("--copy", action="store_true", help="Usar COPY com DATABASE_URL")
+    back.add_argument("--sem-triggers", action="store_true", help="COPY sem triggers e FKs (superusuário, banco local)")
+    back.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    commands.add_parser("list", help="Listar os snapshots")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "list":
+            names = sorted(os.listdir(SNAPSHOTS_DIR)) if os.path.isdir(SNAPSHOTS_DIR) else []
+            for name in names:
+                manifest = load_manifest(name)
+                rows = sum(t["rows"] for t in manifest["tables"].values())
+                log(f"📸 {name}: {', '.join(manifest['fk_order'])} ({rows:,} linhas, {manifest['generated_at']})")
+            return True
+
+        if args.command == "snapshot":
+            log(f"📸 Capturando {', '.join(args.tables)} em {snapshot_dir(args.name)}...")
+            manifest = snapshot(args.name, args.tables, args.formato, max(1, args.workers))
+            rows = sum(t["rows"] for t in manifest["tables"].values())
+            log(f"✅ Snapshot {args.name}: {rows:,} linhas em {manifest['seconds']:.1f}s; ordem {' → '.join(manifest['fk_order'])}")
+            return True
+
+        dsn = args.dsn or (os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL") if args.copy else None)
+        if args.copy and not dsn:
+            log("❌ --copy precisa de --dsn ou DATABASE_URL", "ERROR")
+            return False
+        host = urlsplit(dsn or supabase_rest.SUPABASE_URL).hostname or ""
+        if args.limpar and host not in LOCAL_HOSTS and not args.live:
+            log(f"❌ --limpar apaga tabelas em {host}; confirme com --live ou use um banco local (--dsn)", "ERROR")
+            return False
+        log(f"♻️ Restaurando {args.name} via {'COPY' if dsn else 'API'}...")
+        started = time.perf_counter()
+        loaded = restore(args.name, dsn, args.limpar, args.tabelas, max(1, args.workers), args.sem_triggers,
+                         args.cascata)
+        log(f"✅ {sum(loaded.values()):,} linhas restauradas em {time.perf_counter() - started:.1f}s")
+        return True
+    except (OSError, RuntimeError, ValueError) as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos em volume de produção
+VBSolution - Sistema CRM Completo
+
+Gera empresas, perfis, funcionários, produtos, fornecedores, leads, negócios,
+projetos, atividades, atendimentos e mensagens do WhatsApp de forma determinística
+(mesma semente = mesmos dados). A distribuição imita produção: poucas empresas
+concentram a maior parte das linhas (Zipf) e poucas conversas concentram a maior
+parte das mensagens (Pareto). Com --scale 1 são ~1,2 milhão de linhas.
+
+Carga via COPY num Postgres local (DATABASE_URL) ou em lote no local_standin.py,
+com o ritmo (linhas/s) por tabela no final.
+
+Execute: python generate_synthetic_dataset.py --target postgres --scale 2
+         python generate_synthetic_dataset.py --target standin --db standin.sqlite3
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from instrumentation import log, print_summary_at_exit
+
+# Linhas por tabela com --scale 1 (mensagens saem dos atendimentos)
+BASE_COUNTS = {
+    "companies": 50,
+    "profiles": 250,
+    "employees": 500,
+    "products": 2000,
+    "suppliers": 500,
+    "leads": 50000,
+    "deals": 10000,
+    "projects": 1000,
+    "activities": 100000,
+    "whatsapp_atendimentos": 25000,
+}
+
+# Ordem de carga respeitando as FKs (auth.users só existe no Postgres do Supabase)
+TABLE_ORDER = [
+    "auth.users", "companies", "profiles", "employees", "products", "suppliers",
+    "leads", "deals", "projects", "activities", "whatsapp_atendimentos", "whatsapp_mensagens",
+]
+
+TENANT_SKEW = 1.1          # expoente de Zipf entre empresas
+MESSAGES_PER_CHAT = 40     # média de mensagens por atendimento
+CHAT_PARETO_ALPHA = 1.5    # cauda longa das conversas
+MAX_MESSAGES_PER_CHAT = 20000
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 365
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela",
+               "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Almeida", "Ferreira", "Rocha"]
+CITIES = [("São Paulo", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"), ("Curitiba", "PR"),
+          ("Porto Alegre", "RS"), ("Recife", "PE"), ("Salvador", "BA"), ("Fortaleza", "CE")]
+SECTORS = ["Tecnologia", "Varejo", "Serviços", "Indústria", "Saúde", "Educação"]
+LEAD_SOURCES = ["whatsapp", "site", "indicacao", "instagram", "evento"]
+LEAD_STATUSES = ["new", "contacted", "qualified", "proposal", "won", "lost"]
+ACTIVITY_TYPES = ["task", "call", "meeting", "email", "follow_up"]
+ACTIVITY_STATUSES = ["pending", "in_progress", "completed", "cancelled"]
+PRIORITIES = ["low", "medium", "high", "urgent"]
+WORDS = ["pedido", "orçamento", "entrega", "proposta", "contrato", "reunião", "pagamento", "produto",
+         "cliente", "prazo", "suporte", "retorno", "dúvida", "valor", "nota", "boleto"]
+
+def make_uuid(rng):
+    """UUID v4 determinístico a partir do gerador"""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def table_rng(seed, table):
+    """Gerador próprio por tabela: pular uma tabela não muda as outras"""
+    return random.Random(f"{seed}:{table}")
+
+def timestamp(rng, start=None, days=HISTORY_DAYS):
+    start = start or BASE_TIME
+    return start + timedelta(seconds=rng.randrange(days * 86400))
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def phone_number(rng):
+    return f"55{rng.randrange(11, 99)}9{rng.randrange(10 ** 7, 10 ** 8)}"
+
+def sentence(rng, words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, words))).capitalize()
+
+def zipf_split(total, buckets, skew=TENANT_SKEW):
+    """Distribuir total linhas entre buckets com peso 1/rank^skew (mínimo 1 por bucket)"""
+    weights = [1 / (rank ** skew) for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    return [max(1, int(round(w * scale))) for w in weights]
+
+def chat_size(rng, mean=MESSAGES_PER_CHAT, alpha=CHAT_PARETO_ALPHA):
+    """Mensagens de um atendimento: Pareto com a média pedida"""
+    minimum = mean * (alpha - 1) / alpha
+    return min(MAX_MESSAGES_PER_CHAT, max(1, int(minimum * rng.paretovariate(alpha))))
+
+def build_plan(seed, scale):
+    """Empresas e ids que as outras tabelas referenciam (usuários, funcionários, produtos)"""
+    rng = random.Random(seed)
+    counts = {table: max(1, int(count * scale)) for table, count in BASE_COUNTS.items()}
+    tenants = [{"company_id": make_uuid(rng)} for _ in range(counts["companies"])]
+
+    per_tenant = {table: zipf_split(counts[table], len(tenants)) for table in counts if table != "companies"}
+    for position, tenant in enumerate(tenants):
+        tenant["users"] = [make_uuid(rng) for _ in range(per_tenant["profiles"][position])]
+        tenant["owner_id"] = tenant["users"][0]
+        tenant["employees"] = [make_uuid(rng) for _ in range(per_tenant["employees"][position])]
+        tenant["products"] = [make_uuid(rng) for _ in range(per_tenant["products"][position])]
+        tenant["counts"] = {table: per_tenant[table][position] for table in per_tenant}
+
+    return {"seed": seed, "scale": scale, "tenants": tenants}
+
+# ---------------------------------------------------------------- geradores
+
+def gen_auth_users(plan, rng):
+    for tenant in plan["tenants"]:
+        for user_id in tenant["users"]:
+            created = timestamp(rng)
+            yield {"id": user_id, "email": f"user-{user_id[:8]}@exemplo.com.br", "aud": "authenticated",
+                   "role": "authenticated", "created_at": created, "updated_at": created}
+
+def gen_companies(plan, rng):
+    for tenant in plan["tenants"]:
+        city, state = rng.choice(CITIES)
+        name = f"{rng.choice(LAST_NAMES)} {rng.choice(SECTORS)} Ltda"
+        created = timestamp(rng)
+        yield {"id": tenant["company_id"], "owner_id": tenant["owner_id"], "created_by": tenant["owner_id"],
+               "name": name, "company_name": name, "fantasy_name": name.split()[0], "cnpj": str(rng.randrange(10 ** 13, 10 ** 14)),
+               "email": f"contato@{tenant['company_id'][:8]}.com.br", "phone": phone_number(rng),
+               "city": city, "state": state, "country": "Brasil", "sector": rng.choice(SECTORS),
+               "status": "active", "settings": {}, "created_at": created, "updated_at": created}
+
+def gen_profiles(plan, rng):
+    for tenant in plan["tenants"]:
+        for position, user_id in enumerate(tenant["users"]):
+            name = person_name(rng)
+            created = timestamp(rng)
+            yield {"id": user_id, "email": f"user-{user_id[:8]}@exemplo.com.br", "name": name, "full_name": name,
+                   "company_id": tenant["company_id"], "role": "admin" if position == 0 else "user",
+                   "phone": phone_number(rng), "preferences": {}, "created_at": created, "updated_at": created}
+
+def gen_employees(plan, rng):
+    for tenant in plan["tenants"]:
+        for employee_id in tenant["employees"]:
+            created = timestamp(rng)
+            yield {"id": employee_id, "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": tenant["owner_id"], "name": person_name(rng),
+                   "email": f"func-{employee_id[:8]}@exemplo.com.br", "position": rng.choice(["Vendedor", "Analista", "Gerente"]),
+                   "department": rng.choice(["Comercial", "Suporte", "Financeiro"]), "status": "active",
+                   "salary": round(rng.uniform(2000, 15000), 2), "skills": [], "permissions": {},
+                   "created_at": created, "updated_at": created}
+
+def gen_products(plan, rng):
+    for tenant in plan["tenants"]:
+        for product_id in tenant["products"]:
+            created = timestamp(rng)
+            price = round(rng.lognormvariate(4.5, 1.0), 2)
+            yield {"id": product_id, "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": tenant["owner_id"], "name": f"Produto {sentence(rng, 3)}", "type": "product",
+                   "sku": f"SKU-{product_id[:8].upper()}", "category": rng.choice(SECTORS), "base_price": price,
+                   "price": price, "cost": round(price * rng.uniform(0.4, 0.8), 2), "currency": "BRL", "unit": "un",
+                   "stock": rng.randrange(0, 1000), "min_stock": 10, "status": "active", "is_active": True,
+                   "tags": [], "specifications": {}, "created_at": created, "updated_at": created}
+
+def gen_suppliers(plan, rng):
+    for tenant in plan["tenants"]:
+        for _ in range(tenant["counts"]["suppliers"]):
+            city, state = rng.choice(CITIES)
+            name = f"Fornecedor {rng.choice(LAST_NAMES)} {rng.randrange(1000)}"
+            created = timestamp(rng)
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": tenant["owner_id"], "name": name, "fantasy_name": name, "company_name": name,
+                   "cnpj": str(rng.randrange(10 ** 13, 10 ** 14)), "phone": phone_number(rng), "city": city,
+                   "state": state, "country": "Brasil", "contact_person": person_name(rng), "status": "active",
+                   "created_at": created, "updated_at": created}
+
+def gen_leads(plan, rng):
+    for tenant in plan["tenants"]:
+        for _ in range(tenant["counts"]["leads"]):
+            created = timestamp(rng)
+            status = rng.choice(LEAD_STATUSES)
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": rng.choice(tenant["users"]), "assigned_to": rng.choice(tenant["employees"]),
+                   "product_id": rng.choice(tenant["products"]), "name": person_name(rng),
+                   "email": f"lead{rng.randrange(10 ** 9)}@exemplo.com.br", "phone": phone_number(rng),
+                   "source": rng.choice(LEAD_SOURCES), "status": status, "pipeline_stage": status,
+                   "priority": rng.choice(PRIORITIES), "value": round(rng.lognormvariate(7, 1.2), 2), "currency": "BRL",
+                   "tags": [], "custom_fields": {}, "created_at": created, "updated_at": created}
+
+def gen_deals(plan, rng):
+    for tenant in plan["tenants"]:
+        for _ in range(tenant["counts"]["deals"]):
+            created = timestamp(rng)
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "product_id": rng.choice(tenant["products"]), "responsible_id": rng.choice(tenant["employees"]),
+                   "title": f"Negócio {sentence(rng, 3)}", "value": round(rng.lognormvariate(8, 1.0), 2),
+                   "probability": rng.randrange(0, 101, 10), "status": rng.choice(["open", "won", "lost"]),
+                   "expected_close_date": (created + timedelta(days=rng.randrange(7, 120))).date(),
+                   "created_at": created, "updated_at": created}
+
+def gen_projects(plan, rng):
+    for tenant in plan["tenants"]:
+        for _ in range(tenant["counts"]["projects"]):
+            created = timestamp(rng)
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": rng.choice(tenant["users"]), "manager_id": rng.choice(tenant["employees"]),
+                   "name": f"Projeto {sentence(rng, 3)}", "description": sentence(rng, 20),
+                   "status": rng.choice(["planning", "active", "completed"]), "priority": rng.choice(PRIORITIES),
+                   "start_date": created.date(), "due_date": (created + timedelta(days=rng.randrange(14, 180))).date(),
+                   "budget": round(rng.lognormvariate(9, 1.0), 2), "currency": "BRL", "progress": rng.randrange(0, 101),
+                   "tags": [], "settings": {}, "is_public": False, "created_at": created, "updated_at": created}
+
+def gen_activities(plan, rng):
+    for tenant in plan["tenants"]:
+        for _ in range(tenant["counts"]["activities"]):
+            created = timestamp(rng)
+            status = rng.choice(ACTIVITY_STATUSES)
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "created_by": rng.choice(tenant["users"]), "assigned_to": rng.choice(tenant["users"]),
+                   "responsible_id": rng.choice(tenant["employees"]), "title": sentence(rng, 6),
+                   "description": sentence(rng, 25), "type": rng.choice(ACTIVITY_TYPES), "status": status,
+                   "priority": rng.choice(PRIORITIES), "due_date": created + timedelta(days=rng.randrange(1, 30)),
+                   "completed_date": created + timedelta(days=rng.randrange(0, 10)) if status == "completed" else None,
+                   "progress": 100 if status == "completed" else rng.randrange(0, 100), "is_urgent": rng.random() < 0.05,
+                   "is_public": False, "tags": [], "attachments": [], "comments": [],
+                   "created_at": created, "updated_at": created}
+
+def chat_plan(plan, seed):
+    """Atendimentos (um por conversa) com o início e o tamanho de cada conversa"""
+    rng = table_rng(seed, "whatsapp_atendimentos")
+    for tenant in plan["tenants"]:
+        connection_id = f"conn-{tenant['company_id'][:8]}"
+        for _ in range(tenant["counts"]["whatsapp_atendimentos"]):
+            phone = phone_number(rng)
+            yield {"id": make_uuid(rng), "tenant": tenant, "connection_id": connection_id, "phone": phone,
+                   "chat_id": f"{phone}@s.whatsapp.net", "name": person_name(rng), "started": timestamp(rng),
+                   "messages": chat_size(rng), "status": rng.choice(["AGUARDANDO", "ATENDENDO", "ENCERRADO"])}
+
+def gen_whatsapp_atendimentos(plan, rng):
+    for chat in chat_plan(plan, plan["seed"]):
+        tenant = chat["tenant"]
+        last = chat["started"] + timedelta(minutes=2 * chat["messages"])
+        yield {"id": chat["id"], "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+               "numero_cliente": chat["phone"], "nome_cliente": chat["name"], "display_name": chat["name"],
+               "chat_id": chat["chat_id"], "connection_id": chat["connection_id"], "status": chat["status"],
+               "canal": "whatsapp", "prioridade": 1, "tags": [], "nao_lidas": rng.randrange(0, 5), "is_group": False,
+               "data_inicio": chat["started"], "ultima_mensagem": last, "ultima_mensagem_em": last,
+               "created_at": chat["started"], "updated_at": last}
+
+def gen_whatsapp_mensagens(plan, rng):
+    for chat in chat_plan(plan, plan["seed"]):
+        tenant = chat["tenant"]
+        moment = chat["started"]
+        for _ in range(chat["messages"]):
+            moment += timedelta(seconds=rng.randrange(5, 240))
+            inbound = rng.random() < 0.55
+            yield {"id": make_uuid(rng), "owner_id": tenant["owner_id"], "company_id": tenant["company_id"],
+                   "atendimento_id": chat["id"], "chat_id": chat["chat_id"], "connection_id": chat["connection_id"],
+                   "message_id": f"3EB0{rng.getrandbits(64):016X}", "conteudo": sentence(rng, 15), "tipo": "TEXTO",
+                   "message_type": "text", "remetente": "CLIENTE" if inbound else "ATENDENTE",
+                   "status": "received" if inbound else "sent", "lida": rng.random() < 0.9, "phone": chat["phone"],
+                   "timestamp": moment, "created_at": moment, "updated_at": moment}
+
+GENERATORS = {
+    "auth.users": gen_auth_users,
+    "companies": gen_companies,
+    "profiles": gen_profiles,
+    "employees": gen_employees,
+    "products": gen_products,
+    "suppliers": gen_suppliers,
+    "leads": gen_leads,
+    "deals": gen_deals,
+    "projects": gen_projects,
+    "activities": gen_activities,
+    "whatsapp_atendimentos": gen_whatsapp_atendimentos,
+    "whatsapp_mensagens": gen_whatsapp_mensagens,
+}
+
+# ------------------------------------------------------------------ carga
+
+def plain_value(value):
+    """datetime/date → ISO; o resto passa como está"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+class StandInLoader:
+    """Carga em lote direto no SQLite do local_standin"""
+
+    def __init__(self, standin, batch_size=5000):
+        self.standin = standin
+        self.batch_size = batch_size
+
+    def columns(self, table):
+        return list(self.standin.tables[table]["columns"]) if table in self.standin.tables else []
+
+    def load(self, table, columns, rows):
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append([plain_value(row.get(c)) for c in columns])
+            if len(batch) >= self.batch_size:
+                self.standin.bulk_insert(table, columns, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.standin.bulk_insert(table, columns, batch)
+            total += len(batch)
+        return total
+
+class CopyStream(io.TextIOBase):
+    """Arquivo somente leitura que gera o CSV sob demanda para o COPY (sem materializar a tabela)"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ""
+        self.rows = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+            self.rows += 1
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+class CopyLoader:
+    """Carga via COPY FROM STDIN num Postgres local"""
+
+    def __init__(self, conn, disable_triggers=False):
+        self.conn = conn
+        self.disable_triggers = disable_triggers
+        self.types = {}
+
+    def columns(self, table):
+        schema, _, name = table.rpartition(".")
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_schema = %s AND table_name = %s
+                ORDER BY ordinal_position
+                """,
+                (schema or "public", name)
+            )
+            self.types[table] = dict(cursor.fetchall())
+        return list(self.types[table])
+
+    def csv_value(self, value, data_type):
+        """Valor no formato do COPY CSV (None = campo vazio sem aspas = NULL)"""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (list, dict)):
+            if data_type == "ARRAY":
+                return "{" + ",".join('"' + str(v).replace('"', '\\"') + '"' for v in value) + "}"
+            return json.dumps(value, ensure_ascii=False)
+        return plain_value(value)
+
+    def load(self, table, columns, rows):
+        types = [self.types[table][c] for c in columns]
+
+        def lines():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            for row in rows:
+                writer.writerow([self.csv_value(row.get(c), t) for c, t in zip(columns, types)])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        schema, _, name = table.rpartition(".")
+        target = f'"{schema or "public"}"."{name}"'
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        stream = CopyStream(lines())
+        try:
+            with self.conn.cursor() as cursor:
+                if self.disable_triggers:
+                    # Sem FKs e triggers durante a carga (exige superusuário; só em banco local)
+                    cursor.execute("SET session_replication_role = replica")
+                cursor.copy_expert(f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv)", stream, size=1 << 16)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            if self.disable_triggers:
+                # SET vale para a sessão inteira: a conexão volta a disparar FKs e triggers
+                with self.conn.cursor() as cursor:
+                    cursor.execute("RESET session_replication_role")
+                self.conn.commit()
+        return stream.rows
+
+def generate(plan, loader, tables=None):
+    """Gerar e carregar as tabelas na ordem das FKs; devolve as estatísticas por tabela"""
+    stats = []
+    for table in TABLE_ORDER:
+        if tables and table not in tables:
+            continue
+        target_columns = loader.columns(table)
+        if not target_columns:
+            log(f"⏭️ {table}: não existe no destino, pulando")
+            continue
+
+        rng = table_rng(plan["seed"], table)
+        rows = GENERATORS[table](plan, rng)
+        first = next(rows, None)
+        if first is None:
+            continue
+        columns = [c for c in target_columns if c in first]
+
+        def chained(first=first, rows=rows):
+            yield first
+            yield from rows
+
+        started = time.perf_counter()
+        count = loader.load(table, columns, chained())
+        elapsed = time.perf_counter() - started
+        stats.append({"table": table, "rows": count, "seconds": elapsed})
+        log(f"✅ {table}: {count:,} linhas em {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} linhas/s)")
+    return stats
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Gerar dados sintéticos em volume de produção")
+    parser.add_argument("--target", choices=["postgres", "standin"], default="standin")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador dos volumes base (1 ≈ 1,2 milhão de linhas)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tables", nargs="+", choices=TABLE_ORDER, help="Gerar só estas tabelas")
+    parser.add_argument("--dsn", default=None, help="Connection string (padrão: DATABASE_URL)")
+    parser.add_argument("--disable-triggers", action="store_true", help="session_replication_role=replica durante o COPY")
+    parser.add_argument("--db", default="standin.sqlite3", help="Arquivo SQLite do stand-in")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    log(f"🎲 Planejando dados (semente {args.seed}, escala {args.scale})...")
+    plan = build_plan(args.seed, args.scale)
+
+    if args.target == "postgres":
+        from postgres_direct import connect
+        conn = connect(args.dsn)
+        loader = CopyLoader(conn, args.disable_triggers)
+    else:
+        from local_standin import StandIn
+        conn = None
+        loader = StandInLoader(StandIn(db_path=args.db), args.batch_size)
+
+    try:
+        started = time.perf_counter()
+        stats = generate(plan, loader, args.tables)
+        elapsed = time.perf_counter() - started
+    finally:
+        if conn is not None:
+            conn.close()
+
+    total = sum(item["rows"] for item in stats)
+    print("\n" + "=" * 60)
+    print("📊 RITMO DE CARGA")
+    print("=" * 60)
+    for item in stats:
+        rate = item["rows"] / item["seconds"] if item["seconds"] else 0
+        print(f"{item['table']:<25} {item['rows']:>12,} linhas {rate:>12,.0f} linhas/s")
+    print("-" * 60)
+    print(f"{'TOTAL':<25} {total:>12,} linhas {total / elapsed if elapsed else 0:>12,.0f} linhas/s ({elapsed:.1f}s)")
+    return True
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Execução interrompida pelo usuário", "WARNING")
+        sys.exit(1)
+    except Exception as e:
+        log(f"\n❌ Erro inesperado: {str(e)}", "ERROR")
+        sys.exit(1)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Daemon de saúde do Supabase com métricas no formato do Prometheus
+VBSolution - Sistema CRM Completo
+
+Substitui rodar check_tables.py / test_system.py à mão: sonda as tabelas essenciais
+(lista e sonda do table_probe.py, as mesmas desses scripts) continuamente e expõe em /metrics, por tabela, se está acessível, o histograma de
+latência, se o RLS esconde as linhas da chave anon e o total de linhas (e a variação
+desde a sonda anterior). /healthz responde 503 enquanto alguma tabela estiver fora.
+
+Carga mínima no projeto:
+- Uma sonda é um HEAD ?select=id&limit=1 com Prefer: count=estimated (sem corpo, e
+  contagem pelo planejador nas tabelas grandes), numa Session com pool de conexões.
+- Intervalo adaptativo por tabela: cai para --min-interval quando a sonda falha e dobra
+  a cada sucesso até --max-interval.
+- Sondas deduplicadas: uma tabela nunca tem duas em voo; scrapes do /metrics só leem o
+  último resultado; com a chave anon a mesma sonda serve para o RLS, senão a sonda com a
+  chave anon (SUPABASE_ANON_KEY) roda a cada RLS_EVERY sondas da tabela.
+
+Execute: python health_daemon.py [--port 9108] [--min-interval 5 --max-interval 300]
+         python health_daemon.py --once     (uma rodada, métricas na saída)
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import base64
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import supabase_rest
+from instrumentation import log, print_summary_at_exit
+from table_probe import ESSENTIAL_TABLES, UP_STATUSES, DENIED_STATUSES, probe_headers, probe_table
+
+DEFAULT_PORT = 9108
+MIN_INTERVAL = 5.0
+MAX_INTERVAL = 300.0
+RLS_EVERY = 5
+
+# Buckets do histograma de latência (segundos)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def key_role(key):
+    """Papel do JWT da chave (sem verificar a assinatura)"""
+    try:
+        payload = key.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))).get("role")
+    except (IndexError, ValueError):
+        return None
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for position, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[position] += 1
+        self.sum += seconds
+        self.count += 1
+
+class TableState:
+    __slots__ = ("up", "status", "rows", "rows_delta", "rls_protected", "latency", "errors",
+                 "probes", "interval", "last_probe")
+
+    def __init__(self, interval):
+        self.up = None
+        self.status = None
+        self.rows = None
+        self.rows_delta = None
+        self.rls_protected = None
+        self.latency = Histogram()
+        self.errors = 0
+        self.probes = 0
+        self.interval = interval
+        self.last_probe = None
+
+class HealthMonitor:
+    """Agenda e executa as sondas; guarda o último estado de cada tabela"""
+
+    def __init__(self, tables, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, workers=4, anon_key=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.tables = tables
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.workers = workers
+        self.session = requests.Session()
+        self.session.mount(supabase_rest.SUPABASE_URL, HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self.headers = probe_headers()
+        self.anon_is_main = key_role(supabase_rest.SUPABASE_KEY) == "anon"
+        self.anon_headers = None
+        if anon_key and not self.anon_is_main:
+            self.anon_headers = probe_headers(anon_key)
+
+        self.lock = threading.Lock()
+        self.state = {table: TableState(min_interval) for table in tables}
+        self.in_flight = set()
+        # Primeira rodada espalhada no intervalo mínimo para não disparar tudo de uma vez
+        now = time.monotonic()
+        self.due = [(now + random.uniform(0, min_interval), table) for table in tables]
+        heapq.heapify(self.due)
+
+    def probe(self, table):
+        """Sondar uma tabela e atualizar o estado; devolve se está acessível"""
+        result = probe_table(table, self.headers, self.session)
+        status, rows, seconds, failure = result["status"], result["rows"], result["seconds"], result["failure"]
+        up = status in UP_STATUSES
+
+        rls_protected = None
+        if self.anon_is_main:
+            if up or status in DENIED_STATUSES:
+                rls_protected = not up or rows == 0
+        elif self.anon_headers and up and self.state[table].probes % RLS_EVERY == 0:
+            anon = probe_table(table, self.anon_headers, self.session)
+            if anon["status"] in UP_STATUSES | DENIED_STATUSES:
+                rls_protected = anon["status"] in DENIED_STATUSES or anon["rows"] == 0
+
+        with self.lock:
+            state = self.state[table]
+            previous_up = state.up
+            state.probes += 1
+            state.status = status
+            state.up = up
+            state.latency.observe(seconds)
+            state.last_probe = time.time()
+            if rls_protected is not None:
+                state.rls_protected = rls_protected
+            if up and rows is not None:
+                state.rows_delta = rows - state.rows if state.rows is not None else 0
+                state.rows = rows
+            if up:
+                state.interval = min(self.max_interval, state.interval * 2)
+            else:
+                state.errors += 1
+                state.interval = self.min_interval
+
+        if previous_up is not None and previous_up != up:
+            if up:
+                log(f"✅ {table}: acessível de novo ({seconds * 1000:.0f} ms)")
+            else:
+                log(f"❌ {table}: fora ({failure or status})", "WARNING")
+        return up
+
+    def _probe_and_reschedule(self, table):
+        try:
+            self.probe(table)
+        finally:
+            with self.lock:
+                self.in_flight.discard(table)
+                heapq.heappush(self.due, (time.monotonic() + self.state[table].interval, table))
+
+    def run(self, stop):
+        """Laço do agendador até stop (threading.Event) ser acionado"""
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="probe") as pool:
+            while not stop.is_set():
+                now = time.monotonic()
+                with self.lock:
+                    while self.due and self.due[0][0] <= now:
+                        _, table = heapq.heappop(self.due)
+                        if table in self.in_flight:
+                            continue  # a sonda em voo reagenda ao terminar
+                        self.in_flight.add(table)
+                        pool.submit(self._probe_and_reschedule, table)
+                    wait = self.due[0][0] - now if self.due else 1.0
+                stop.wait(min(max(wait, 0.05), 1.0))
+
+    def probe_all(self):
+        """Uma rodada em todas as tabelas (--once); devolve se todas estão acessíveis"""
+        with ThreadPoolExecutor(self.workers) as pool:
+            return all(pool.map(self.probe, self.tables))
+
+    def healthy(self):
+        with self.lock:
+            return all(state.up is not False for state in self.state.values())
+
+    def exposition(self):
+        """Métricas no formato texto do Prometheus (0.0.4)"""
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self.lock:
+            states = sorted(self.state.items())
+            probed = [(table, s) for table, s in states if s.probes]
+
+            family("vbsolution_table_up", "gauge", "1 se a última sonda da tabela respondeu 200/206",
+                   [f'vbsolution_table_up{{table="{t}"}} {int(bool(s.up))}' for t, s in probed])
+            family("vbsolution_table_last_status", "gauge", "Status HTTP da última sonda (0 = sem resposta)",
+                   [f'vbsolution_table_last_status{{table="{t}"}} {s.status or 0}' for t, s in probed])
+
+            histogram = []
+            for table, state in probed:
+                for bound, count in zip(LATENCY_BUCKETS, state.latency.counts):
+                    histogram.append(f'vbsolution_probe_duration_seconds_bucket{{table="{table}",le="{bound}"}} {count}')
+                histogram.append(f'vbsolution_probe_duration_seconds_bucket{{table="{table}",le="+Inf"}} {state.latency.count}')
+                histogram.append(f'vbsolution_probe_duration_seconds_sum{{table="{table}"}} {state.latency.sum:.6f}')
+                histogram.append(f'vbsolution_probe_duration_seconds_count{{table="{table}"}} {state.latency.count}')
+            family("vbsolution_probe_duration_seconds", "histogram", "Latência das sondas por tabela", histogram)
+
+            family("vbsolution_table_rls_protected", "gauge", "1 se a chave anon não vê linhas da tabela",
+                   [f'vbsolution_table_rls_protected{{table="{t}"}} {int(s.rls_protected)}'
+                    for t, s in probed if s.rls_protected is not None])
+            family("vbsolution_table_rows", "gauge", "Linhas da tabela (estimativa do PostgREST)",
+                   [f'vbsolution_table_rows{{table="{t}"}} {s.rows}' for t, s in probed if s.rows is not None])
+            family("vbsolution_table_rows_delta", "gauge", "Variação de linhas desde a sonda anterior",
+                   [f'vbsolution_table_rows_delta{{table="{t}"}} {s.rows_delta}'
+                    for t, s in probed if s.rows_delta is not None])
+            family("vbsolution_probe_errors_total", "counter", "Sondas que falharam",
+                   [f'vbsolution_probe_errors_total{{table="{t}"}} {s.errors}' for t, s in probed])
+            family("vbsolution_probe_interval_seconds", "gauge", "Intervalo atual entre sondas da tabela",
+                   [f'vbsolution_probe_interval_seconds{{table="{t}"}} {s.interval:g}' for t, s in states])
+            family("vbsolution_last_probe_timestamp_seconds", "gauge", "Hora da última sonda (epoch)",
+                   [f'vbsolution_last_probe_timestamp_seconds{{table="{t}"}} {s.last_probe:.3f}' for t, s in probed])
+
+        return "\n".join(lines) + "\n"
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """/metrics e /healthz a partir do estado em memória (nunca disparam sondas)"""
+
+    monitor = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            status, content_type = 200, "text/plain; version=0.0.4; charset=utf-8"
+            body = self.monitor.exposition().encode("utf-8")
+        elif self.path.split("?")[0] == "/healthz":
+            healthy = self.monitor.healthy()
+            status, content_type = (200 if healthy else 503), "text/plain; charset=utf-8"
+            body = b"ok\n" if healthy else b"fora\n"
+        else:
+            status, content_type, body = 404, "text/plain; charset=utf-8", b"not found\n"
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(monitor, host, port):
+    """Subir o servidor de métricas numa thread e devolver o servidor"""
+    handler = type("BoundMetricsRequestHandler", (MetricsRequestHandler,), {"monitor": monitor})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Daemon de saúde com métricas para o Prometheus")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tables", nargs="+", default=ESSENTIAL_TABLES)
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="Intervalo com erro (s)")
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="Intervalo saudável máximo (s)")
+    parser.add_argument("--workers", type=int, default=4, help="Sondas simultâneas (e conexões no pool)")
+    parser.add_argument("--once", action="store_true", help="Uma rodada, imprimir as métricas e sair")
+    args = parser.parse_args()
+
+    monitor = HealthMonitor(args.tables, args.min_interval, max(args.min_interval, args.max_interval),
+                            max(1, args.workers), os.getenv("SUPABASE_ANON_KEY"))
+    if not monitor.anon_is_main and monitor.anon_headers is None:
+        log("⚠️ Sem SUPABASE_ANON_KEY: vbsolution_table_rls_protected não será exportada", "WARNING")
+
+    if args.once:
+        healthy = monitor.probe_all()
+        sys.stdout.write(monitor.exposition())
+        return healthy
+
+    server = serve_metrics(monitor, args.host, args.port)
+    log(f"🩺 Monitorando {len(args.tables)} tabelas de {supabase_rest.SUPABASE_URL}")
+    log(f"📈 Métricas em http://{args.host}:{server.server_address[1]}/metrics")
+
+    stop = threading.Event()
+    try:
+        monitor.run(stop)
+    except KeyboardInterrupt:
+        log("\n⚠️ Daemon encerrado pelo usuário", "WARNING")
+    finally:
+        stop.set()
+        server.shutdown()
+    return True
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
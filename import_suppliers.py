@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Importação de fornecedores (suppliers) a partir de CSV ou XLSX
+VBSolution - Sistema CRM Completo
+
+Lê o arquivo em streaming, valida cada linha contra as colunas de suppliers
+(name, fantasy_name, email, phone, status, notes), normaliza telefone e e-mail e
+faz upsert em POSTs de array. O tamanho do lote se ajusta ao tempo de cada POST.
+
+Deduplicação: a chave natural é empresa + e-mail (ou telefone, ou nome, nessa
+ordem) e o id do fornecedor é uuid5 dessa chave. Linhas repetidas no arquivo
+são descartadas e importar o mesmo arquivo de novo atualiza em vez de duplicar.
+Fornecedores criados antes por outros caminhos (id aleatório) não são casados.
+
+Linhas rejeitadas (na validação ou pelo servidor) vão para <arquivo>.erros.csv.
+
+Execute: python import_suppliers.py fornecedores.csv --company-id <uuid> [--owner-id <uuid>]
+"""
+
+import re
+import sys
+import time
+import uuid
+import hashlib
+import argparse
+
+from instrumentation import log, print_summary_at_exit
+from supabase_rest import rest_headers
+from rest_bulk import bulk_insert
+from tabular_input import read_rows, ErrorFile
+
+TABLE = "suppliers"
+FORNECEDOR_NAMESPACE = uuid.UUID("0b7e4c1d-5a2f-4e8b-9c3d-1f6a7b8c9d0e")
+
+# Cabeçalhos aceitos (já normalizados por tabular_input.normalize_header)
+COLUMN_ALIASES = {
+    "name": ("name", "nome", "razao_social", "fornecedor"),
+    "fantasy_name": ("fantasy_name", "nome_fantasia", "fantasia"),
+    "email": ("email", "e_mail", "correio_eletronico"),
+    "phone": ("phone", "telefone", "fone", "celular", "whatsapp"),
+    "status": ("status", "situacao"),
+    "notes": ("notes", "observacoes", "obs", "notas"),
+}
+STATUS_ALIASES = {
+    "active": "active", "ativo": "active", "ativa": "active", "sim": "active", "1": "active",
+    "inactive": "inactive", "inativo": "inactive", "inativa": "inactive", "nao": "inactive", "0": "inactive",
+}
+MAX_LENGTHS = {"name": 255, "fantasy_name": 255, "email": 254, "notes": 5000}
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z]{2,}$")
+
+MIN_BATCH_ROWS = 50
+MAX_BATCH_ROWS = 5000
+TARGET_SECONDS = 1.0
+
+class RowError(ValueError):
+    pass
+
+def pick(row, field):
+    for alias in COLUMN_ALIASES[field]:
+        value = row.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+def normalize_email(value):
+    if value is None:
+        return None
+    email = str(value).strip().lower().removeprefix("mailto:")
+    if not EMAIL_PATTERN.match(email):
+        raise RowError(f"e-mail inválido: {value}")
+    return email
+
+def normalize_phone(value):
+    """Telefone em dígitos com DDI: '(11) 98888-7777' → '5511988887777'; internacional só com '+'"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # célula numérica do Excel
+    text = str(value).strip()
+    digits = re.sub(r"\D", "", text)
+    if digits.startswith("00"):
+        digits, text = digits[2:], "+" + digits[2:]
+    if len(digits) in (11, 12) and digits.startswith("0"):
+        digits = digits[1:]  # prefixo de operadora/tronco: 0 11 ...
+    if len(digits) in (10, 11):
+        digits = "55" + digits
+    if len(digits) in (12, 13) and digits.startswith("55"):
+        return digits
+    if text.startswith("+") and 8 <= len(digits) <= 15:
+        return digits
+    raise RowError(f"telefone inválido: {value}")
+
+def normalize_status(value):
+    if value is None:
+        return "active"
+    text = str(value).strip().lower().replace("ã", "a")
+    if text not in STATUS_ALIASES:
+        raise RowError(f"status inválido: {value} (use active/inactive)")
+    return STATUS_ALIASES[text]
+
+def natural_key(supplier, scope):
+    """Empresa + e-mail, senão telefone, senão nome (sem caixa e espaços repetidos)"""
+    if supplier.get("email"):
+        key = f"email:{supplier['email']}"
+    elif supplier.get("phone"):
+        key = f"phone:{supplier['phone']}"
+    else:
+        key = "name:" + " ".join(supplier["name"].casefold().split())
+    return f"{scope or ''}|{key}"
+
+def validate(row, company_id=None, owner_id=None):
+    """Linha do arquivo → fornecedor pronto para o upsert (RowError se inválida)"""
+    name = pick(row, "name")
+    if not name or not str(name).strip():
+        raise RowError("name obrigatório")
+
+    supplier = {
+        "name": " ".join(str(name).split()),
+        "fantasy_name": " ".join(str(pick(row, "fantasy_name")).split()) if pick(row, "fantasy_name") else None,
+        "email": normalize_email(pick(row, "email")),
+        "phone": normalize_phone(pick(row, "phone")),
+        "status": normalize_status(pick(row, "status")),
+        "notes": str(pick(row, "notes")).strip() if pick(row, "notes") else None,
+    }
+    for field, limit in MAX_LENGTHS.items():
+        if supplier[field] and len(supplier[field]) > limit:
+            raise RowError(f"{field} passa de {limit} caracteres")
+
+    if company_id:
+        supplier["company_id"] = company_id
+    if owner_id:
+        supplier["owner_id"] = owner_id
+    supplier["id"] = str(uuid.uuid5(FORNECEDOR_NAMESPACE, natural_key(supplier, company_id or owner_id)))
+    return supplier
+
+class SupplierImporter:
+    """Upsert em lotes adaptativos; lotes recusados pelo servidor são divididos até achar as linhas ruins"""
+
+    def __init__(self, errors, headers=None, batch_rows=500):
+        self.errors = errors
+        self.headers = headers or rest_headers()
+        self.batch_rows = batch_rows
+        self.imported = 0
+        self.requests = 0
+
+    def upsert(self, batch):
+        """batch: [(linha, original, fornecedor)]"""
+        started = time.perf_counter()
+        results = bulk_insert(TABLE, [supplier for _, _, supplier in batch], on_conflict="id", headers=self.headers)
+        self.requests += len(results)
+        elapsed = time.perf_counter() - started
+
+        if all(r["ok"] for r in results):
+            self.imported += len(batch)
+            if elapsed < TARGET_SECONDS / 2:
+                self.batch_rows = min(MAX_BATCH_ROWS, self.batch_rows * 2)
+            elif elapsed > TARGET_SECONDS * 2:
+                self.batch_rows = max(MIN_BATCH_ROWS, self.batch_rows // 2)
+            return
+
+        failure = next(r for r in results if not r["ok"])
+        if len(batch) == 1:
+            line_number, original, _ = batch[0]
+            self.errors.write(line_number, f"servidor {failure['status']}: {failure['error']}", original)
+            return
+        # Uma linha ruim derruba o lote inteiro: dividir ao meio até isolá-la (o upsert é idempotente)
+        middle = len(batch) // 2
+        self.upsert(batch[:middle])
+        self.upsert(batch[middle:])
+
+def import_suppliers(path, company_id=None, owner_id=None, error_path=None, file_format=None, headers=None):
+    """Importar o arquivo; devolve o resumo (lidas, importadas, duplicadas, rejeitadas, segundos)"""
+    errors = ErrorFile(error_path or f"{path}.erros.csv")
+    importer = SupplierImporter(errors, headers)
+    seen = set()
+    summary = {"read": 0, "duplicates": 0}
+    started = last_report = time.perf_counter()
+    batch = []
+
+    try:
+        for line_number, row in read_rows(path, file_format):
+            summary["read"] += 1
+            try:
+                supplier = validate(row, company_id, owner_id)
+            except RowError as exc:
+                errors.write(line_number, str(exc), row)
+                continue
+
+            digest = hashlib.blake2b(supplier["id"].encode(), digest_size=8).digest()
+            if digest in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(digest)
+
+            batch.append((line_number, row, supplier))
+            if len(batch) >= importer.batch_rows:
+                importer.upsert(batch)
+                batch = []
+                if time.perf_counter() - last_report > 5:
+                    last_report = time.perf_counter()
+                    rate = summary["read"] / (last_report - started)
+                    log(f"📦 {summary['read']:,} lidas, {importer.imported:,} importadas ({rate:,.0f} linhas/s, lote {importer.batch_rows})")
+        if batch:
+            importer.upsert(batch)
+    finally:
+        errors.close()
+
+    elapsed = time.perf_counter() - started
+    summary.update({"imported": importer.imported, "rejected": errors.count, "requests": importer.requests,
+                    "seconds": elapsed, "rows_per_second": summary["read"] / elapsed if elapsed else 0,
+                    "error_path": errors.path if errors.count else None})
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar fornecedores de um CSV ou XLSX")
+    parser.add_argument("path")
+    parser.add_argument("--company-id", default=None, help="Empresa dona dos fornecedores (também escopo da deduplicação)")
+    parser.add_argument("--owner-id", default=None, help="Usuário dono dos fornecedores")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default=None, help="Padrão: pela extensão")
+    parser.add_argument("--errors", default=None, help="Arquivo das linhas rejeitadas (padrão: <arquivo>.erros.csv)")
+    args = parser.parse_args()
+
+    log(f"📥 Importando fornecedores de {args.path}...")
+    try:
+        summary = import_suppliers(args.path, args.company_id, args.owner_id, args.errors, args.format)
+    except (OSError, RuntimeError, ValueError) as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+
+    log(f"✅ {summary['imported']:,} fornecedores importados de {summary['read']:,} linhas em {summary['seconds']:.1f}s "
+        f"({summary['rows_per_second']:,.0f} linhas/s, {summary['requests']} requisições)")
+    if summary["duplicates"]:
+        log(f"🔁 {summary['duplicates']:,} linhas repetidas no arquivo ignoradas")
+    if summary["rejected"]:
+        log(f"⚠️ {summary['rejected']:,} linhas rejeitadas em {summary['error_path']}", "WARNING")
+    return summary["imported"] > 0 or summary["read"] == 0
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
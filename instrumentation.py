@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Logging e medição de latência compartilhados pelos scripts
+VBSolution - Sistema CRM Completo
+
+log() mantém a linha "[data] NIVEL: mensagem" de sempre e também grava no trace.
+span() mede um trecho (context manager ou decorador) e http() faz uma chamada REST
+dentro de um span, registrando tempo, status HTTP, bytes enviados/recebidos e
+tentativas. Tudo vai para um trace JSONL em traces/; os scripts de linha de comando
+chamam print_summary_at_exit() no bloco __main__ para imprimir o p50/p95/p99 por
+endpoint ao final do processo (importar o módulo não imprime nada).
+
+Uso:   from instrumentation import log, span, http
+       response = http("GET", rest_url("leads?select=id"), headers=rest_headers())
+       with span("carga leads", linhas=len(rows)): ...
+
+Com set_rate_limiter(limiter) (ver chat_workers.RateLimiter) toda chamada de http()
+passa antes pelo limite global de taxa, e as respostas 429/503 avisam o limitador.
+
+Variáveis: TRACE_FILE (caminho do trace, "off" desliga), TRACE_DIR.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import functools
+import threading
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(ROOT_DIR, "traces"))
+TRACE_FILE = os.getenv("TRACE_FILE")
+
+# Respostas que valem nova tentativa (limite de taxa e falhas do gateway)
+RETRY_STATUSES = {429, 502, 503, 504}
+# 429 é recusado antes de chegar ao banco: pode repetir qualquer requisição
+REJECTED_STATUSES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+PUSHBACK_STATUSES = {429, 503}
+DEFAULT_TIMEOUT = 30
+
+_lock = threading.Lock()
+_trace = None
+_durations = defaultdict(list)
+_errors = defaultdict(int)
+_rate_limiter = None
+_summary_at_exit = False
+
+def _trace_path():
+    if TRACE_FILE:
+        return None if TRACE_FILE.lower() == "off" else TRACE_FILE
+    script = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(TRACE_DIR, f"{script}_{stamp}_{os.getpid()}.jsonl")
+
+def write_trace(event):
+    """Acrescentar um evento ao trace JSONL (aberto na primeira escrita)"""
+    global _trace
+    with _lock:
+        if _trace is None:
+            path = _trace_path()
+            if path is None:
+                _trace = False
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _trace = open(path, "a", encoding="utf-8")
+        if _trace:
+            _trace.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            _trace.flush()
+
+def log(message, level="INFO", time_format="%Y-%m-%d %H:%M:%S"):
+    """Função para logging com timestamp"""
+    now = datetime.now()
+    print(f"[{now.strftime(time_format)}] {level}: {message}")
+    write_trace({"type": "log", "ts": now.isoformat(), "level": level, "message": str(message)})
+
+def endpoint(method, url):
+    """'PATCH https://.../rest/v1/whatsapp_mensagens?id=eq.x' → 'PATCH whatsapp_mensagens'"""
+    path = urlsplit(url).path
+    resource = path.split("/rest/v1/", 1)[1] if "/rest/v1/" in path else path
+    return f"{method.upper()} {resource.strip('/') or '/'}"
+
+class Span:
+    """Trecho medido; use com `with span(...) as s` ou como decorador `@span(...)`"""
+
+    def __init__(self, name=None, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.status = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+        self.error = None
+        self.duration_ms = None
+
+    def __enter__(self):
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        record(self)
+        return False
+
+    def __call__(self, function):
+        name = self.name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Span(name, **self.attrs):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def record_response(self, response):
+        """Copiar status e tamanhos de uma resposta do requests"""
+        self.status = response.status_code
+        self.bytes_in = len(response.content or b"")
+        body = response.request.body if response.request is not None else None
+        self.bytes_out = len(body.encode("utf-8") if isinstance(body, str) else body or b"")
+
+span = Span
+
+def record(finished):
+    """Guardar a duração para o resumo e gravar o span no trace"""
+    failed = finished.error is not None or (finished.status is not None and finished.status >= 400)
+    with _lock:
+        _durations[finished.name].append(finished.duration_ms)
+        if failed:
+            _errors[finished.name] += 1
+
+    event = {
+        "type": "span",
+        "ts": finished.started_at.isoformat(),
+        "name": finished.name,
+        "duration_ms": round(finished.duration_ms, 3),
+        "status": finished.status,
+        "bytes_in": finished.bytes_in,
+        "bytes_out": finished.bytes_out,
+        "retries": finished.retries,
+    }
+    if finished.error:
+        event["error"] = finished.error
+    if finished.attrs:
+        event["attrs"] = finished.attrs
+    write_trace(event)
+
+def set_rate_limiter(limiter):
+    """Limite global de taxa para http() (objeto com acquire() e pushback(delay)); None desliga"""
+    global _rate_limiter
+    _rate_limiter = limiter
+
+def retry_after(response):
+    """Segundos pedidos no Retry-After (só o formato numérico); None se ausente"""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+def is_idempotent(method, headers):
+    """Repetir não muda o resultado: métodos idempotentes ou POST com upsert (resolution= no Prefer)"""
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    prefer = next((v for k, v in (headers or {}).items() if k.lower() == "prefer"), "")
+    return "resolution=" in prefer
+
+def http(method, url, retries=2, backoff=0.5, session=None, name=None, idempotent=None, **kwargs):
+    """Requisição REST medida, com novas tentativas em 429/5xx do gateway e falhas de conexão
+
+    Um 5xx do gateway ou um timeout podem chegar depois do COMMIT, então só são repetidos
+    em requisições idempotentes (ver is_idempotent; idempotent=True para RPCs que podem
+    repetir). As demais só repetem 429 e falhas ao abrir a conexão, quando nada foi enviado.
+    """
+    import requests
+
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    if idempotent is None:
+        idempotent = is_idempotent(method, kwargs.get("headers"))
+    client = session or requests
+    with Span(name or endpoint(method, url)) as current:
+        for attempt in range(retries + 1):
+            limiter = _rate_limiter
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = client.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries or not (idempotent or isinstance(e, requests.ConnectTimeout)):
+                    raise
+                current.retries += 1
+                time.sleep(backoff * 2 ** attempt)
+                continue
+            if limiter is not None and response.status_code in PUSHBACK_STATUSES:
+                limiter.pushback(retry_after(response))
+            retry = RETRY_STATUSES if idempotent else REJECTED_STATUSES
+            if response.status_code in retry and attempt < retries:
+                current.retries += 1
+                time.sleep(backoff * 2 ** attempt)
+                continue
+            break
+        current.record_response(response)
+    return response
+
+def percentile(values, q):
+    """Percentil por posição (nearest-rank) de uma lista ordenada"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+def summary():
+    """p50/p95/p99 por endpoint/span registrado até agora"""
+    with _lock:
+        items = {name: sorted(values) for name, values in _durations.items()}
+        errors = dict(_errors)
+    return [
+        {
+            "name": name,
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "total_ms": round(sum(values), 2),
+        }
+        for name, values in sorted(items.items(), key=lambda item: -sum(item[1]))
+    ]
+
+def print_summary():
+    """Resumo de latência no fim do processo (só se algum span foi medido)"""
+    rows = summary()
+    if not rows:
+        return
+    print("\n" + "=" * 90)
+    print("⏱️ LATÊNCIA POR ENDPOINT")
+    print("=" * 90)
+    print(f"{'endpoint':<44} {'n':>7} {'erros':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in rows:
+        print(f"{row['name'][:44]:<44} {row['count']:>7} {row['errors']:>6} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+    write_trace({"type": "summary", "ts": datetime.now().isoformat(), "endpoints": rows})
+def print_summary_at_exit():
+    """Imprimir o resumo ao fim do processo; chamado pelos pontos de entrada de linha de comando"""
+    global _summary_at_exit
+    if not _summary_at_exit:
+        _summary_at_exit = True
+        atexit.register(print_summary)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Linter de chaves estrangeiras sem índice
+VBSolution - Sistema CRM Completo
+
+Colunas com REFERENCES ... ON DELETE CASCADE (owner_id, company_id, project_id,
+assigned_to...) sem índice fazem o DELETE em cascata e os joins das políticas RLS
+caírem em scan sequencial. Este script lista todas as FKs sem índice nas migrações
+e, com DATABASE_URL configurada, também no catálogo do banco, gerando os comandos
+CREATE INDEX CONCURRENTLY com estimativa de tamanho a partir do pg_class/pg_stats.
+
+Execute: python lint_fk_indexes.py [arquivos ou diretórios de migração] [--live] [--sql-out arquivo.sql]
+"""
+
+import sys
+import math
+import argparse
+
+from migration_schema import load_schema
+from instrumentation import log, print_summary_at_exit
+
+# Larguras típicas quando não há estatísticas (bytes)
+TYPE_WIDTHS = {
+    "uuid": 16, "integer": 4, "int": 4, "int4": 4, "bigint": 8, "int8": 8,
+    "smallint": 2, "boolean": 1, "date": 4, "timestamp with time zone": 8,
+    "timestamptz": 8, "timestamp": 8,
+}
+DEFAULT_WIDTH = 32
+
+# Página B-tree: 8 KB com ~24 bytes de cabeçalho e fillfactor padrão de 90%
+BTREE_PAGE_BYTES = (8192 - 24) * 0.90
+
+def is_covered(fk_columns, indexes):
+    """FK está coberta se algum índice começa exatamente pelas colunas da FK"""
+    size = len(fk_columns)
+    return any(
+        len(index["columns"]) >= size and set(index["columns"][:size]) == set(fk_columns)
+        for index in indexes
+    )
+
+def index_name(table, columns):
+    """Nome padrão do índice (idx_<tabela>_<colunas>), respeitando 63 caracteres"""
+    return f"idx_{table}_{'_'.join(columns)}"[:63]
+
+def create_index_statement(table, columns):
+    """Comando para criar o índice sem bloquear escritas"""
+    column_list = ", ".join(columns)
+    return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(table, columns)} ON public.{table} ({column_list});"
+
+def estimate_btree_bytes(rows, widths):
+    """Estimar o tamanho de um índice B-tree a partir de linhas e largura das colunas"""
+    if rows is None or rows < 0:
+        return None
+    # IndexTupleData (8) + dados alinhados em 8 + item pointer (4)
+    entry = 8 + int(math.ceil(sum(widths) / 8.0)) * 8 + 4
+    leaf_pages = math.ceil(rows * entry / BTREE_PAGE_BYTES) if rows else 0
+    # Metapágina + raiz/internas (~1% das folhas)
+    return int((1 + leaf_pages + math.ceil(leaf_pages / 100)) * 8192)
+
+def format_bytes(size):
+    if size is None:
+        return "sem estatísticas (rode ANALYZE)"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+def lint_migrations(sources):
+    """Listar FKs sem índice no schema declarado nas migrações"""
+    findings = []
+    tables = load_schema(sources)
+
+    for table in tables.values():
+        for fk in table["foreign_keys"]:
+            if is_covered(fk["columns"], table["indexes"]):
+                continue
+            findings.append({
+                "table": table["name"],
+                "columns": fk["columns"],
+                "ref_table": fk["ref_table"],
+                "on_delete": fk["on_delete"],
+                "types": [table["columns"].get(c, {}).get("type", "") for c in fk["columns"]],
+                "origin": fk["source"],
+            })
+
+    return sorted(findings, key=lambda f: (f["table"], f["columns"]))
+
+def lint_catalog(conn):
+    """Listar FKs sem índice no catálogo do banco, com estatísticas de tamanho"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.conrelid::regclass::text,
+                   c.conkey,
+                   ARRAY(SELECT a.attname FROM unnest(c.conkey) WITH ORDINALITY k(attnum, ord)
+                         JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+                         ORDER BY k.ord)::text[],
+                   c.confrelid::regclass::text,
+                   c.confdeltype,
+                   cl.reltuples::bigint
+            FROM pg_constraint c
+            JOIN pg_class cl ON cl.oid = c.conrelid
+            WHERE c.contype = 'f' AND c.connamespace = 'public'::regnamespace
+        """)
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT i.indrelid::regclass::text, i.indkey::text
+            FROM pg_index i
+            JOIN pg_class cl ON cl.oid = i.indrelid
+            WHERE cl.relnamespace = 'public'::regnamespace AND i.indpred IS NULL
+        """)
+        indexes = {}
+        for table, indkey in cursor.fetchall():
+            indexes.setdefault(table, []).append({"columns": [int(k) for k in indkey.split()]})
+
+        cursor.execute("""
+            SELECT tablename, attname, avg_width FROM pg_stats WHERE schemaname = 'public'
+        """)
+        widths = {(table, column): width for table, column, width in cursor.fetchall()}
+
+    actions = {"c": "CASCADE", "n": "SET NULL", "d": "SET DEFAULT", "r": "RESTRICT", "a": "NO ACTION"}
+    findings = []
+
+    for table, conkey, columns, ref_table, deltype, reltuples in foreign_keys:
+        table = table.replace("public.", "")
+        if is_covered(list(conkey), indexes.get(table, [])):
+            continue
+        column_widths = [widths.get((table, c), DEFAULT_WIDTH) for c in columns]
+        findings.append({
+            "table": table,
+            "columns": list(columns),
+            "ref_table": ref_table,
+            "on_delete": actions.get(deltype, deltype),
+            "origin": "catálogo",
+            "rows": reltuples,
+            "estimated_bytes": estimate_btree_bytes(reltuples, column_widths),
+        })
+
+    return findings
+
+def merge_findings(migration_findings, catalog_findings):
+    """Unir achados das migrações e do banco (o banco tem precedência)"""
+    merged = {(f["table"], tuple(f["columns"])): f for f in migration_findings}
+    for finding in catalog_findings:
+        key = (finding["table"], tuple(finding["columns"]))
+        if key in merged:
+            finding["origin"] = f"{merged[key]['origin']} + catálogo"
+        merged[key] = finding
+    return sorted(merged.values(), key=lambda f: (f["table"], f["columns"]))
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Linter de FKs sem índice")
+    parser.add_argument("sources", nargs="*", help="Arquivos .sql/.py ou diretórios (padrão: supabase/migrations + fix_data_isolation.py)")
+    parser.add_argument("--live", action="store_true", help="Consultar também o catálogo do banco (DATABASE_URL)")
+    parser.add_argument("--dsn", default=None)
+    parser.add_argument("--sql-out", default=None, help="Gravar os CREATE INDEX neste arquivo")
+    args = parser.parse_args()
+
+    log("🔍 VERIFICANDO CHAVES ESTRANGEIRAS SEM ÍNDICE")
+    log("=" * 80)
+
+    findings = lint_migrations(args.sources or None)
+    log(f"📄 Migrações: {len(findings)} FKs sem índice")
+
+    if args.live:
+        from postgres_direct import connect
+        conn = connect(args.dsn)
+        try:
+            catalog = lint_catalog(conn)
+        finally:
+            conn.close()
+        log(f"🗄️ Catálogo: {len(catalog)} FKs sem índice")
+        findings = merge_findings(findings, catalog)
+
+    if not findings:
+        log("✅ Todas as chaves estrangeiras têm índice")
+        return True
+
+    statements = []
+    for finding in findings:
+        size = ""
+        if "estimated_bytes" in finding:
+            size = f" | ~{format_bytes(finding['estimated_bytes'])} ({finding['rows']} linhas)"
+        cascade = " ⚠️ CASCADE" if finding["on_delete"] == "CASCADE" else ""
+        log(f"❌ {finding['table']}({', '.join(finding['columns'])}) → {finding['ref_table']}"
+            f" ON DELETE {finding['on_delete']}{cascade} [{finding['origin']}]{size}")
+        statements.append(create_index_statement(finding["table"], finding["columns"]))
+
+    log("\n💡 ÍNDICES SUGERIDOS (executar fora de transação):")
+    for statement in statements:
+        log(f"   {statement}")
+
+    if args.sql_out:
+        with open(args.sql_out, "w", encoding="utf-8") as f:
+            f.write("-- Índices para chaves estrangeiras (gerado por lint_fk_indexes.py)\n")
+            f.write("-- CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação\n\n")
+            f.write("\n".join(statements) + "\n")
+        log(f"📁 Comandos gravados em {args.sql_out}")
+
+    return False
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Verificação interrompida pelo usuário", "WARNING")
+        sys.exit(1)
+    except Exception as e:
+        log(f"\n❌ Erro inesperado: {str(e)}", "ERROR")
+        sys.exit(1)
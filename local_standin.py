@@ -0,0 +1,775 @@
+#!/usr/bin/env python3
+"""
+Stand-in local da API REST do Supabase (subconjunto do PostgREST sobre SQLite)
+VBSolution - Sistema CRM Completo
+
+Serve /rest/v1/<tabela> com os filtros, ordenação, paginação (limit/offset/Range),
+Prefer (return, count, resolution) e /rest/v1/rpc/<função> que os scripts usam,
+para rodar cargas, migrações e testes sem tocar no projeto real. As tabelas vêm da
+união de todas as colunas declaradas nas migrações (ou de um schema_cache.json).
+O stand-in é permissivo: NOT NULL e FKs não são verificados. Com --latency-ms e
+--jitter-ms cada requisição espera antes de responder, simulando a rede até o projeto.
+Com --jwt-secret o stand-in exige JWTs HS256 assinados com o segredo e aplica o
+isolamento por empresa das migrações (tenant_policy) para os papéis anon e authenticated.
+
+Execute: python local_standin.py --db standin.sqlite3 --port 54321
+         export SUPABASE_URL=http://127.0.0.1:54321
+"""
+
+import os
+import re
+import sys
+import json
+import hmac
+import time
+import uuid
+import base64
+import random
+import hashlib
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from migration_schema import DEFAULT_SOURCES, ROOT_DIR
+from schema_cache import schema_from_migrations, load_schema_cache
+from instrumentation import log, print_summary_at_exit
+
+# Migrações + SQL avulso do backend e da raiz: o stand-in aceita qualquer coluna já declarada
+STANDIN_SOURCES = DEFAULT_SOURCES + [
+    os.path.join(ROOT_DIR, "database", "*.sql"),
+    os.path.join(ROOT_DIR, "backend", "*.sql"),
+    os.path.join(ROOT_DIR, "*.sql"),
+]
+
+DEFAULT_PORT = 54321
+
+FILTER_OPERATORS = {
+    "eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"}
+
+# Colunas do isolamento por empresa: (coluna do usuário, coluna da empresa)
+TENANT_KEYS = {"companies": ("owner_id", "id"), "profiles": ("id", "company_id")}
+DEFAULT_TENANT_KEYS = ("owner_id", "company_id")
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+def column_kind(column_type):
+    """Classificar o tipo do Postgres para armazenamento no SQLite"""
+    column_type = (column_type or "").lower()
+    if column_type.endswith("[]") or column_type in ("json", "jsonb", "array", "object"):
+        return "json"
+    base = column_type.split("(")[0].strip()
+    if base in ("boolean", "bool"):
+        return "bool"
+    if base in ("integer", "int", "int2", "int4", "int8", "smallint", "bigint", "serial", "bigserial"):
+        return "int"
+    if base in ("numeric", "decimal", "real", "double precision", "float4", "float8", "number"):
+        return "float"
+    return "text"
+
+SQLITE_TYPES = {"json": "TEXT", "bool": "INTEGER", "int": "INTEGER", "float": "REAL", "text": "TEXT"}
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def sign_jwt(claims, secret):
+    """JWT HS256, o formato dos tokens do Supabase"""
+    header = b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{b64url(signature)}"
+
+def verify_jwt(token, secret):
+    """Claims de um JWT HS256 válido; StandInError 401 (como o PostgREST) se não confere"""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(b64url(expected), signature):
+            raise StandInError(401, "PGRST301", "JWSError JWSInvalidSignature")
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        raise StandInError(401, "PGRST301", "JWSError (CompactDecodeError Invalid number of parts)")
+    if claims.get("exp") is not None and claims["exp"] < time.time():
+        raise StandInError(401, "PGRST303", "JWT expired")
+    return claims
+
+def tenant_policy(standin, table_name, claims):
+    """Isolamento das migrações: linhas do próprio usuário (owner_id) ou da empresa dele (company_id)"""
+    user_id = claims.get("sub")
+    if not user_id or claims.get("role") != "authenticated":
+        return {}
+    user_column, company_column = TENANT_KEYS.get(table_name, DEFAULT_TENANT_KEYS)
+    columns = standin.tables[table_name]["columns"]
+    allowed = {user_column: user_id} if user_column in columns else {}
+    company_id = standin.user_company(user_id)
+    if company_id and company_column in columns:
+        allowed[company_column] = company_id
+    return allowed
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def split_filter_list(text):
+    """Dividir 'a,"b,c",and(d,e)' por vírgulas fora de aspas duplas e parênteses"""
+    parts = []
+    current = []
+    depth = 0
+    quoted = False
+    escaped = False
+
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+def filter_value(raw):
+    """Remover as aspas duplas que o PostgREST aceita em valores com , . : ( )"""
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return raw
+
+class StandInError(Exception):
+    """Erro no formato de resposta do PostgREST"""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": None, "hint": None}
+
+class StandIn:
+    """Banco SQLite com a semântica REST do PostgREST usada pelos scripts"""
+
+    def __init__(self, tables=None, db_path=":memory:", max_rows=None, latency_ms=0.0, jitter_ms=0.0, jwt_secret=None):
+        if tables is None:
+            tables = schema_from_migrations(STANDIN_SOURCES, merge=True)
+        self.tables = tables
+        self.max_rows = max_rows
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.jwt_secret = jwt_secret
+        self.rpcs = {}
+        self.policies = {}
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.kinds = {
+            name: {column: column_kind(spec.get("type")) for column, spec in table["columns"].items()}
+            for name, table in tables.items()
+        }
+        # ON DELETE CASCADE das migrações (as tabelas SQLite não declaram FKs): pai → [(filha, coluna, coluna do pai)]
+        self.cascades = {}
+        for name, table in tables.items():
+            for fk in table.get("foreign_keys", []):
+                parent = tables.get(fk["ref_table"])
+                if (fk.get("on_delete") == "CASCADE" and parent and len(fk["columns"]) == 1
+                        and fk["columns"][0] in table["columns"] and fk["ref_columns"][0] in parent["columns"]):
+                    self.cascades.setdefault(fk["ref_table"], []).append((name, fk["columns"][0], fk["ref_columns"][0]))
+        self.create_tables()
+
+    # ------------------------------------------------------------------ schema
+
+    def create_tables(self):
+        """Criar as tabelas e índices declarados (idempotente)"""
+        with self.lock:
+            for name, table in self.tables.items():
+                columns = [f"{quote(c)} {SQLITE_TYPES[self.kinds[name][c]]}" for c in table["columns"]]
+                primary_key = [c for c in table.get("primary_key", []) if c in table["columns"]]
+                if primary_key:
+                    columns.append(f"PRIMARY KEY ({', '.join(quote(c) for c in primary_key)})")
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(name)} ({', '.join(columns)})")
+
+                for index_columns in table.get("indexes", []):
+                    if index_columns and all(c in table["columns"] for c in index_columns):
+                        index_name = f"idx_{name}_{'_'.join(index_columns)}"
+                        self.conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(name)} "
+                            f"({', '.join(quote(c) for c in index_columns)})"
+                        )
+
+    def table(self, name):
+        if name not in self.tables:
+            raise StandInError(404, "42P01", f'relation "public.{name}" does not exist')
+        return self.tables[name]
+
+    def check_column(self, table_name, column):
+        if column not in self.tables[table_name]["columns"]:
+            raise StandInError(400, "42703", f"column {table_name}.{column} does not exist")
+
+    def default_value(self, spec):
+        """Valor padrão simples (uuid, now(), literais)"""
+        default = (spec.get("default") or "").strip()
+        if not default:
+            return None
+        lowered = re.sub(r"\s+", "", default.lower())  # o parser das migrações devolve 'now ( )'
+        if "gen_random_uuid" in lowered or "uuid_generate" in lowered:
+            return str(uuid.uuid4())
+        if lowered.startswith("now(") or "current_timestamp" in lowered or lowered.startswith("timezone("):
+            return now_iso()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        match = re.match(r"^'(.*)'(?:::[\w ]+)?$", default)
+        if match:
+            return match.group(1)
+        try:
+            return float(default) if "." in default else int(default)
+        except ValueError:
+            return None
+
+    # ------------------------------------------------------------ conversions
+
+    def to_db(self, table_name, column, value):
+        kind = self.kinds[table_name][column]
+        if value is None:
+            return None
+        if kind == "json":
+            return json.dumps(value)
+        if kind == "bool":
+            return int(bool(value))
+        return value
+
+    def from_db(self, table_name, column, value):
+        if value is None:
+            return None
+        kind = self.kinds[table_name].get(column, "text")
+        if kind == "json":
+            return json.loads(value)
+        if kind == "bool":
+            return bool(value)
+        return value
+
+    def coerce_filter(self, table_name, column, raw):
+        """Converter o valor textual do filtro para o tipo da coluna"""
+        kind = self.kinds[table_name][column]
+        if kind == "bool":
+            return 1 if raw.lower() in ("true", "t", "1") else 0
+        if kind == "int":
+            try:
+                return int(raw)
+            except ValueError:
+                raise StandInError(400, "22P02", f'invalid input syntax for type integer: "{raw}"')
+        if kind == "float":
+            try:
+                return float(raw)
+            except ValueError:
+                raise StandInError(400, "22P02", f'invalid input syntax for type numeric: "{raw}"')
+        return raw
+
+    # ---------------------------------------------------------------- filters
+
+    def parse_condition(self, table_name, column, expression):
+        """col + 'op.valor' → (sql, params)"""
+        negate = False
+        if expression.startswith("not."):
+            negate = True
+            expression = expression[4:]
+
+        operator, _, raw = expression.partition(".")
+        self.check_column(table_name, column)
+        value = filter_value(raw)
+
+        if operator == "in":
+            items = [filter_value(item) for item in split_filter_list(raw.strip()[1:-1])]
+            if not items:
+                sql, params = "0", []
+            else:
+                values = [self.coerce_filter(table_name, column, item) for item in items]
+                sql, params = f"{quote(column)} IN ({', '.join('?' * len(values))})", values
+        elif operator == "is":
+            target = {"null": "NULL", "true": "1", "false": "0"}.get(value.lower())
+            if target is None:
+                raise StandInError(400, "PGRST100", f"invalid is value: {value}")
+            sql, params = f"{quote(column)} IS {target}", []
+        elif operator == "like":
+            # GLOB diferencia maiúsculas e já usa * como curinga, igual ao PostgREST
+            sql, params = f"{quote(column)} GLOB ?", [value]
+        elif operator == "ilike":
+            sql, params = f"{quote(column)} LIKE ?", [value.replace("*", "%")]
+        elif operator in FILTER_OPERATORS:
+            sql, params = f"{quote(column)} {FILTER_OPERATORS[operator]} ?", [self.coerce_filter(table_name, column, value)]
+        else:
+            raise StandInError(400, "PGRST100", f"unknown operator: {operator}")
+
+        return (f"NOT ({sql})" if negate else sql), params
+
+    def parse_logic(self, table_name, operator, text):
+        """or=(a.eq.1,and(b.gt.2,c.lt.3)) → (sql, params)"""
+        parts = []
+        params = []
+        for item in split_filter_list(text.strip()[1:-1]):
+            match = re.match(r"^(not\.)?(and|or)(\(.*\))$", item)
+            if match:
+                sql, item_params = self.parse_logic(table_name, match.group(2), match.group(3))
+                if match.group(1):
+                    sql = f"NOT {sql}"
+            else:
+                column, _, expression = item.partition(".")
+                sql, item_params = self.parse_condition(table_name, column, expression)
+            parts.append(sql)
+            params.extend(item_params)
+        return "(" + f" {operator.upper()} ".join(parts or ["1"]) + ")", params
+
+    def build_where(self, table_name, params_list, allowed=None):
+        conditions = []
+        values = []
+        if allowed is not None:
+            # RLS: alguma das colunas da política bate com o valor do usuário
+            conditions.append("(" + " OR ".join(f"{quote(c)} = ?" for c in allowed) + ")" if allowed else "0")
+            values.extend(allowed.values())
+        for key, value in params_list:
+            if key in ("or", "and"):
+                sql, params = self.parse_logic(table_name, key, value)
+            elif key.startswith("not.") and key[4:] in ("or", "and"):
+                sql, params = self.parse_logic(table_name, key[4:], value)
+                sql = f"NOT {sql}"
+            elif key in RESERVED_PARAMS:
+                continue
+            else:
+                sql, params = self.parse_condition(table_name, key, value)
+            conditions.append(sql)
+            values.extend(params)
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", values
+
+    def build_order(self, table_name, order):
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            column, *modifiers = term.strip().split(".")
+            self.check_column(table_name, column)
+            direction = "DESC" if "desc" in modifiers else "ASC"
+            # Mesmo padrão do Postgres: NULLS LAST no ASC e NULLS FIRST no DESC
+            nulls = "NULLS FIRST" if "nullsfirst" in modifiers else "NULLS LAST" if "nullslast" in modifiers else (
+                "NULLS FIRST" if direction == "DESC" else "NULLS LAST")
+            terms.append(f"{quote(column)} {direction} {nulls}")
+        return " ORDER BY " + ", ".join(terms)
+
+    def select_columns(self, table_name, select):
+        if not select or select.strip() == "*":
+            return list(self.tables[table_name]["columns"])
+        columns = [c.strip() for c in select.split(",") if c.strip()]
+        for column in columns:
+            self.check_column(table_name, column)
+        return columns
+
+    # ------------------------------------------------------------- operations
+
+    def rows_to_json(self, table_name, columns, rows):
+        return [{c: self.from_db(table_name, c, v) for c, v in zip(columns, row)} for row in rows]
+
+    def select(self, table_name, params_list, range_header=None, count=False, allowed=None):
+        """GET: (linhas, início, total ou None)"""
+        params = dict(params_list)
+        columns = self.select_columns(table_name, params.get("select"))
+        where, values = self.build_where(table_name, params_list, allowed)
+        order = self.build_order(table_name, params.get("order"))
+
+        offset = int(params.get("offset", 0))
+        limit = int(params["limit"]) if "limit" in params else None
+        if range_header:
+            match = re.match(r"^(?:items=)?(\d+)-(\d*)$", range_header.strip())
+            if match:
+                offset = int(match.group(1))
+                if match.group(2):
+                    range_limit = int(match.group(2)) - offset + 1
+                    limit = range_limit if limit is None else min(limit, range_limit)
+        if self.max_rows is not None:
+            limit = self.max_rows if limit is None else min(limit, self.max_rows)
+
+        sql = f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(table_name)}{where}{order}"
+        if limit is not None or offset:
+            sql += f" LIMIT {limit if limit is not None else -1} OFFSET {offset}"
+
+        with self.lock:
+            rows = self.conn.execute(sql, values).fetchall()
+            total = None
+            if count:
+                total = self.conn.execute(f"SELECT count(*) FROM {quote(table_name)}{where}", values).fetchone()[0]
+
+        return self.rows_to_json(table_name, columns, rows), offset, total
+
+    def insert(self, table_name, payload, params_list, prefer, allowed=None):
+        """POST: insert simples ou em lote, com upsert opcional"""
+        table = self.table(table_name)
+        rows = payload if isinstance(payload, list) else [payload]
+        if not rows:
+            return []
+        if allowed is not None:
+            for row in rows:
+                if not any(row.get(c) == v for c, v in allowed.items()):
+                    raise StandInError(403, "42501", f'new row violates row-level security policy for table "{table_name}"')
+
+        params = dict(params_list)
+        columns = params["columns"].split(",") if "columns" in params else []
+        for row in rows:
+            for column in row:
+                if column not in columns:
+                    columns.append(column)
+        for column in columns:
+            self.check_column(table_name, column)
+
+        # Colunas ausentes recebem o DEFAULT declarado (id, created_at...)
+        defaulted = [c for c, spec in table["columns"].items() if c not in columns and spec.get("default")]
+        all_columns = columns + defaulted
+
+        sql = (f"INSERT INTO {quote(table_name)} ({', '.join(quote(c) for c in all_columns)}) "
+               f"VALUES ({', '.join('?' * len(all_columns))})")
+
+        resolution = prefer.get("resolution")
+        if resolution:
+            conflict = params.get("on_conflict", ",".join(table.get("primary_key") or ["id"])).split(",")
+            for column in conflict:
+                self.check_column(table_name, column)
+            self.ensure_unique(table_name, conflict)
+            target = ", ".join(quote(c) for c in conflict)
+            if resolution == "ignore-duplicates":
+                sql += f" ON CONFLICT ({target}) DO NOTHING"
+            else:
+                updates = [c for c in columns if c not in conflict]
+                if updates:
+                    sql += f" ON CONFLICT ({target}) DO UPDATE SET " + ", ".join(f"{quote(c)} = excluded.{quote(c)}" for c in updates)
+                else:
+                    sql += f" ON CONFLICT ({target}) DO NOTHING"
+
+        specs = table["columns"]
+        values = [
+            [self.to_db(table_name, c, row.get(c)) for c in columns]
+            + [self.to_db(table_name, c, self.default_value(specs[c])) for c in defaulted]
+            for row in rows
+        ]
+
+        representation = prefer.get("return") == "representation"
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN")
+                if representation:
+                    returned = []
+                    for row_values in values:
+                        cursor = self.conn.execute(sql + " RETURNING *", row_values)
+                        names = [d[0] for d in cursor.description]
+                        returned.extend(self.rows_to_json(table_name, names, cursor.fetchall()))
+                else:
+                    self.conn.executemany(sql, values)
+                    returned = None
+                self.conn.execute("COMMIT")
+            except BaseException as e:
+                # Qualquer falha desfaz a transação: a conexão é compartilhada por todas as requisições
+                self.conn.execute("ROLLBACK")
+                if isinstance(e, sqlite3.IntegrityError):
+                    raise StandInError(409, "23505", f"duplicate key value violates unique constraint: {e}")
+                raise
+        return returned if representation else len(values)
+
+    def ensure_unique(self, table_name, columns):
+        """on_conflict precisa de um índice único; o stand-in cria sob demanda"""
+        index_name = f"uniq_{table_name}_{'_'.join(columns)}"
+        try:
+            # Conexão compartilhada: o DDL não pode cair dentro da transação de outra requisição
+            with self.lock:
+                self.conn.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(table_name)} "
+                    f"({', '.join(quote(c) for c in columns)})"
+                )
+        except sqlite3.IntegrityError:
+            raise StandInError(400, "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification")
+
+    def update(self, table_name, payload, params_list, prefer, allowed=None):
+        """PATCH: atualização filtrada (com RLS, a linha não pode mudar de dono/empresa)"""
+        self.table(table_name)
+        if not isinstance(payload, dict) or not payload:
+            raise StandInError(400, "PGRST102", "PATCH body must be a non-empty object")
+        for column in payload:
+            self.check_column(table_name, column)
+        if allowed is not None and any(c in payload and payload[c] != v for c, v in allowed.items()):
+            raise StandInError(403, "42501", f'new row violates row-level security policy for table "{table_name}"')
+
+        where, values = self.build_where(table_name, params_list, allowed)
+        assignments = ", ".join(f"{quote(c)} = ?" for c in payload)
+        sql = f"UPDATE {quote(table_name)} SET {assignments}{where}"
+        params = [self.to_db(table_name, c, v) for c, v in payload.items()] + values
+        return self.execute_write(table_name, sql, params, prefer)
+
+    def delete(self, table_name, params_list, prefer, allowed=None):
+        """DELETE: exige filtro, como o pg-safeupdate do Supabase; as FKs em cascata apagam as filhas"""
+        self.table(table_name)
+        if not any(key not in RESERVED_PARAMS or key in ("or", "and") for key, _ in params_list):
+            raise StandInError(400, "21000", "DELETE requires a WHERE clause")
+        where, values = self.build_where(table_name, params_list, allowed)
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.delete_cascades(table_name, where, values)
+                result = self.execute_write(table_name, f"DELETE FROM {quote(table_name)}{where}", values, prefer)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return result
+
+    def delete_cascades(self, table_name, where, values, path=()):
+        """Apagar as linhas filhas (ON DELETE CASCADE) das linhas de table_name que casam com where
+
+        Como no Postgres, a cascata ignora RLS. Chamar com self.lock, dentro da transação do DELETE.
+        """
+        path = path + (table_name,)
+        for child, column, parent_column in self.cascades.get(table_name, []):
+            if child in path:
+                continue
+            child_where = f" WHERE {quote(column)} IN (SELECT {quote(parent_column)} FROM {quote(table_name)}{where})"
+            self.delete_cascades(child, child_where, values, path)
+            self.conn.execute(f"DELETE FROM {quote(child)}{child_where}", values)
+
+    def execute_write(self, table_name, sql, params, prefer):
+        with self.lock:
+            if prefer.get("return") == "representation":
+                cursor = self.conn.execute(sql + " RETURNING *", params)
+                names = [d[0] for d in cursor.description]
+                return self.rows_to_json(table_name, names, cursor.fetchall())
+            return self.conn.execute(sql, params).rowcount
+
+    def bulk_insert(self, table_name, columns, rows):
+        """Carga direta em lote (sem HTTP), para geradores de dados"""
+        sql = (f"INSERT INTO {quote(table_name)} ({', '.join(quote(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        converters = [self.kinds[table_name][c] for c in columns]
+
+        def convert(row):
+            return [
+                None if v is None else json.dumps(v) if kind == "json" else int(v) if kind == "bool" else v
+                for v, kind in zip(row, converters)
+            ]
+
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(sql, map(convert, rows))
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def register_policy(self, table_name, function):
+        """RLS: function(standin, tabela, claims) → {coluna: valor}; a linha vale se alguma coluna bate"""
+        self.policies[table_name] = function
+
+    def enable_tenant_rls(self, tables=None):
+        """tenant_policy em todas as tabelas com dono ou empresa (ou só nas dadas)"""
+        for name in tables or self.tables:
+            keys = TENANT_KEYS.get(name, DEFAULT_TENANT_KEYS)
+            if any(column in self.tables[name]["columns"] for column in keys):
+                self.register_policy(name, tenant_policy)
+
+    def user_company(self, user_id):
+        """company_id do perfil (a subconsulta das políticas, refeita a cada requisição)"""
+        with self.lock:
+            row = self.conn.execute('SELECT "company_id" FROM "profiles" WHERE "id" = ?', (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def authenticate(self, headers):
+        """Claims do JWT (Authorization ou apikey) quando o stand-in tem jwt_secret; senão None"""
+        if not self.jwt_secret:
+            return None
+        token = headers.get("authorization", "").removeprefix("Bearer ").strip() or headers.get("apikey", "")
+        if not token:
+            raise StandInError(401, "PGRST301", "No API key found in request")
+        return verify_jwt(token, self.jwt_secret)
+
+    def row_policy(self, table_name, claims):
+        """Colunas/valores visíveis para o papel do JWT; None = sem RLS (service_role ou sem política)"""
+        if claims is None or claims.get("role") == "service_role" or table_name not in self.policies:
+            return None
+        return self.policies[table_name](self, table_name, claims)
+
+    def register_rpc(self, name, function):
+        """Registrar uma função para /rest/v1/rpc/<name> (recebe o stand-in, params e headers)"""
+        self.rpcs[name] = function
+
+    def openapi(self):
+        """Documento no formato do OpenAPI do PostgREST (usado pelo schema_cache)"""
+        definitions = {}
+        for name, table in self.tables.items():
+            fks = {fk["columns"][0]: fk for fk in table.get("foreign_keys", []) if len(fk["columns"]) == 1}
+            properties = {}
+            for column, spec in table["columns"].items():
+                description = []
+                if column in table.get("primary_key", []):
+                    description.append("Note:\nThis is a Primary Key.<pk/>")
+                if column in fks:
+                    fk = fks[column]
+                    description.append(f"Note:\nThis is a Foreign Key to `{fk['ref_table']}.{fk['ref_columns'][0]}`."
+                                       f"<fk table='{fk['ref_table']}' column='{fk['ref_columns'][0]}'/>")
+                properties[column] = {"format": spec.get("type"), "type": "string"}
+                if spec.get("default"):
+                    properties[column]["default"] = spec["default"]
+                if description:
+                    properties[column]["description"] = "\n".join(description)
+            definitions[name] = {
+                "required": [c for c, spec in table["columns"].items() if spec.get("not_null")],
+                "properties": properties,
+                "type": "object",
+            }
+        return {"swagger": "2.0", "info": {"title": "local_standin"}, "definitions": definitions,
+                "paths": {f"/{name}": {} for name in self.tables}}
+
+    # ---------------------------------------------------------------- routing
+
+    def network_delay(self):
+        """Latência injetada: fixa + cauda exponencial (média jitter_ms), fora do lock do banco"""
+        delay = self.latency_ms + (random.expovariate(1 / self.jitter_ms) if self.jitter_ms > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def handle(self, method, path, query, headers, body):
+        """Atender uma requisição REST → (status, headers, corpo em bytes)"""
+        self.network_delay()
+        try:
+            status, extra_headers, payload = self.dispatch(method, path, query, headers, body)
+        except StandInError as e:
+            status, extra_headers, payload = e.status, {}, e.body
+        except (ValueError, sqlite3.Error) as e:
+            status, extra_headers, payload = 400, {}, {"code": "PGRST000", "message": str(e), "details": None, "hint": None}
+
+        response_headers = {"Content-Type": "application/json; charset=utf-8", **extra_headers}
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        return status, response_headers, data
+
+    def dispatch(self, method, path, query, headers, body):
+        headers = {k.lower(): v for k, v in headers.items()}
+        prefer = dict(
+            item.strip().split("=", 1) for item in headers.get("prefer", "").split(",") if "=" in item
+        )
+        params_list = parse_qsl(query, keep_blank_values=True)
+        claims = self.authenticate(headers)
+
+        resource = path.split("/rest/v1", 1)[-1].strip("/")
+        if resource == "":
+            return 200, {"Content-Type": "application/openapi+json"}, self.openapi()
+
+        payload = json.loads(body) if body else None
+
+        if resource.startswith("rpc/"):
+            name = resource[4:]
+            if name not in self.rpcs:
+                raise StandInError(404, "PGRST202", f"Could not find the function public.{name}")
+            args = payload if payload is not None else dict(params_list)
+            return 200, {}, self.rpcs[name](self, args, headers)
+
+        self.table(resource)
+        allowed = self.row_policy(resource, claims)
+
+        if method in ("GET", "HEAD"):
+            count = prefer.get("count") in ("exact", "planned", "estimated")
+            rows, start, total = self.select(resource, params_list, headers.get("range"), count, allowed)
+            end = start + len(rows) - 1
+            content_range = f"{start}-{end}/{total if total is not None else '*'}" if rows else f"*/{total if total is not None else '*'}"
+            status = 206 if total is not None and len(rows) < total and rows else 200
+            return status, {"Content-Range": content_range}, (None if method == "HEAD" else rows)
+
+        if method == "POST":
+            result = self.insert(resource, payload, params_list, prefer, allowed)
+            if isinstance(result, list):
+                return 201, {}, result
+            return 201, {"Content-Range": f"*/{result}"}, None
+
+        if method == "PATCH":
+            result = self.update(resource, payload, params_list, prefer, allowed)
+        elif method == "DELETE":
+            result = self.delete(resource, params_list, prefer, allowed)
+        else:
+            raise StandInError(405, "PGRST117", f"Unsupported HTTP method: {method}")
+
+        if isinstance(result, list):
+            return 200, {"Content-Range": f"0-{len(result) - 1}/*" if result else "*/*"}, result
+        return 204, {"Content-Range": f"*/{result}"}, None
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """Adaptador HTTP para o StandIn"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers e corpo saem em writes separados: sem isso, +40 ms do ACK atrasado
+    standin = None
+
+    def _serve(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, data = self.standin.handle(self.command, url.path, url.query, dict(self.headers), body)
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _serve
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(standin, host="127.0.0.1", port=DEFAULT_PORT):
+    """Criar o servidor HTTP para um StandIn (porta 0 = livre)"""
+    handler = type("BoundStandInRequestHandler", (StandInRequestHandler,), {"standin": standin})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_background(standin, host="127.0.0.1", port=0):
+    """Subir o stand-in numa thread e devolver (servidor, url base)"""
+    server = serve(standin, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Stand-in local da API REST do Supabase")
+    parser.add_argument("--db", default=":memory:", help="Arquivo SQLite (padrão: memória)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--schema-cache", action="store_true", help="Usar schema_cache.json em vez das migrações")
+    parser.add_argument("--max-rows", type=int, default=None, help="Limite de linhas por resposta (db-max-rows)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência fixa injetada em cada requisição")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Média da cauda exponencial somada à latência")
+    parser.add_argument("--jwt-secret", default=None, help="Exigir JWTs HS256 com este segredo e isolar por empresa (RLS)")
+    args = parser.parse_args()
+
+    tables = load_schema_cache(required=True) if args.schema_cache else None
+    standin = StandIn(tables, args.db, args.max_rows, args.latency_ms, args.jitter_ms, args.jwt_secret)
+    if args.jwt_secret:
+        standin.enable_tenant_rls()
+    server = serve(standin, args.host, args.port)
+
+    log(f"🧪 Stand-in com {len(standin.tables)} tabelas em http://{args.host}:{server.server_address[1]}/rest/v1/")
+    log(f"💡 export SUPABASE_URL=http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        main()
+    except KeyboardInterrupt:
+        log("\n⚠️ Stand-in encerrado pelo usuário", "WARNING")
+        sys.exit(0)
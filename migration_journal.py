@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Diário de checkpoints para migrações de dados em lotes
+VBSolution - Sistema CRM Completo
+
+Cada fase de uma migração percorre a tabela em ordem de id, em lotes, e grava no
+diário (um arquivo SQLite local) a faixa de ids de cada lote concluído. Ao rodar
+de novo, a fase continua depois do último lote gravado. Verificações também ficam
+registradas, para que a fase destrutiva só rode depois de uma verificação aprovada.
+
+Uso:   journal = MigrationJournal("migracao.journal.sqlite3", "atendimentos")
+       for chunk in keyset_pages(..., after=journal.resume_key("status")):
+           ...
+           journal.commit_chunk("status", chunk[0].id, chunk[-1].id, len(chunk))
+       journal.complete_phase("status")
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    migration TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    first_id TEXT,
+    last_id TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    committed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_phase ON checkpoints (migration, phase);
+CREATE TABLE IF NOT EXISTS phases (
+    migration TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    PRIMARY KEY (migration, phase)
+);
+CREATE TABLE IF NOT EXISTS verifications (
+    migration TEXT NOT NULL,
+    verified_at TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    details TEXT
+);
+"""
+
+class MigrationJournal:
+    """Checkpoints por fase de uma migração, gravados a cada lote"""
+
+    def __init__(self, path, migration):
+        self.path = path
+        self.migration = migration
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def commit_chunk(self, phase, first_id, last_id, rows):
+        """Registrar um lote concluído (chamar só depois que a escrita no servidor deu certo)"""
+        self.conn.execute(
+            "INSERT INTO checkpoints (migration, phase, first_id, last_id, rows, committed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.migration, phase, first_id, last_id, rows, datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    def resume_key(self, phase):
+        """Último id processado na fase (None = começar do início)"""
+        row = self.conn.execute(
+            "SELECT last_id FROM checkpoints WHERE migration = ? AND phase = ? ORDER BY rowid DESC LIMIT 1",
+            (self.migration, phase)
+        ).fetchone()
+        return row[0] if row else None
+
+    def processed_rows(self, phase):
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(rows), 0), COUNT(*) FROM checkpoints WHERE migration = ? AND phase = ?",
+            (self.migration, phase)
+        ).fetchone()
+        return {"rows": row[0], "chunks": row[1]}
+
+    def complete_phase(self, phase):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO phases (migration, phase, completed_at) VALUES (?, ?, ?)",
+            (self.migration, phase, datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    def is_complete(self, phase):
+        return self.conn.execute(
+            "SELECT 1 FROM phases WHERE migration = ? AND phase = ?", (self.migration, phase)
+        ).fetchone() is not None
+
+    def record_verification(self, ok, details):
+        self.conn.execute(
+            "INSERT INTO verifications (migration, verified_at, ok, details) VALUES (?, ?, ?, ?)",
+            (self.migration, datetime.now().isoformat(), int(bool(ok)), json.dumps(details, ensure_ascii=False, default=str))
+        )
+        self.conn.commit()
+
+    def last_verification(self):
+        """Última verificação registrada ({'ok', 'verified_at', 'details'}) ou None"""
+        row = self.conn.execute(
+            "SELECT verified_at, ok, details FROM verifications WHERE migration = ? ORDER BY rowid DESC LIMIT 1",
+            (self.migration,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"verified_at": row[0], "ok": bool(row[1]), "details": json.loads(row[2]) if row[2] else None}
+
+    def reset(self):
+        """Apagar o progresso desta migração (recomeçar do zero)"""
+        for table in ("checkpoints", "phases", "verifications"):
+            self.conn.execute(f"DELETE FROM {table} WHERE migration = ?", (self.migration,))
+        self.conn.commit()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Leitura do schema declarado nas migrações SQL do projeto
+VBSolution - Sistema CRM Completo
+
+Aplica em ordem os CREATE TABLE / ALTER TABLE / CREATE INDEX / DROP encontrados
+nos arquivos .sql e no SQL embutido nos scripts .py (ex: fix_data_isolation.py)
+e devolve o estado final de cada tabela como dicionários simples.
+"""
+
+import os
+import re
+import ast
+import glob
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fontes padrão, na ordem em que foram aplicadas
+DEFAULT_SOURCES = [
+    os.path.join(ROOT_DIR, "supabase", "migrations", "*.sql"),
+    os.path.join(ROOT_DIR, "fix_data_isolation.py"),
+]
+
+# Palavras que encerram o tipo na definição de uma coluna
+COLUMN_CONSTRAINT_WORDS = {
+    "NOT", "NULL", "DEFAULT", "PRIMARY", "REFERENCES", "UNIQUE", "CHECK",
+    "CONSTRAINT", "GENERATED", "COLLATE"
+}
+
+TABLE_CONSTRAINT_WORDS = ("CONSTRAINT", "PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "EXCLUDE", "LIKE")
+
+IDENT = r'(?:"[^"]+"|[\w$]+)'
+QUALIFIED = rf'{IDENT}(?:\s*\.\s*{IDENT})?'
+
+def strip_comments(sql):
+    """Remover comentários -- e /* */ preservando strings e blocos $$"""
+    out = []
+    i = 0
+    n = len(sql)
+
+    while i < n:
+        ch = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif ch == "'":
+            end = i + 1
+            while end < n:
+                if sql[end] == "'" and sql.startswith("''", end):
+                    end += 2
+                    continue
+                if sql[end] == "'":
+                    break
+                end += 1
+            out.append(sql[i:end + 1])
+            i = end + 1
+        elif ch == "$":
+            match = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if match:
+                tag = match.group(0)
+                end = sql.find(tag, i + len(tag))
+                end = n if end == -1 else end + len(tag)
+                out.append(sql[i:end])
+                i = end
+            else:
+                out.append(ch)
+                i += 1
+        else:
+            out.append(ch)
+            i += 1
+
+    return "".join(out)
+
+def split_statements(sql):
+    """Dividir o SQL em comandos por ';' fora de strings e blocos $$"""
+    sql = strip_comments(sql)
+    statements = []
+    current = []
+    i = 0
+    n = len(sql)
+
+    while i < n:
+        ch = sql[i]
+        if ch == "'":
+            end = sql.find("'", i + 1)
+            while end != -1 and sql.startswith("''", end):
+                end = sql.find("'", end + 2)
+            end = n - 1 if end == -1 else end
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        if ch == "$":
+            match = re.match(r"\$[A-Za-z_]*\$", sql[i:])
+            if match:
+                tag = match.group(0)
+                end = sql.find(tag, i + len(tag))
+                end = n if end == -1 else end + len(tag)
+                current.append(sql[i:end])
+                i = end
+                continue
+        if ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+def split_top_level(text, separator=","):
+    """Dividir por vírgulas fora de parênteses"""
+    parts = []
+    depth = 0
+    current = []
+    quote = False
+
+    for ch in text:
+        if ch == "'":
+            quote = not quote
+        elif not quote and ch == "(":
+            depth += 1
+        elif not quote and ch == ")":
+            depth -= 1
+        if ch == separator and depth == 0 and not quote:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+def unquote(identifier):
+    """Normalizar identificador (sem aspas, minúsculo quando não citado)"""
+    identifier = identifier.strip()
+    if identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1]
+    return identifier.lower()
+
+def split_name(qualified):
+    """Separar schema e nome ('public.companies' → ('public', 'companies'))"""
+    parts = [unquote(p) for p in re.findall(IDENT, qualified)]
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return "public", parts[0]
+
+def parse_column_list(text):
+    """'(a, "b", c DESC)' → ['a', 'b', 'c']"""
+    columns = []
+    for item in split_top_level(text.strip().strip("()")):
+        match = re.match(IDENT, item.strip())
+        if match:
+            columns.append(unquote(match.group(0)))
+    return columns
+
+def parse_references(text):
+    """Extrair REFERENCES tabela(colunas) [ON DELETE ação]"""
+    match = re.search(rf"REFERENCES\s+({QUALIFIED})\s*(\([^)]*\))?", text, re.IGNORECASE)
+    if not match:
+        return None
+
+    schema, table = split_name(match.group(1))
+    on_delete = re.search(r"ON\s+DELETE\s+(CASCADE|SET\s+NULL|SET\s+DEFAULT|RESTRICT|NO\s+ACTION)", text, re.IGNORECASE)
+    return {
+        "ref_table": table if schema == "public" else f"{schema}.{table}",
+        "ref_columns": parse_column_list(match.group(2)) if match.group(2) else ["id"],
+        "on_delete": " ".join(on_delete.group(1).upper().split()) if on_delete else "NO ACTION",
+    }
+
+def parse_column(definition):
+    """Interpretar a definição de uma coluna"""
+    match = re.match(rf"({IDENT})\s+(.*)$", definition, re.DOTALL)
+    if not match:
+        return None
+
+    name = unquote(match.group(1))
+    rest = match.group(2)
+
+    # O tipo vai até a primeira palavra de constraint fora de parênteses
+    type_words = []
+    depth = 0
+    tokens = re.findall(r"\(|\)|[^\s()]+", rest)
+    consumed = 0
+    for token in tokens:
+        if depth == 0 and token.upper() in COLUMN_CONSTRAINT_WORDS:
+            break
+        depth += token.count("(") - token.count(")")
+        type_words.append(token)
+        consumed += 1
+
+    data_type = re.sub(r"\s*\(\s*", "(", " ".join(type_words)).replace(" )", ")").lower()
+    constraints = " ".join(tokens[consumed:])
+    upper = constraints.upper()
+
+    default = re.search(r"DEFAULT\s+(.+?)(?=\s+(?:NOT\s+NULL|NULL|PRIMARY|REFERENCES|UNIQUE|CHECK|CONSTRAINT)\b|$)", constraints, re.IGNORECASE)
+
+    return {
+        "name": name,
+        "type": data_type,
+        "not_null": "NOT NULL" in upper or "PRIMARY KEY" in upper,
+        "default": default.group(1).strip() if default else None,
+        "primary_key": "PRIMARY KEY" in upper,
+        "unique": bool(re.search(r"\bUNIQUE\b", upper)),
+        "references": parse_references(constraints),
+    }
+
+def new_table(schema, name):
+    return {"schema": schema, "name": name, "columns": {}, "primary_key": [],
+            "foreign_keys": [], "indexes": [], "source": None}
+
+def add_table_constraint(table, definition, source):
+    """Aplicar PRIMARY KEY / UNIQUE / FOREIGN KEY de tabela"""
+    body = re.sub(rf"^CONSTRAINT\s+{IDENT}\s+", "", definition.strip(), flags=re.IGNORECASE)
+    upper = body.upper()
+
+    if upper.startswith("PRIMARY KEY"):
+        columns = parse_column_list(body[body.index("("):body.index(")") + 1])
+        table["primary_key"] = columns
+        table["indexes"].append({"name": f"{table['name']}_pkey", "columns": columns, "unique": True, "source": source})
+    elif upper.startswith("UNIQUE"):
+        columns = parse_column_list(body[body.index("("):body.index(")") + 1])
+        table["indexes"].append({"name": None, "columns": columns, "unique": True, "source": source})
+    elif upper.startswith("FOREIGN KEY"):
+        columns = parse_column_list(body[body.index("("):body.index(")") + 1])
+        references = parse_references(body)
+        if references:
+            table["foreign_keys"].append({"columns": columns, **references, "source": source})
+
+def add_column(table, column, source):
+    """Registrar coluna e as constraints declaradas nela"""
+    table["columns"][column["name"]] = column
+    if column["primary_key"]:
+        table["primary_key"] = [column["name"]]
+        table["indexes"].append({"name": f"{table['name']}_pkey", "columns": [column["name"]], "unique": True, "source": source})
+    elif column["unique"]:
+        table["indexes"].append({"name": None, "columns": [column["name"]], "unique": True, "source": source})
+    if column["references"]:
+        table["foreign_keys"].append({"columns": [column["name"]], **column["references"], "source": source})
+
+def apply_statement(tables, statement, source, merge=False):
+    """Aplicar um comando DDL ao estado das tabelas
+
+    Com merge=True nada é removido: cada CREATE TABLE repetido soma suas colunas
+    às já conhecidas (união de tudo que as migrações já declararam).
+    """
+    text = " ".join(statement.split())
+
+    match = re.match(rf"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?({QUALIFIED})\s*\((.*)\)", text, re.IGNORECASE | re.DOTALL)
+    if match:
+        schema, name = split_name(match.group(2))
+        if schema != "public":
+            return
+        if name in tables and match.group(1) and not merge:
+            return
+        table = tables[name] if merge and name in tables else new_table(schema, name)
+        table["source"] = table["source"] or source
+        for definition in split_top_level(match.group(3)):
+            if definition.split(None, 1)[0].upper() in TABLE_CONSTRAINT_WORDS:
+                add_table_constraint(table, definition, source)
+            else:
+                column = parse_column(definition)
+                if column and column["name"] not in table["columns"]:
+                    add_column(table, column, source)
+        tables[name] = table
+        return
+
+    match = re.match(r"DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(.+?)(?:\s+CASCADE|\s+RESTRICT)?$", text, re.IGNORECASE)
+    if match:
+        if merge:
+            return
+        for item in match.group(1).split(","):
+            schema, name = split_name(item)
+            if schema == "public":
+                tables.pop(name, None)
+        return
+
+    match = re.match(rf"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?({IDENT})?\s*ON\s+(?:ONLY\s+)?({QUALIFIED})\s*(?:USING\s+\w+\s*)?(\(.*\))", text, re.IGNORECASE)
+    if match:
+        schema, name = split_name(match.group(3))
+        if name in tables:
+            index_name = unquote(match.group(2)) if match.group(2) else None
+            if index_name and any(i["name"] == index_name for i in tables[name]["indexes"]):
+                return
+            columns_text = match.group(4)
+            depth = 0
+            for pos, ch in enumerate(columns_text):
+                depth += (ch == "(") - (ch == ")")
+                if depth == 0:
+                    columns_text = columns_text[:pos + 1]
+                    break
+            tables[name]["indexes"].append({
+                "name": index_name,
+                "columns": parse_column_list(columns_text),
+                "unique": bool(match.group(1)),
+                "source": source
+            })
+        return
+
+    match = re.match(rf"DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?({QUALIFIED})", text, re.IGNORECASE)
+    if match:
+        if merge:
+            return
+        _, index_name = split_name(match.group(1))
+        for table in tables.values():
+            table["indexes"] = [i for i in table["indexes"] if i["name"] != index_name]
+        return
+
+    match = re.match(rf"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?({QUALIFIED})\s+(.*)$", text, re.IGNORECASE | re.DOTALL)
+    if match:
+        schema, name = split_name(match.group(1))
+        table = tables.get(name)
+        if schema != "public" or table is None:
+            return
+        for action in split_top_level(match.group(2)):
+            add = re.match(r"ADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(.*)$", action, re.IGNORECASE | re.DOTALL)
+            drop = re.match(rf"DROP\s+(?:COLUMN\s+)?(?:IF\s+EXISTS\s+)?({IDENT})", action, re.IGNORECASE)
+            if add:
+                definition = add.group(1)
+                if definition.split(None, 1)[0].upper() in TABLE_CONSTRAINT_WORDS:
+                    add_table_constraint(table, definition, source)
+                else:
+                    column = parse_column(definition)
+                    if column and column["name"] not in table["columns"]:
+                        add_column(table, column, source)
+            elif drop and drop.group(1).upper() != "CONSTRAINT" and not merge:
+                column_name = unquote(drop.group(1))
+                table["columns"].pop(column_name, None)
+                table["foreign_keys"] = [fk for fk in table["foreign_keys"] if column_name not in fk["columns"]]
+                table["indexes"] = [i for i in table["indexes"] if column_name not in i["columns"]]
+
+def sql_from_python(path):
+    """Extrair o SQL embutido em strings de um script Python"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    chunks = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if re.search(r"\b(CREATE|ALTER|DROP)\s+(TABLE|INDEX|UNIQUE)", node.value, re.IGNORECASE):
+                chunks.append((node.lineno, node.value))
+
+    return "\n;\n".join(text for _, text in sorted(chunks))
+
+def expand_sources(sources):
+    """Expandir diretórios e globs mantendo a ordem dos arquivos"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, "*.sql"))))
+        elif any(ch in source for ch in "*?["):
+            paths.extend(sorted(glob.glob(source)))
+        elif os.path.exists(source):
+            paths.append(source)
+    return paths
+
+def load_schema(sources=None, merge=False):
+    """Montar o schema final aplicando todas as fontes em ordem"""
+    tables = {}
+
+    for path in expand_sources(sources or DEFAULT_SOURCES):
+        if path.endswith(".py"):
+            sql = sql_from_python(path)
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                sql = f.read()
+
+        source = os.path.relpath(path, ROOT_DIR)
+        for statement in split_statements(sql):
+            apply_statement(tables, statement, source, merge)
+
+    return tables
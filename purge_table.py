@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Exclusão em lotes por faixa de chave primária
+VBSolution - Sistema CRM Completo
+
+Um DELETE sem filtro numa tabela grande é uma transação longa segurando locks e
+disparando cascatas (e o PostgREST recusa). Aqui cada lote apaga as próximas N
+linhas em ordem de PK pela RPC purge_batch (migração 20251019_purge_batch_rpc.sql),
+com tempo limite por lote. O tamanho do lote se ajusta ao tempo de cada chamada,
+o ritmo cai quando a taxa de erro sobe ou as réplicas atrasam (purge_replication_lag),
+e o progresso vai para o diário de checkpoints, então dá para interromper e retomar.
+
+Sem a RPC, os lotes são feitos pela API: GET das próximas PKs + DELETE id=in.(...).
+
+Antes do primeiro lote, as FKs ON DELETE CASCADE que apontam para a tabela (e as
+cascatas delas) são listadas pela RPC purge_cascades, ou pelas migrações do repositório
+sem ela. Se houver alguma, a exclusão é recusada sem --cascata: apagar os pais apagaria
+junto as linhas filhas, que nem aparecem na contagem.
+
+Execute: python purge_table.py whatsapp_atendimentos --confirmar [--dono <uuid>] [--lote 1000] [--cascata]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import deque
+
+import requests
+
+from instrumentation import log, http, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+from rest_bulk import bulk_delete, parse_count
+from schema_cache import schema_from_migrations, delete_cascades
+from migration_journal import MigrationJournal
+
+DEFAULT_BATCH_SIZE = 1000
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 20000
+DEFAULT_TIMEOUT_MS = 5000
+DEFAULT_MAX_LAG = 10.0
+DEFAULT_MAX_ERROR_RATE = 0.2
+ERROR_WINDOW = 20
+LAG_CHECK_EVERY = 10
+JOURNAL_PATH = os.getenv("PURGE_JOURNAL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "purge.journal.sqlite3"))
+
+class PurgeError(RuntimeError):
+    pass
+
+class PurgeRefused(PurgeError):
+    """Exclusão recusada antes do primeiro lote (rodar de novo não resolve)"""
+
+def count_rows(table, owner_id=None, headers=None):
+    """Total de linhas a apagar (Prefer: count=exact sem trazer linhas)"""
+    params = [("select", "id"), ("limit", "0")] + ([("owner_id", f"eq.{owner_id}")] if owner_id else [])
+    response = http("GET", rest_url(table), params=params,
+                    headers={**(headers or rest_headers()), "Prefer": "count=exact"})
+    if response.status_code not in (200, 206):
+        raise PurgeError(f"Erro ao contar {table}: {response.status_code} - {response.text}")
+    return parse_count(response)
+
+def replication_lag(headers=None):
+    """Atraso das réplicas em segundos; None se a RPC não existe ou não há réplicas"""
+    response = http("POST", rest_url("rpc/purge_replication_lag"), json={}, headers=headers or rest_headers(),
+                    idempotent=True)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def cascading_references(table, headers=None):
+    """FKs ON DELETE CASCADE disparadas ao apagar `table`: [{"table", "columns", "ref_table"}]
+
+    Pela RPC purge_cascades (catálogo do banco); sem ela, pelas migrações do repositório.
+    """
+    response = http("POST", rest_url("rpc/purge_cascades"), json={"p_table": table},
+                    headers=headers or rest_headers(), idempotent=True)
+    if response.status_code == 404:
+        log("⚠️ RPC purge_cascades indisponível; FKs em cascata conferidas nas migrações do repositório", "WARNING")
+        return [{key: fk[key] for key in ("table", "columns", "ref_table")}
+                for fk in delete_cascades(schema_from_migrations(merge=True), table)]
+    if response.status_code != 200:
+        raise PurgeError(f"Erro ao listar as FKs em cascata de {table}: {response.status_code} - {response.text}")
+    return response.json()
+
+def describe_cascades(cascades):
+    return ", ".join(f"{fk['table']}.{'/'.join(fk['columns'])} → {fk['ref_table']}" for fk in cascades)
+
+def rpc_batch(table, after, batch_size, timeout_ms, owner_id, headers, cascade=False):
+    """Um lote pela RPC; None se a RPC não existe"""
+    response = http("POST", rest_url("rpc/purge_batch"), retries=0, timeout=timeout_ms / 1000 + 30,
+                    json={"p_table": table, "p_after_id": after, "p_batch_size": batch_size,
+                          "p_timeout_ms": timeout_ms, "p_owner_id": owner_id, "p_allow_cascade": cascade},
+                    headers=headers)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise PurgeError(f"{response.status_code} - {response.text}")
+    result = response.json()
+    return result["deleted"], result["last_id"]
+
+def rest_batch(table, after, batch_size, timeout_ms, owner_id, headers, cascade=False):
+    """Um lote pela API: as próximas PKs em ordem e um DELETE id=in.(...)"""
+    params = [("select", "id"), ("order", "id.asc"), ("limit", str(batch_size))]
+    if after is not None:
+        params.append(("id", f"gt.{after}"))
+    if owner_id:
+        params.append(("owner_id", f"eq.{owner_id}"))
+    response = http("GET", rest_url(table), params=params, headers=headers, timeout=timeout_ms / 1000)
+    if response.status_code != 200:
+        raise PurgeError(f"{response.status_code} - {response.text}")
+    ids = [row["id"] for row in response.json()]
+    if not ids:
+        return 0, None
+
+    deleted = 0
+    for result in bulk_delete(table, "id", ids, headers=headers):
+        if not result["ok"]:
+            raise PurgeError(f"{result['status']} - {result['error']}")
+        deleted += result["rows"] if result["rows"] is not None else result["values"]
+    return deleted, ids[-1]
+
+def purge(table, journal=None, owner_id=None, batch_size=DEFAULT_BATCH_SIZE, timeout_ms=DEFAULT_TIMEOUT_MS,
+          max_lag=DEFAULT_MAX_LAG, max_error_rate=DEFAULT_MAX_ERROR_RATE, pause=1.0, headers=None, cascade=False):
+    """Apagar as linhas de `table` (de um dono, se informado) em lotes por PK; devolve o resumo
+
+    Com FKs ON DELETE CASCADE apontando para a tabela, levanta PurgeRefused a menos que
+    cascade=True.
+    """
+    headers = headers or rest_headers()
+    phase = f"purge:{table}" + (f":{owner_id}" if owner_id else "")
+    summary = {"table": table, "deleted": 0, "batches": 0, "errors": 0, "lag_waits": 0, "via": "rpc"}
+    if journal is not None and journal.is_complete(phase):
+        log(f"⏭️ {table} já foi apagada neste diário")
+        return summary
+
+    cascades = cascading_references(table, headers)
+    if cascades and not cascade:
+        raise PurgeRefused(f"Apagar {table} apaga em cascata: {describe_cascades(cascades)}; "
+                           f"use --cascata para confirmar")
+    if cascades:
+        log(f"⚠️ Apagando {table} em cascata: {describe_cascades(cascades)}", "WARNING")
+
+    after = journal.resume_key(phase) if journal is not None else None
+    if after is not None:
+        log(f"↩️ Retomando depois de {after}")
+    total = count_rows(table, owner_id, headers)
+    log(f"📋 {total if total is not None else '?'} linhas a apagar em {table}")
+
+    run_batch = rpc_batch
+    target = timeout_ms / 4000  # segundos por lote que consideramos confortáveis
+    recent = deque(maxlen=ERROR_WINDOW)
+    started = time.perf_counter()
+    while True:
+        if max_lag and summary["batches"] % LAG_CHECK_EVERY == 0:
+            lag = replication_lag(headers)
+            while lag is not None and lag > max_lag:
+                summary["lag_waits"] += 1
+                log(f"⏸️ Réplicas {lag:.1f}s atrás (limite {max_lag}s); aguardando", "WARNING")
+                time.sleep(max(pause, lag - max_lag))
+                lag = replication_lag(headers)
+
+        batch_started = time.perf_counter()
+        try:
+            result = run_batch(table, after, batch_size, timeout_ms, owner_id, headers, cascade)
+            if result is None:
+                log("⚠️ RPC purge_batch indisponível; apagando pela API (GET das PKs + DELETE in)", "WARNING")
+                run_batch, summary["via"] = rest_batch, "rest"
+                continue
+        except (PurgeError, requests.RequestException) as exc:
+            recent.append(False)
+            summary["errors"] += 1
+            batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+            error_rate = recent.count(False) / len(recent)
+            log(f"❌ Lote depois de {after} falhou ({exc}); lote reduzido para {batch_size}", "ERROR")
+            if len(recent) >= 5 and error_rate > max_error_rate:
+                if recent.count(False) == len(recent):
+                    raise PurgeError(f"Todos os últimos {len(recent)} lotes falharam; parando") from exc
+                log(f"⏸️ Taxa de erro {error_rate:.0%} acima de {max_error_rate:.0%}; pausando", "WARNING")
+                time.sleep(pause * 5)
+            else:
+                time.sleep(pause)
+            continue
+
+        deleted, last = result
+        if not deleted:
+            break
+
+        elapsed = time.perf_counter() - batch_started
+        recent.append(True)
+        if journal is not None:
+            journal.commit_chunk(phase, after, last, deleted)
+        after = last
+        summary["deleted"] += deleted
+        summary["batches"] += 1
+
+        # Lote rápido cresce, lote lento encolhe (mantendo cada transação curta)
+        if elapsed < target / 2:
+            batch_size = min(MAX_BATCH_SIZE, int(batch_size * 1.5))
+        elif elapsed > target:
+            batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+
+        rate = summary["deleted"] / max(time.perf_counter() - started, 1e-9)
+        if total:
+            remaining = max(total - summary["deleted"], 0)
+            log(f"🗑️ {summary['deleted']:,}/{total:,} ({summary['deleted'] / total:.0%}) "
+                f"{rate:,.0f} linhas/s, faltam ~{remaining / rate if rate else 0:.0f}s, lote {batch_size}")
+        else:
+            log(f"🗑️ {summary['deleted']:,} linhas, {rate:,.0f} linhas/s, lote {batch_size}")
+
+    if journal is not None:
+        journal.complete_phase(phase)
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Apagar uma tabela em lotes por chave primária")
+    parser.add_argument("table")
+    parser.add_argument("--confirmar", action="store_true", help="Obrigatório: confirma a exclusão")
+    parser.add_argument("--dono", default=None, help="Apagar só as linhas deste owner_id")
+    parser.add_argument("--lote", type=int, default=DEFAULT_BATCH_SIZE, help="Tamanho inicial do lote")
+    parser.add_argument("--timeout-ms", type=int, default=DEFAULT_TIMEOUT_MS,
+                        help="Tempo limite por lote (statement_timeout e lock_timeout)")
+    parser.add_argument("--max-lag", type=float, default=DEFAULT_MAX_LAG, help="Atraso máximo das réplicas (s); 0 desliga")
+    parser.add_argument("--max-erros", type=float, default=DEFAULT_MAX_ERROR_RATE, help="Taxa de erro que faz pausar")
+    parser.add_argument("--cascata", action="store_true", help="Permitir que FKs ON DELETE CASCADE apaguem as tabelas filhas")
+    parser.add_argument("--journal", default=JOURNAL_PATH)
+    args = parser.parse_args()
+
+    if not args.confirmar:
+        log("❌ Use --confirmar para apagar as linhas", "ERROR")
+        return False
+
+    journal = MigrationJournal(args.journal, "purge")
+    try:
+        summary = purge(args.table, journal, args.dono, args.lote, args.timeout_ms, args.max_lag, args.max_erros,
+                        cascade=args.cascata)
+    except PurgeRefused as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+    except PurgeError as exc:
+        log(f"❌ {exc}; rode de novo para retomar", "ERROR")
+        return False
+    finally:
+        journal.close()
+
+    log(f"✅ {summary['deleted']:,} linhas apagadas em {summary['batches']} lotes via {summary['via']} "
+        f"({summary['errors']} erros, {summary['lag_waits']} pausas por réplica)")
+    return True
+
+# ------------------------------------------------------- stand-in (SQLite)
+
+def register_standin_rpcs(standin):
+    """Implementar purge_batch e purge_cascades no local_standin (PK "id"; sem réplicas, purge_replication_lag fica de fora)"""
+    from local_standin import StandInError
+
+    def list_cascades(standin, params, headers):
+        standin.table(params["p_table"])
+        return [{key: fk[key] for key in ("table", "columns", "ref_table")}
+                for fk in delete_cascades(standin.tables, params["p_table"])]
+
+    def batch(standin, params, headers):
+        table, after = params["p_table"], params.get("p_after_id")
+        owner_id, size = params.get("p_owner_id"), int(params.get("p_batch_size", DEFAULT_BATCH_SIZE))
+        standin.table(table)
+        if standin.cascades.get(table) and not params.get("p_allow_cascade"):
+            children = ", ".join(f"{child}.{column}" for child, column, _ in standin.cascades[table])
+            raise StandInError(400, "P0001", f"Apagar {table} dispara ON DELETE CASCADE em {children}; "
+                                             f"confirme com p_allow_cascade")
+        where, values = "(? IS NULL OR id > ?)", [after, after]
+        if owner_id is not None:
+            standin.check_column(table, "owner_id")
+            where, values = where + " AND owner_id = ?", values + [owner_id]
+        with standin.lock:
+            conn = standin.conn
+            conn.execute("BEGIN")
+            try:
+                ids = [row[0] for row in conn.execute(
+                    f'SELECT id FROM "{table}" WHERE {where} ORDER BY id LIMIT ?', values + [size]
+                )]
+                if ids:
+                    chosen = f" WHERE id IN ({', '.join('?' * len(ids))})"
+                    standin.delete_cascades(table, chosen, ids)
+                    conn.execute(f'DELETE FROM "{table}"{chosen}', ids)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return {"deleted": len(ids), "last_id": ids[-1] if ids else None}
+
+    standin.register_rpc("purge_batch", batch)
+    standin.register_rpc("purge_cascades", list_cascades)
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
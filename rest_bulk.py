@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Escritas em lote na API REST do Supabase
+VBSolution - Sistema CRM Completo
+
+bulk_patch aplica o mesmo PATCH a muitas linhas com um filtro `coluna=in.(...)`,
+dividindo os valores em lotes que cabem no limite de URL do gateway. Cada lote é
+uma requisição e devolve quantas linhas foram alteradas (Prefer: count=exact);
+bulk_delete faz o mesmo para exclusões.
+
+bulk_insert envia as linhas como arrays JSON com Prefer: return=minimal (sem eco
+das linhas) e, com on_conflict, resolution=merge-duplicates para que repetir a carga
+seja idempotente. Os lotes são montados por tamanho em bytes e encolhem sozinhos
+quando o servidor recusa o corpo (413) ou estoura o tempo.
+"""
+
+import json
+from urllib.parse import quote_plus
+
+from instrumentation import http
+from supabase_rest import rest_url, rest_headers
+from rest_pagination import filter_literal
+
+# Limite prático de URL (o gateway do Supabase recusa bem acima disso; deixamos folga)
+MAX_URL_LENGTH = 8000
+
+# Corpo de cada POST em lote; o PostgREST aceita bem mais, mas lotes menores seguram menos locks
+MAX_PAYLOAD_BYTES = 1_000_000
+MIN_PAYLOAD_BYTES = 16_000
+SHRINK_STATUSES = {413, 500, 502, 503, 504}
+# Falhas do gateway: o lote pode ter sido gravado antes da resposta se perder (reenviar só com upsert)
+AMBIGUOUS_STATUSES = {502, 503, 504}
+
+def parse_count(response):
+    """Total do Content-Range ('0-9/120' ou '*/120'); None se o servidor não contou"""
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+def chunk_in_values(values, base_length, max_length=MAX_URL_LENGTH):
+    """Dividir os valores em lotes cujo `in.(...)` codificado cabe junto com o resto da URL"""
+    budget = max_length - base_length - len(quote_plus("in.()"))
+    if budget <= 0:
+        raise ValueError("A URL base já passa do limite; reduza os filtros fixos")
+
+    chunk = []
+    size = 0
+    for value in values:
+        encoded = len(quote_plus(filter_literal(value))) + (len(quote_plus(",")) if chunk else 0)
+        if chunk and size + encoded > budget:
+            yield chunk
+            chunk = []
+            encoded = len(quote_plus(filter_literal(value)))
+            size = 0
+        chunk.append(value)
+        size += encoded
+    if chunk:
+        yield chunk
+
+def bulk_filtered(method, table, column, values, payload=None, filters=None, headers=None, session=None,
+                  max_length=MAX_URL_LENGTH):
+    """PATCH/DELETE em todas as linhas com `column` em `values`, em lotes que cabem na URL"""
+    url = rest_url(table)
+    headers = {**(headers or rest_headers()), "Prefer": "return=minimal, count=exact"}
+    filters = list(filters.items() if isinstance(filters, dict) else filters or [])
+
+    base_length = len(url) + 1 + sum(len(quote_plus(k)) + len(quote_plus(v)) + 2 for k, v in filters) + len(column) + 1
+    results = []
+    for chunk in chunk_in_values(list(values), base_length, max_length):
+        in_filter = "in.(" + ",".join(filter_literal(v) for v in chunk) + ")"
+        response = http(method, url, params=filters + [(column, in_filter)], json=payload,
+                        headers=headers, session=session)
+        results.append({
+            "values": len(chunk),
+            "rows": parse_count(response),
+            "status": response.status_code,
+            "ok": response.status_code in (200, 204),
+            "error": None if response.status_code in (200, 204) else response.text,
+        })
+    return results
+
+def bulk_patch(table, column, values, payload, filters=None, headers=None, session=None, max_length=MAX_URL_LENGTH):
+    """PATCH `payload` em todas as linhas com `column` em `values`; devolve o resultado de cada lote"""
+    return bulk_filtered("PATCH", table, column, values, payload, filters, headers, session, max_length)
+
+def bulk_delete(table, column, values, filters=None, headers=None, session=None, max_length=MAX_URL_LENGTH):
+    """DELETE das linhas com `column` em `values`; devolve o resultado de cada lote"""
+    return bulk_filtered("DELETE", table, column, values, None, filters, headers, session, max_length)
+
+def payload_chunks(encoded_rows, max_bytes):
+    """Agrupar linhas já serializadas em lotes de até max_bytes (uma linha maior vai sozinha)"""
+    chunk = []
+    size = 2
+    for encoded in encoded_rows:
+        if chunk and size + len(encoded) + 1 > max_bytes:
+            yield chunk
+            chunk = []
+            size = 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield chunk
+
+def bulk_insert(table, rows, on_conflict=None, resolution="merge-duplicates", headers=None, session=None,
+                max_bytes=MAX_PAYLOAD_BYTES, missing_default=False):
+    """Inserir (ou fazer upsert de) muitas linhas em POSTs de array; devolve o resultado de cada lote
+
+    Com missing_default, colunas ausentes numa linha recebem o DEFAULT da tabela em vez de NULL.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    prefer = ["return=minimal"] + (["missing=default"] if missing_default else [])
+    params = [("columns", ",".join(columns))]
+    if on_conflict:
+        prefer.append(f"resolution={resolution}")
+        params.append(("on_conflict", on_conflict if isinstance(on_conflict, str) else ",".join(on_conflict)))
+
+    url = rest_url(table)
+    headers = {**(headers or rest_headers()), "Prefer": ", ".join(prefer), "Content-Type": "application/json"}
+    encoded_rows = [json.dumps(row, ensure_ascii=False, default=str).encode("utf-8") for row in rows]
+
+    results = []
+    pending = list(payload_chunks(encoded_rows, max_bytes))
+    while pending:
+        chunk = pending.pop(0)
+        body = b"[" + b",".join(chunk) + b"]"
+        response = http("POST", url, params=params, data=body, headers=headers, session=session)
+
+        resend = on_conflict or response.status_code not in AMBIGUOUS_STATUSES
+        if response.status_code in SHRINK_STATUSES and resend and len(chunk) > 1 and max_bytes > MIN_PAYLOAD_BYTES:
+            # Corpo grande demais ou lento demais: metade do tamanho para este e os próximos lotes
+            max_bytes = max(MIN_PAYLOAD_BYTES, max_bytes // 2)
+            pending = list(payload_chunks(chunk + [row for part in pending for row in part], max_bytes))
+            continue
+
+        ok = response.status_code in (200, 201, 204)
+        results.append({
+            "rows": len(chunk),
+            "bytes": len(body),
+            "status": response.status_code,
+            "ok": ok,
+            "error": None if ok else response.text,
+        })
+    return results
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Leitura paginada por keyset da API REST do Supabase
+VBSolution - Sistema CRM Completo
+
+Um GET sem limite é cortado em silêncio no max-rows do PostgREST e, abaixo disso,
+traz a tabela inteira para a memória. Aqui cada página pede as linhas depois da
+última chave vista (ordem por id ou por (timestamp, id)), a próxima página é
+buscada enquanto a atual é processada, e a leitura só termina numa página vazia:
+se o servidor devolver menos linhas que o pedido, a próxima página continua dali.
+
+Uso:   for mensagem in iter_rows("whatsapp_mensagens", select="id,atendimento_id"):
+           ...
+       for row in iter_rows("whatsapp_mensagens", order=("timestamp", "id"), row_class=Mensagem):
+           ...
+
+merge_join percorre dois fluxos ordenados pela mesma chave em paralelo (junção por
+intercalação), sem montar dict nem set de nenhum dos lados.
+"""
+
+import json
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import http
+from supabase_rest import rest_url, rest_headers
+
+DEFAULT_PAGE_SIZE = 1000
+
+def filter_literal(value):
+    """Valor num filtro or/and: aspas duplas quando há caracteres reservados"""
+    text = "true" if value is True else "false" if value is False else str(value)
+    if any(ch in text for ch in ',.:()" \\'):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+def keyset_condition(order, last):
+    """Condição 'depois de last' para a ordem (col1, ..., id) ascendente com NULLS LAST"""
+    if len(order) == 1:
+        return f"{order[0]}.gt.{filter_literal(last[0])}"
+
+    column, rest = order[0], order[1:]
+    after_rest = keyset_condition(rest, last[1:])
+    if last[0] is None:
+        # Já no bloco de nulos (que vem por último): só avança nas colunas seguintes
+        return f"and({column}.is.null,{after_rest})"
+
+    value = filter_literal(last[0])
+    return f"or({column}.gt.{value},and({column}.eq.{value},{after_rest}),{column}.is.null)"
+
+def keyset_params(select, order, filters, page_size, last):
+    params = [("select", select), ("order", ",".join(f"{c}.asc.nullslast" for c in order)), ("limit", str(page_size))]
+    params.extend(filters)
+    if last is not None:
+        params.append(("and", f"({keyset_condition(order, last)})"))
+    return params
+
+def keyset_pages(table, select="*", order=("id",), filters=None, page_size=DEFAULT_PAGE_SIZE,
+                 row_class=None, headers=None, prefetch=True, session=None, after=None):
+    """Gerar as linhas página a página (listas), em ordem de keyset; `after` retoma depois de uma chave"""
+    order = tuple(order)
+    if after is not None and not isinstance(after, (tuple, list)):
+        after = (after,)
+    if after is not None and len(after) != len(order):
+        raise ValueError("A chave de retomada precisa ter um valor por coluna da ordem")
+    if row_class is not None:
+        select = row_class.SELECT
+        missing = [c for c in order if c not in row_class.COLUMNS]
+        if missing:
+            raise ValueError(f"As colunas da ordem precisam estar em {row_class.__name__}: {', '.join(missing)}")
+    elif select != "*":
+        missing = [c for c in order if c not in select.split(",")]
+        if missing:
+            select = ",".join([select] + missing)
+
+    filters = list(filters.items() if isinstance(filters, dict) else filters or [])
+    url = rest_url(table)
+    headers = headers or rest_headers()
+
+    def fetch(last):
+        response = http("GET", url, params=keyset_params(select, order, filters, page_size, last),
+                        headers=headers, session=session)
+        if response.status_code != 200:
+            raise RuntimeError(f"Erro ao ler {table}: {response.status_code} - {response.text}")
+        return row_class.decode(response.content) if row_class is not None else json.loads(response.content)
+
+    def last_key(page):
+        row = page[-1]
+        return tuple(row.get(c) for c in order)
+
+    if not prefetch:
+        page = fetch(after)
+        while page:
+            last = last_key(page)
+            yield page
+            page = fetch(last)
+        return
+
+    # A chave da próxima página é conhecida assim que a atual chega: busca em paralelo ao processamento
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(fetch, after)
+        while True:
+            page = pending.result()
+            if not page:
+                return
+            pending = executor.submit(fetch, last_key(page))
+            yield page
+
+def iter_rows(table, **kwargs):
+    """Gerar as linhas uma a uma (mesmos parâmetros de keyset_pages)"""
+    for page in keyset_pages(table, **kwargs):
+        yield from page
+
+def merge_join(left, right, left_key, right_key):
+    """Junção por intercalação de dois fluxos em ordem crescente da chave (nulos no fim do lado direito)
+
+    Gera (linha_esquerda, grupo) onde grupo itera as linhas da direita com a mesma chave
+    (vazio se não houver). Consuma o grupo antes de avançar: nada é acumulado em memória.
+    Linhas da direita sem par na esquerda são descartadas.
+    """
+    groups = groupby(right, key=right_key)
+    current = next(groups, None)
+    for row in left:
+        key = left_key(row)
+        while current is not None and current[0] is not None and current[0] < key:
+            current = next(groups, None)
+        if current is not None and current[0] == key:
+            yield row, current[1]
+            current = next(groups, None)
+        else:
+            yield row, iter(())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do isolamento entre empresas (RLS) com muitos usuários simultâneos
+VBSolution - Sistema CRM Completo
+
+test_after_cleanup.check_user_isolation e check_rls_status só conferem que a chave
+anon não vê nada. Aqui N usuários sintéticos de M empresas (os tenants do
+generate_synthetic_dataset) recebem JWTs assinados localmente e disparam, em
+paralelo, uma mistura de leituras e escritas em activities, leads, companies e
+whatsapp_mensagens:
+
+- leitura da página (ordenada, limit 50): toda linha devolvida tem que ser da empresa
+  (company_id) ou de um usuário (owner_id) do próprio tenant;
+- leitura dirigida a outra empresa (company_id=eq.<outra>): tem que voltar vazia;
+- escrita na própria empresa: tem que passar;
+- escrita em nome de outra empresa: tem que ser recusada (401/403).
+
+Qualquer linha de outro tenant ou escrita cruzada aceita é vazamento e o script sai
+com erro. A rodada se repete com cada quantidade de tenants (--tenants 1 2 4 8) e
+termina com a mesma leitura pela service_role com o filtro explícito, para medir o
+custo do RLS.
+
+Alvo padrão: local_standin com --jwt-secret (tenant_policy) e latência injetada. Com
+--live, o projeto em SUPABASE_URL, com os dados carregados antes por
+generate_synthetic_dataset.py --target postgres (mesma --seed e --scale) e o segredo
+JWT do projeto em SUPABASE_JWT_SECRET (Settings → API).
+
+Execute: python rls_load_test.py [--tenants 1 2 4 8] [--users 32] [--duration 10] [--concurrency 16]
+"""
+
+import os
+import sys
+import time
+import random
+import secrets
+import argparse
+import threading
+from datetime import datetime, timezone
+
+import supabase_rest
+from instrumentation import log, http, percentile, print_summary_at_exit
+from local_standin import sign_jwt
+from schema_cache import schema_from_openapi
+from supabase_rest import rest_url
+from generate_synthetic_dataset import build_plan, generate, StandInLoader, BASE_COUNTS
+
+MARKER = "rls-load-test"
+TABLES = ["activities", "leads", "companies", "whatsapp_mensagens"]
+SEED_TABLES = ["companies", "profiles", "leads", "activities", "whatsapp_mensagens"]
+
+# Leitura de cada tabela como nas páginas (colunas mínimas para conferir o dono)
+READ_QUERIES = {
+    "activities": {"select": "id,owner_id,company_id", "order": "created_at.desc", "limit": "50"},
+    "leads": {"select": "id,owner_id,company_id", "order": "created_at.desc", "limit": "50"},
+    "companies": {"select": "id,owner_id", "limit": "50"},
+    "whatsapp_mensagens": {"select": "id,owner_id,company_id", "order": "timestamp.desc", "limit": "50"},
+}
+WRITABLE = ["activities", "leads", "whatsapp_mensagens"]
+
+# Peso de cada operação na mistura
+OP_MIX = {"read": 60, "foreign_read": 15, "write": 20, "foreign_write": 5}
+
+TOKEN_TTL = 3600
+
+# operation() sem requisição (operação estrangeira sem outra empresa ou sem a coluna): fica fora da medição
+SKIPPED = object()
+
+def mint_token(secret, user_id=None, role="authenticated"):
+    claims = {"role": role, "iss": "supabase", "iat": int(time.time()), "exp": int(time.time()) + TOKEN_TTL}
+    if user_id:
+        claims.update({"sub": user_id, "aud": "authenticated"})
+    return sign_jwt(claims, secret)
+
+def auth_headers(token, prefer=None):
+    headers = {"apikey": token, "Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    if prefer:
+        headers["Prefer"] = prefer
+    return headers
+
+def pick_users(tenants, count):
+    """count usuários distribuídos em rodízio pelos tenants → [(user_id, tenant)]"""
+    users, seen = [], set()
+    for position in range(count * 4):
+        tenant = tenants[position % len(tenants)]
+        user_id = tenant["users"][(position // len(tenants)) % len(tenant["users"])]
+        if user_id not in seen:
+            seen.add(user_id)
+            users.append((user_id, tenant))
+        if len(users) == count:
+            break
+    return users
+
+def owns(row, table, tenant):
+    """A linha é do tenant (pela empresa ou por um usuário dele)?"""
+    company_column = "id" if table == "companies" else "company_id"
+    if row.get(company_column) is not None:
+        return row[company_column] == tenant["company_id"]
+    return row.get("owner_id") in tenant["user_set"]
+
+def write_payload(table, user_id, tenant, columns):
+    now = datetime.now(timezone.utc).isoformat()
+    row = {"owner_id": user_id if tenant.get("self") else tenant["owner_id"], "company_id": tenant["company_id"],
+           "created_by": user_id}
+    if table == "activities":
+        row.update({"title": MARKER, "type": "task", "status": "pending", "priority": "medium"})
+    elif table == "leads":
+        row.update({"name": MARKER, "status": "new"})
+    else:
+        row.update({"chat_id": f"{MARKER}@s.whatsapp.net", "conteudo": MARKER, "message_type": "text",
+                    "remetente": "ATENDENTE", "status": "sent", "lida": False, "timestamp": now})
+    return {c: v for c, v in row.items() if c in columns}
+
+class LoadRun:
+    """Uma rodada: usuários, mistura de operações, latências e vazamentos"""
+
+    def __init__(self, users, all_tenants, schema, secret, duration, concurrency, seed):
+        self.users = [(user_id, tenant, auth_headers(mint_token(secret, user_id))) for user_id, tenant in users]
+        self.all_tenants = all_tenants
+        self.schema = schema
+        self.duration = duration
+        self.concurrency = concurrency
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.latencies = {op: [] for op in OP_MIX}
+        self.errors = []
+        self.leaks = []
+
+    def columns(self, table):
+        return self.schema[table]["columns"]
+
+    def query(self, table):
+        params = dict(READ_QUERIES[table])
+        columns = self.columns(table)
+        params["select"] = ",".join(c for c in params["select"].split(",") if c in columns)
+        if params.get("order", "").split(".")[0] not in columns:
+            params.pop("order", None)
+        return params
+
+    def operation(self, rng, session, op, table, user_id, tenant, headers):
+        other = rng.choice([t for t in self.all_tenants if t is not tenant] or [tenant])
+        if op in ("read", "foreign_read"):
+            params = self.query(table)
+            if op == "foreign_read":
+                company_column = "id" if table == "companies" else "company_id"
+                if company_column not in self.columns(table) or other is tenant:
+                    return SKIPPED
+                params[company_column] = f"eq.{other['company_id']}"
+            response = http("GET", rest_url(table), retries=0, session=session, params=params, headers=headers)
+            if response.status_code != 200:
+                return f"{op} {table}: {response.status_code} {response.text[:120]}"
+            foreign = [row for row in response.json() if not owns(row, table, tenant)]
+            if foreign:
+                self.record_leak(f"{table}: usuário {user_id[:8]} leu {len(foreign)} linha(s) de outra empresa "
+                                 f"(ex.: {foreign[0]})")
+            return None
+
+        if table not in WRITABLE:
+            table = rng.choice(WRITABLE)
+        target = dict(tenant, self=True) if op == "write" else other
+        if target is tenant and op == "foreign_write":
+            return SKIPPED
+        payload = write_payload(table, user_id, target, self.columns(table))
+        response = http("POST", rest_url(table), retries=0, session=session, json=payload,
+                        headers={**headers, "Prefer": "return=minimal"})
+        if op == "write" and response.status_code not in (200, 201):
+            return f"write {table}: {response.status_code} {response.text[:120]}"
+        if op == "foreign_write" and response.status_code in (200, 201):
+            self.record_leak(f"{table}: usuário {user_id[:8]} gravou em nome da empresa {other['company_id'][:8]}")
+        return None
+
+    def record_leak(self, message):
+        with self.lock:
+            self.leaks.append(message)
+
+    def worker(self, position, deadline):
+        import requests
+
+        rng = random.Random(self.seed * 1000 + position)
+        session = requests.Session()
+        ops, weights = list(OP_MIX), list(OP_MIX.values())
+        latencies = {op: [] for op in OP_MIX}
+        errors = []
+        while time.monotonic() < deadline:
+            user_id, tenant, headers = rng.choice(self.users)
+            op = rng.choices(ops, weights)[0]
+            table = rng.choice(TABLES)
+            started = time.perf_counter()
+            try:
+                error = self.operation(rng, session, op, table, user_id, tenant, headers)
+            except Exception as exc:  # conexão caiu no meio da carga: conta como erro e segue
+                error = f"{op} {table}: {type(exc).__name__}: {exc}"
+            if error is SKIPPED:
+                continue
+            latencies[op].append((time.perf_counter() - started) * 1000)
+            if error:
+                errors.append(error)
+        with self.lock:
+            for op, values in latencies.items():
+                self.latencies[op].extend(values)
+            self.errors.extend(errors)
+
+    def run(self):
+        deadline = time.monotonic() + self.duration
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self.worker, args=(position, deadline), daemon=True)
+                   for position in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = {"ops": sum(len(v) for v in self.latencies.values()), "seconds": elapsed,
+                  "errors": len(self.errors), "leaks": len(self.leaks), "sample_errors": self.errors[:3],
+                  "sample_leaks": self.leaks[:3]}
+        result["ops_per_second"] = result["ops"] / elapsed if elapsed else 0.0
+        for kind, ops in (("read", ("read", "foreign_read")), ("write", ("write", "foreign_write"))):
+            values = sorted(v for op in ops for v in self.latencies[op])
+            for q in (50, 95, 99):
+                result[f"{kind}_p{q}_ms"] = percentile(values, q)
+        return result
+
+def service_baseline(users, schema, secret, duration, concurrency):
+    """Mesmas leituras pela service_role com o filtro da empresa explícito (sem RLS)"""
+    import requests
+
+    headers = auth_headers(mint_token(secret, role="service_role"))
+    latencies, lock = [], threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(position):
+        rng = random.Random(position)
+        session = requests.Session()
+        local = []
+        while time.monotonic() < deadline:
+            _, tenant = rng.choice(users)
+            table = rng.choice(TABLES)
+            params = dict(READ_QUERIES[table])
+            columns = schema[table]["columns"]
+            params["select"] = ",".join(c for c in params["select"].split(",") if c in columns)
+            company_column = "id" if table == "companies" else "company_id"
+            if company_column in columns:
+                params[company_column] = f"eq.{tenant['company_id']}"
+            started = time.perf_counter()
+            http("GET", rest_url(table), retries=0, session=session, params=params, headers=headers)
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(position,), daemon=True) for position in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"ops": len(latencies), "ops_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "read_p50_ms": percentile(latencies, 50), "read_p95_ms": percentile(latencies, 95),
+            "read_p99_ms": percentile(latencies, 99)}
+
+def cleanup(secret):
+    """Apagar as linhas gravadas pelo teste (service_role)"""
+    headers = auth_headers(mint_token(secret, role="service_role"))
+    filters = {"activities": ("title", MARKER), "leads": ("name", MARKER),
+               "whatsapp_mensagens": ("conteudo", MARKER)}
+    for table, (column, value) in filters.items():
+        http("DELETE", rest_url(table), retries=1, params={column: f"eq.{value}"}, headers=headers)
+
+def start_standin(plan, secret, latency_ms, jitter_ms):
+    from local_standin import StandIn, start_background
+
+    standin = StandIn(latency_ms=latency_ms, jitter_ms=jitter_ms, jwt_secret=secret)
+    standin.enable_tenant_rls(TABLES + ["profiles"])
+    log(f"🧪 Semeando o stand-in com {len(plan['tenants'])} empresas...")
+    generate(plan, StandInLoader(standin), tables=SEED_TABLES)
+    return start_background(standin)
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Carga concorrente multiempresa com verificação de isolamento (RLS)")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 2, 4, 8], help="Quantidades de empresas por rodada")
+    parser.add_argument("--users", type=int, default=32, help="Usuários por rodada (em rodízio pelas empresas)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por rodada")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Escala do generate_synthetic_dataset (padrão: o mínimo para ter as empresas pedidas)")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Latência injetada no stand-in")
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="Cauda exponencial injetada no stand-in")
+    parser.add_argument("--live", action="store_true", help="Usar o projeto em SUPABASE_URL (SUPABASE_JWT_SECRET)")
+    args = parser.parse_args()
+
+    levels = sorted(set(max(1, n) for n in args.tenants))
+    scale = args.scale or levels[-1] / BASE_COUNTS["companies"]
+    plan = build_plan(args.seed, scale)
+    if len(plan["tenants"]) < levels[-1]:
+        log(f"❌ A escala {scale:g} gera só {len(plan['tenants'])} empresas; aumente --scale", "ERROR")
+        return False
+    for tenant in plan["tenants"]:
+        tenant["user_set"] = set(tenant["users"])
+
+    server = None
+    if args.live:
+        secret = os.getenv("SUPABASE_JWT_SECRET")
+        if not secret:
+            log("❌ --live precisa de SUPABASE_JWT_SECRET para assinar os tokens dos usuários", "ERROR")
+            return False
+        target = supabase_rest.SUPABASE_URL
+    else:
+        secret = secrets.token_hex(32)
+        server, url = start_standin(plan, secret, args.latency_ms, args.jitter_ms)
+        supabase_rest.SUPABASE_URL = url
+        target = f"stand-in ({args.latency_ms:g}+{args.jitter_ms:g} ms)"
+
+    results, leaks = [], []
+    try:
+        response = http("GET", rest_url(), retries=1, headers=auth_headers(mint_token(secret, role="service_role")))
+        if response.status_code != 200:
+            log(f"❌ API respondeu {response.status_code}: {response.text[:200]}", "ERROR")
+            return False
+        schema = schema_from_openapi(response.json())
+        missing = [t for t in TABLES if t not in schema]
+        if missing:
+            log(f"❌ Tabelas ausentes no alvo: {', '.join(missing)}", "ERROR")
+            return False
+
+        log(f"🔐 ISOLAMENTO SOB CARGA: {target}, {args.concurrency} simultâneas, {args.duration:g}s por rodada")
+        log("=" * 80)
+        for count in levels:
+            tenants = plan["tenants"][:count]
+            users = pick_users(tenants, args.users)
+            run = LoadRun(users, tenants, schema, secret, args.duration, max(1, args.concurrency), args.seed)
+            result = run.run()
+            result.update({"tenants": count, "users": len(users)})
+            results.append(result)
+            leaks.extend(run.leaks)
+            status = "✅" if not result["leaks"] and not result["errors"] else "❌"
+            log(f"{status} {count} empresas, {len(users)} usuários: {result['ops_per_second']:,.0f} op/s, "
+                f"leitura p95 {result['read_p95_ms']:.1f} ms, escrita p95 {result['write_p95_ms']:.1f} ms, "
+                f"{result['errors']} erros, {result['leaks']} vazamentos")
+            for message in result["sample_errors"]:
+                log(f"   ⚠️ {message}", "WARNING")
+            for message in result["sample_leaks"]:
+                log(f"   🚨 {message}", "ERROR")
+
+        baseline = service_baseline(pick_users(plan["tenants"][:levels[-1]], args.users), schema, secret,
+                                    args.duration, max(1, args.concurrency))
+    finally:
+        cleanup(secret)
+        if server is not None:
+            server.shutdown()
+
+    print("\n" + "=" * 92)
+    print("🔐 RLS SOB CARGA")
+    print("=" * 92)
+    print(f"{'empresas':>8} {'usuários':>9} {'op/s':>9} {'leit p50':>9} {'leit p95':>9} {'leit p99':>9} "
+          f"{'escr p95':>9} {'erros':>6} {'vazam':>6}")
+    for result in results:
+        print(f"{result['tenants']:>8} {result['users']:>9} {result['ops_per_second']:>9,.0f} "
+              f"{result['read_p50_ms']:>9.1f} {result['read_p95_ms']:>9.1f} {result['read_p99_ms']:>9.1f} "
+              f"{result['write_p95_ms']:>9.1f} {result['errors']:>6} {result['leaks']:>6}")
+    print(f"{'service_role (sem RLS)':<18} {baseline['ops_per_second']:>9,.0f} "
+          f"{baseline['read_p50_ms']:>9.1f} {baseline['read_p95_ms']:>9.1f} {baseline['read_p99_ms']:>9.1f}")
+    last = results[-1]
+    if baseline["read_p50_ms"]:
+        print(f"\n💡 Custo do RLS na leitura (p50, {last['tenants']} empresas): "
+              f"{last['read_p50_ms'] - baseline['read_p50_ms']:+.1f} ms ({last['read_p50_ms'] / baseline['read_p50_ms']:.2f}x)")
+
+    if leaks:
+        log(f"🚨 {len(leaks)} vazamentos entre empresas", "ERROR")
+        return False
+    errors = sum(result["errors"] for result in results)
+    if errors:
+        log(f"❌ {errors} operações legítimas falharam", "ERROR")
+        return False
+    log("✅ Nenhum vazamento entre empresas")
+    return True
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Teste interrompido pelo usuário", "WARNING")
+        sys.exit(1)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Gerador de classes de linha compactas (__slots__ ou tupla) a partir do cache de schema
+VBSolution - Sistema CRM Completo
+
+Os scripts de carga guardavam cada linha como dict completo com todas as colunas.
+Aqui geramos, por tabela, uma classe só com as colunas pedidas e um decodificador
+que converte cada objeto direto do JSON da resposta, sem montar a lista de dicts.
+
+Uso em código:   Row = load_row_class("whatsapp_mensagens", ["id", "atendimento_id"])
+                 rows = Row.decode(response.content)
+Gerar módulo:    python row_models.py whatsapp_mensagens:id,atendimento_id,status -o backend/wa_rows.py
+"""
+
+import sys
+import argparse
+import keyword
+
+from schema_cache import load_schema_cache
+from instrumentation import log, print_summary_at_exit
+
+# Conversão feita no decodificador, por tipo do Postgres (texto/uuid/datas ficam como str)
+NUMERIC_TYPES = {"integer", "int", "int4", "smallint", "bigint", "int8"}
+FLOAT_TYPES = {"numeric", "real", "double precision", "float8", "float4", "decimal"}
+
+def class_name(table):
+    """whatsapp_mensagens → WhatsappMensagensRow"""
+    return "".join(part.capitalize() for part in table.split("_")) + "Row"
+
+def attribute_name(column):
+    """Nome de atributo válido para a coluna (timestamp, from, class...)"""
+    name = column if column.isidentifier() else "".join(c if c.isalnum() else "_" for c in column)
+    return name + "_" if keyword.iskeyword(name) else name
+
+def column_coercion(column_type):
+    """Expressão de conversão para o tipo da coluna ({} é o valor)"""
+    base = (column_type or "").split("(")[0].strip().lower()
+    if base in NUMERIC_TYPES:
+        return "(None if {0} is None else int({0}))"
+    if base in FLOAT_TYPES:
+        return "(None if {0} is None else float({0}))"
+    return "{0}"
+
+def generate_source(table, columns, schema=None, kind="slots"):
+    """Gerar o código-fonte da classe de linha de uma tabela"""
+    table_schema = (schema or {}).get(table, {}).get("columns", {})
+    name = class_name(table)
+    attrs = [attribute_name(c) for c in columns]
+    types = [table_schema.get(c, {}).get("type") for c in columns]
+    values = [column_coercion(t).format(f"d.get({c!r})") for c, t in zip(columns, types)]
+    lines = [f"class {name}({'tuple' if kind == 'tuple' else 'object'}):"]
+    described = ", ".join(f"{c}: {t or '?'}" for c, t in zip(columns, types))
+    lines.append(f'    """Linha de {table} ({described})"""')
+    lines.append("")
+    lines.append(f"    TABLE = {table!r}")
+    lines.append(f"    COLUMNS = {tuple(columns)!r}")
+    lines.append(f"    SELECT = {','.join(columns)!r}")
+    lines.append("    _KEYS = frozenset(COLUMNS)")
+    lines.append(f"    _ATTRS = {dict((c, a) for c, a in zip(columns, attrs) if c != a)!r}")
+
+    if kind == "tuple":
+        lines.append("    __slots__ = ()")
+        lines.append("")
+        lines.append(f"    def __new__(cls, {', '.join(attrs)}):")
+        lines.append(f"        return tuple.__new__(cls, ({', '.join(attrs)}{',' if len(attrs) == 1 else ''}))")
+        for position, attr in enumerate(attrs):
+            lines.append(f"    {attr} = property(_itemgetter({position}))")
+    else:
+        lines.append(f"    __slots__ = {tuple(attrs)!r}")
+        lines.append("")
+        lines.append(f"    def __init__(self, {', '.join(attrs)}):")
+        for attr in attrs:
+            lines.append(f"        self.{attr} = {attr}")
+
+    lines.append("")
+    lines.append("    @classmethod")
+    lines.append("    def from_dict(cls, d):")
+    lines.append(f"        return cls({', '.join(values)})")
+    lines.append("")
+    lines.append("    @classmethod")
+    lines.append("    def _object_hook(cls, d):")
+    lines.append("        # Só os objetos com exatamente as colunas pedidas viram linha (JSONB aninhado fica dict)")
+    lines.append("        return cls.from_dict(d) if d.keys() == cls._KEYS else d")
+    lines.append("")
+    lines.append("    @classmethod")
+    lines.append("    def decode(cls, payload):")
+    lines.append('        """Decodificar a resposta JSON (lista de objetos) direto para linhas"""')
+    lines.append("        return _json.loads(payload, object_hook=cls._object_hook)")
+    lines.append("")
+    lines.append("    def to_dict(self):")
+    lines.append(f"        return {{{', '.join(f'{c!r}: self.{a}' for c, a in zip(columns, attrs))}}}")
+    lines.append("")
+    lines.append("    def get(self, column, default=None):")
+    lines.append("        # Como dict.get: default só para coluna ausente; NULL continua None")
+    lines.append("        return getattr(self, self._ATTRS.get(column, column), default)")
+    lines.append("")
+    lines.append("    def __getitem__(self, column):")
+    lines.append("        if isinstance(column, int):")
+    lines.append("            return tuple.__getitem__(self, column)" if kind == "tuple" else "            return getattr(self, self.__slots__[column])")
+    lines.append("        return getattr(self, self._ATTRS.get(column, column))")
+    lines.append("")
+    lines.append("    def __repr__(self):")
+    lines.append(f"        return {name + '('!r} + ', '.join(f'{{c}}={{self[c]!r}}' for c in self.COLUMNS) + ')'")
+
+    return "\n".join(lines) + "\n"
+
+MODULE_HEADER = '''"""
+Classes de linha geradas por row_models.py a partir do cache de schema - não editar
+"""
+
+import json as _json
+from operator import itemgetter as _itemgetter
+
+'''
+
+def generate_module(specs, schema=None, kind="slots"):
+    """Gerar um módulo com as classes de várias tabelas ({tabela: [colunas]})"""
+    parts = [MODULE_HEADER]
+    for table, columns in specs.items():
+        parts.append(generate_source(table, columns, schema, kind))
+        parts.append("\n")
+    return "".join(parts).rstrip() + "\n"
+
+_loaded = {}
+
+def load_row_class(table, columns, kind="slots", schema=None):
+    """Gerar e carregar a classe em memória (sem arquivo), reaproveitando entre chamadas"""
+    key = (table, tuple(columns), kind)
+    if key not in _loaded:
+        if schema is None:
+            schema = load_schema_cache()
+        namespace = {}
+        exec(compile(generate_module({table: list(columns)}, schema, kind), f"<row_models:{table}>", "exec"), namespace)
+        _loaded[key] = namespace[class_name(table)]
+    return _loaded[key]
+
+def parse_spec(spec):
+    """'tabela:col1,col2' → ('tabela', ['col1', 'col2'])"""
+    table, _, columns = spec.partition(":")
+    return table, [c.strip() for c in columns.split(",") if c.strip()]
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Gerar classes de linha compactas por tabela")
+    parser.add_argument("specs", nargs="+", help="tabela:col1,col2,... (sem colunas = todas do cache)")
+    parser.add_argument("--kind", choices=["slots", "tuple"], default="slots")
+    parser.add_argument("-o", "--output", default=None, help="Arquivo de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    schema = load_schema_cache(required=True)
+    specs = {}
+    for spec in args.specs:
+        table, columns = parse_spec(spec)
+        if table not in schema:
+            log(f"❌ Tabela {table} não está no cache de schema", "ERROR")
+            return False
+        unknown = [c for c in columns if c not in schema[table]["columns"]]
+        if unknown:
+            log(f"❌ Colunas inexistentes em {table}: {', '.join(unknown)}", "ERROR")
+            return False
+        specs[table] = columns or list(schema[table]["columns"])
+
+    source = generate_module(specs, schema, args.kind)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(source)
+        log(f"✅ {len(specs)} classes gravadas em {args.output}")
+    else:
+        sys.stdout.write(source)
+    return True
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Execução interrompida pelo usuário", "WARNING")
+        sys.exit(1)
+    except Exception as e:
+        log(f"\n❌ Erro inesperado: {str(e)}", "ERROR")
+        sys.exit(1)
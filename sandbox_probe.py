@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Sondas de escrita sem efeito colateral
+VBSolution - Sistema CRM Completo
+
+Para descobrir se uma escrita passaria (estrutura da tabela, NOT NULL, FKs, RLS),
+os scripts de diagnóstico gravavam uma linha de teste e apagavam em seguida: dois
+disparos de triggers, WAL em dobro e lixo quando o DELETE falhava. A RPC
+sandbox_probe (migração 20251019_sandbox_probe_rpc.sql) faz a escrita numa
+subtransação que é sempre desfeita e devolve as linhas que teriam sido gravadas
+(com defaults e triggers aplicados) ou o erro do Postgres, numa ida e volta.
+
+A RPC roda com o papel de quem chama: com a chave anon ou o JWT de um usuário
+(token=...), as políticas de RLS valem como numa escrita de verdade.
+
+Uso:   result = probe("suppliers", {"name": "Fornecedor Teste", "owner_id": user_id})
+       if result["ok"]: ... result["rows"][0]["id"] ...
+       else: ... result["error"]["code"], result["error"]["message"] ...
+
+Execute: python sandbox_probe.py suppliers '{"name": "Teste"}' [--operacao update --onde '{"id": "..."}']
+"""
+
+import sys
+import json
+import sqlite3
+import argparse
+
+from instrumentation import log, http, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+
+class ProbeUnavailable(RuntimeError):
+    pass
+
+def probe(table, row=None, operation="insert", match=None, headers=None, token=None):
+    """Simular insert/update/delete; devolve {"ok", "rows", "error"} sem gravar nada
+
+    match: igualdade por coluna ({"id": ...}) que escolhe as linhas no update e no delete.
+    """
+    response = http("POST", rest_url("rpc/sandbox_probe"), retries=0,
+                    json={"p_table": table, "p_operation": operation, "p_row": row or {}, "p_match": match},
+                    headers=headers or rest_headers(token=token))
+    body = response.json() if response.content else {}
+    if response.status_code == 404 and body.get("code") == "PGRST202":
+        raise ProbeUnavailable("RPC sandbox_probe não encontrada. Aplique supabase/migrations/20251019_sandbox_probe_rpc.sql")
+    if response.status_code != 200:
+        # Erro antes da subtransação (operação inválida, sem permissão de EXECUTE...)
+        return {"ok": False, "rows": [], "error": {"code": body.get("code") or str(response.status_code),
+                                                   "message": body.get("message") or response.text,
+                                                   "details": body.get("details"), "hint": body.get("hint")}}
+    return {"ok": body["ok"], "rows": body.get("rows") or [], "error": body.get("error")}
+
+def describe(result):
+    """Resumo de uma linha para os logs"""
+    if result["ok"]:
+        return f"passaria ({len(result['rows'])} linha(s))"
+    error = result["error"]
+    return f"recusada: {error['code']} {error['message']}" + (f" ({error['details']})" if error.get("details") else "")
+
+def main():
+    parser = argparse.ArgumentParser(description="Testar uma escrita sem gravar nada (rollback sempre)")
+    parser.add_argument("table")
+    parser.add_argument("row", nargs="?", default="{}", help="Linha em JSON")
+    parser.add_argument("--operacao", choices=["insert", "update", "delete"], default="insert")
+    parser.add_argument("--onde", default=None, help="Filtro de igualdade em JSON (update/delete)")
+    parser.add_argument("--token", default=None, help="JWT do usuário (para testar RLS)")
+    args = parser.parse_args()
+
+    try:
+        result = probe(args.table, json.loads(args.row), args.operacao,
+                       json.loads(args.onde) if args.onde else None, token=args.token)
+    except (ValueError, ProbeUnavailable) as exc:
+        log(f"❌ {exc}", "ERROR")
+        return False
+
+    log(f"{'✅' if result['ok'] else '🚫'} {args.operacao} em {args.table} {describe(result)}")
+    for row in result["rows"][:5]:
+        log(f"   {json.dumps(row, ensure_ascii=False, default=str)}")
+    return result["ok"]
+
+# ------------------------------------------------------- stand-in (SQLite)
+
+def register_standin_rpcs(standin):
+    """Implementar sandbox_probe no local_standin (sem RLS; NOT NULL conferido pelo schema)"""
+    from local_standin import quote, StandInError
+
+    def sandbox(standin, params, headers):
+        table_name, operation = params["p_table"], params.get("p_operation", "insert")
+        row, match = params.get("p_row") or {}, params.get("p_match") or {}
+        if operation not in ("insert", "update", "delete"):
+            raise StandInError(400, "P0001", "p_operation deve ser insert, update ou delete")
+        if operation != "insert" and not match:
+            raise StandInError(400, "P0001", "p_match é obrigatório em update e delete")
+
+        try:
+            table = standin.table(table_name)
+            for column in list(row) + list(match):
+                standin.check_column(table_name, column)
+        except StandInError as exc:
+            return {"ok": False, "error": exc.body}
+
+        specs = table["columns"]
+        where = " AND ".join(f"{quote(c)} IS ?" for c in match)
+        where_values = [standin.to_db(table_name, c, v) for c, v in match.items()]
+        if operation == "insert":
+            values = {c: row.get(c, standin.default_value(specs[c])) for c in specs if c in row or specs[c].get("default")}
+            missing = [c for c, spec in specs.items() if spec.get("not_null") and values.get(c) is None]
+            if missing:
+                return {"ok": False, "error": {"code": "23502", "message": f'null value in column "{missing[0]}" of '
+                                               f'relation "{table_name}" violates not-null constraint',
+                                               "details": None, "hint": None}}
+            sql = (f"INSERT INTO {quote(table_name)} ({', '.join(quote(c) for c in values)}) "
+                   f"VALUES ({', '.join('?' * len(values))}) RETURNING *")
+            sql_params = [standin.to_db(table_name, c, v) for c, v in values.items()]
+        elif operation == "update":
+            sql = (f"UPDATE {quote(table_name)} SET {', '.join(f'{quote(c)} = ?' for c in row)} "
+                   f"WHERE {where} RETURNING *")
+            sql_params = [standin.to_db(table_name, c, v) for c, v in row.items()] + where_values
+        else:
+            sql = f"DELETE FROM {quote(table_name)} WHERE {where} RETURNING *"
+            sql_params = where_values
+
+        with standin.lock:
+            standin.conn.execute("BEGIN")
+            try:
+                cursor = standin.conn.execute(sql, sql_params)
+                names = [d[0] for d in cursor.description]
+                rows = standin.rows_to_json(table_name, names, cursor.fetchall())
+            except sqlite3.IntegrityError as exc:
+                return {"ok": False, "error": {"code": "23505", "message": str(exc), "details": None, "hint": None}}
+            finally:
+                standin.conn.execute("ROLLBACK")
+        return {"ok": True, "rows": rows}
+
+    standin.register_rpc("sandbox_probe", sandbox)
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Cache local do schema das tabelas (colunas, tipos, chaves)
+VBSolution - Sistema CRM Completo
+
+O cache vem do OpenAPI que o PostgREST publica em /rest/v1/ ou, sem acesso ao
+projeto, das migrações do repositório (migration_schema.py). Os scripts de carga
+e geração de código leem schema_cache.json em vez de consultar a API toda vez.
+
+Execute: python schema_cache.py [--from-migrations]
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from instrumentation import log, http, print_summary_at_exit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.getenv("SCHEMA_CACHE_PATH", os.path.join(ROOT_DIR, "schema_cache.json"))
+
+def schema_from_openapi(spec):
+    """Converter as definitions do OpenAPI do PostgREST no formato do cache"""
+    tables = {}
+
+    for name, definition in spec.get("definitions", {}).items():
+        required = set(definition.get("required", []))
+        columns = {}
+        primary_key = []
+        foreign_keys = []
+
+        for column, prop in definition.get("properties", {}).items():
+            description = prop.get("description", "") or ""
+            columns[column] = {
+                "type": prop.get("format") or prop.get("type"),
+                "not_null": column in required,
+                "default": prop.get("default"),
+            }
+            if "<pk/>" in description:
+                primary_key.append(column)
+            fk = re.search(r"<fk table='([^']+)' column='([^']+)'/>", description)
+            if fk:
+                foreign_keys.append({"columns": [column], "ref_table": fk.group(1), "ref_columns": [fk.group(2)]})
+
+        tables[name] = {"primary_key": primary_key, "columns": columns, "foreign_keys": foreign_keys}
+
+    return tables
+
+def schema_from_migrations(sources=None, merge=False):
+    """Montar o cache a partir das migrações do repositório"""
+    from migration_schema import load_schema
+
+    tables = {}
+    for name, table in load_schema(sources, merge).items():
+        tables[name] = {
+            "primary_key": table["primary_key"],
+            "columns": {
+                column["name"]: {"type": column["type"], "not_null": column["not_null"], "default": column["default"]}
+                for column in table["columns"].values()
+            },
+            "foreign_keys": [
+                {"columns": fk["columns"], "ref_table": fk["ref_table"], "ref_columns": fk["ref_columns"],
+                 "on_delete": fk["on_delete"]}
+                for fk in table["foreign_keys"]
+            ],
+            "indexes": [index["columns"] for index in table["indexes"] if not index["unique"]],
+        }
+    return tables
+
+def delete_cascades(tables, table):
+    """FKs ON DELETE CASCADE disparadas ao apagar linhas de `table`, em cascata (em largura)
+
+    Devolve [{"table", "columns", "ref_table", "ref_columns"}]. O OpenAPI não publica a
+    ação ON DELETE; só o cache montado das migrações tem essa informação.
+    """
+    found, pending, seen = [], [table], {table}
+    while pending:
+        parent = pending.pop(0)
+        for name, spec in sorted(tables.items()):
+            for fk in spec.get("foreign_keys", []):
+                if fk["ref_table"] != parent or fk.get("on_delete") != "CASCADE":
+                    continue
+                found.append({"table": name, "columns": fk["columns"], "ref_table": parent, "ref_columns": fk["ref_columns"]})
+                if name not in seen:
+                    seen.add(name)
+                    pending.append(name)
+    return found
+
+def refresh_from_api():
+    """Baixar o OpenAPI do projeto e montar o cache"""
+    from supabase_rest import rest_url, rest_headers
+
+    response = http("GET", rest_url(), headers=rest_headers())
+    response.raise_for_status()
+    return schema_from_openapi(response.json())
+
+def save_schema_cache(tables, source, path=CACHE_PATH):
+    """Gravar o cache em disco"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": datetime.now().isoformat(), "source": source, "tables": tables}, f, indent=2, ensure_ascii=False)
+    return path
+
+def load_schema_cache(path=CACHE_PATH, required=False):
+    """Ler as tabelas do cache (vazio se ainda não foi gerado)"""
+    if not os.path.exists(path):
+        if required:
+            raise RuntimeError(f"Cache de schema não encontrado em {path}. Execute: python schema_cache.py")
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["tables"]
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Atualizar o cache local do schema")
+    parser.add_argument("--from-migrations", action="store_true", help="Usar as migrações do repositório em vez da API")
+    parser.add_argument("--output", default=CACHE_PATH)
+    args = parser.parse_args()
+
+    if args.from_migrations:
+        log("📄 Lendo schema das migrações...")
+        tables, source = schema_from_migrations(), "migrations"
+    else:
+        log("🔗 Baixando schema do PostgREST...")
+        tables, source = refresh_from_api(), "openapi"
+
+    path = save_schema_cache(tables, source, args.output)
+    log(f"✅ {len(tables)} tabelas gravadas em {path}")
+    return True
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Execução interrompida pelo usuário", "WARNING")
+        sys.exit(1)
+    except Exception as e:
+        log(f"\n❌ Erro inesperado: {str(e)}", "ERROR")
+        sys.exit(1)
@@ -0,0 +1,69 @@
+-- Impressões digitais (checksums) da migração de whatsapp_atendimentos para whatsapp_mensagens
+-- (chamada por backend/verify_migracao_atendimentos.py)
+--
+-- Cada atendimento vira um item (id, status) dos dois lados:
+--   origem:  (a.id, coalesce(a.status, '*'))
+--   destino: (a.id, status comum das mensagens do atendimento), só se houver mensagens;
+--            '*' quando o atendimento não tem status, '<misto>' quando as mensagens divergem
+-- Por balde (dono, ou chat dentro de um dono) a função devolve, para cada lado, o total,
+-- o histograma de status e a soma de um hash de 32 bits de "id:status". Baldes iguais nos
+-- dois lados estão migrados; só os diferentes precisam ser conferidos linha a linha.
+-- p_owner_is_null pede os chats dos atendimentos sem dono (p_owner_id null sozinho = por dono).
+
+drop function if exists public.atendimentos_fingerprints(uuid);
+
+create or replace function public.atendimentos_fingerprints(p_owner_id uuid default null,
+                                                             p_owner_is_null boolean default false)
+returns table (owner_id uuid, chat_id text, lado text, total bigint, por_status jsonb, hash numeric)
+language sql
+stable
+set search_path = public
+as $$
+  with mensagens as (
+    select m.atendimento_id,
+           min(m.status) as status_min,
+           max(m.status) as status_max,
+           count(*) - count(m.status) as sem_status
+    from public.whatsapp_mensagens m
+    where m.atendimento_id is not null
+      and ((p_owner_id is null and not p_owner_is_null) or m.atendimento_id in (
+        select a.id from public.whatsapp_atendimentos a where a.owner_id is not distinct from p_owner_id))
+    group by m.atendimento_id
+  ),
+  itens as (
+    select a.owner_id,
+           case when p_owner_id is null and not p_owner_is_null then null else a.chat_id end as chat_id,
+           a.id,
+           coalesce(a.status, '*') as origem,
+           case
+             when m.atendimento_id is null then null
+             when a.status is null then '*'
+             when m.status_min = m.status_max and m.sem_status = 0 then m.status_min
+             else '<misto>'
+           end as destino
+    from public.whatsapp_atendimentos a
+    left join mensagens m on m.atendimento_id = a.id
+    where (p_owner_id is null and not p_owner_is_null) or a.owner_id is not distinct from p_owner_id
+  ),
+  lados as (
+    select i.owner_id, i.chat_id, 'origem' as lado, i.origem as status,
+           ('x' || substr(md5(i.id::text || ':' || i.origem), 1, 8))::bit(32)::bigint as h
+    from itens i
+    union all
+    select i.owner_id, i.chat_id, 'destino', i.destino,
+           ('x' || substr(md5(i.id::text || ':' || i.destino), 1, 8))::bit(32)::bigint
+    from itens i
+    where i.destino is not null
+  ),
+  por_status as (
+    select l.owner_id, l.chat_id, l.lado, l.status, count(*) as n, sum(l.h) as h
+    from lados l
+    group by l.owner_id, l.chat_id, l.lado, l.status
+  )
+  select p.owner_id, p.chat_id, p.lado, sum(p.n)::bigint, jsonb_object_agg(p.status, p.n), sum(p.h)
+  from por_status p
+  group by p.owner_id, p.chat_id, p.lado;
+$$;
+
+revoke all on function public.atendimentos_fingerprints(uuid, boolean) from public, anon, authenticated;
+grant execute on function public.atendimentos_fingerprints(uuid, boolean) to service_role;
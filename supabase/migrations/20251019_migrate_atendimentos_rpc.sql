@@ -0,0 +1,105 @@
+-- Migração set-based de whatsapp_atendimentos para whatsapp_mensagens (chamada por backend/migrate_atendimentos_server.py)
+-- Cada chamada processa um lote de atendimentos de um único dono, numa transação curta:
+--   1. propaga o status do atendimento para as mensagens (UPDATE ... FROM)
+--   2. cria a mensagem sintética dos atendimentos sem mensagens (INSERT ... SELECT ... WHERE NOT EXISTS)
+-- O id da mensagem sintética é uuid_generate_v5(namespace, atendimento_id), o mesmo do migrador em Python,
+-- então os dois caminhos podem ser misturados ou repetidos sem duplicar linhas.
+
+create extension if not exists "uuid-ossp" with schema extensions;
+
+-- Donos com atendimentos a migrar
+create or replace function public.migrate_atendimentos_tenants()
+returns table (owner_id uuid, atendimentos bigint)
+language sql
+stable
+set search_path = public
+as $$
+  select a.owner_id, count(*)
+  from public.whatsapp_atendimentos a
+  group by a.owner_id
+  order by count(*) desc;
+$$;
+
+-- Um lote de atendimentos do dono, depois de p_after_id (ordem por id)
+create or replace function public.migrate_atendimentos_batch(
+  p_owner_id uuid,
+  p_after_id uuid default null,
+  p_batch_size integer default 500
+)
+returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_ids uuid[];
+  v_updated integer := 0;
+  v_inserted integer := 0;
+begin
+  if p_batch_size is null or p_batch_size < 1 or p_batch_size > 5000 then
+    raise exception 'p_batch_size deve estar entre 1 e 5000';
+  end if;
+
+  select array_agg(b.id order by b.id) into v_ids
+  from (
+    select a.id
+    from public.whatsapp_atendimentos a
+    where a.owner_id is not distinct from p_owner_id
+      and (p_after_id is null or a.id > p_after_id)
+    order by a.id
+    limit p_batch_size
+  ) b;
+
+  if v_ids is null then
+    return jsonb_build_object('atendimentos', 0, 'updated', 0, 'inserted', 0, 'last_id', null);
+  end if;
+
+  update public.whatsapp_mensagens m
+     set status = a.status
+    from public.whatsapp_atendimentos a
+   where a.id = any (v_ids)
+     and m.atendimento_id = a.id
+     and a.status is not null
+     and m.status is distinct from a.status;
+  get diagnostics v_updated = row_count;
+
+  insert into public.whatsapp_mensagens (
+    id, owner_id, atendimento_id, chat_id, message_id, conteudo, tipo, status,
+    remetente, "timestamp", lida, created_at
+  )
+  select
+    extensions.uuid_generate_v5('6f1c2a9e-3b4d-5e6f-8a7b-9c0d1e2f3a4b'::uuid, a.id::text),
+    coalesce(a.owner_id, '00000000-0000-0000-0000-000000000000'::uuid),
+    a.id,
+    a.chat_id,
+    'migracao-atendimento:' || a.id::text,
+    coalesce(a.ultima_mensagem::text, 'Mensagem de atendimento'),
+    'TEXTO',
+    a.status,
+    'ATENDENTE',
+    coalesce(a.ultima_mensagem, a.data_inicio),
+    false,
+    a.created_at
+  from public.whatsapp_atendimentos a
+  where a.id = any (v_ids)
+    and not exists (select 1 from public.whatsapp_mensagens m where m.atendimento_id = a.id)
+  on conflict (id) do nothing;
+  get diagnostics v_inserted = row_count;
+
+  return jsonb_build_object(
+    'atendimentos', cardinality(v_ids),
+    'updated', v_updated,
+    'inserted', v_inserted,
+    'last_id', v_ids[cardinality(v_ids)]
+  );
+end;
+$$;
+
+-- Só o service_role executa a migração
+revoke all on function public.migrate_atendimentos_tenants() from public, anon, authenticated;
+revoke all on function public.migrate_atendimentos_batch(uuid, uuid, integer) from public, anon, authenticated;
+grant execute on function public.migrate_atendimentos_tenants() to service_role;
+grant execute on function public.migrate_atendimentos_batch(uuid, uuid, integer) to service_role;
+
+-- Apoio às consultas por atendimento (no-op se já existir)
+create index if not exists idx_whatsapp_mensagens_atendimento_id
+  on public.whatsapp_mensagens (atendimento_id);
@@ -0,0 +1,138 @@
+-- Exclusão em faixas de chave primária (chamada por purge_table.py)
+-- Cada chamada apaga até p_batch_size linhas com PK > p_after_id, em ordem de PK, numa transação
+-- curta: nada de um DELETE único segurando locks e disparando cascatas na tabela inteira.
+-- Devolve quantas linhas saíram e a última PK, para o próximo lote.
+-- Tempo: p_timeout_ms vira statement_timeout e lock_timeout locais do lote, para um lote lento ou
+-- bloqueado desistir logo em vez de enfileirar locks; o statement_timeout da função (aplicado pelo
+-- PostgREST antes da chamada) fica como teto.
+-- O filtro por p_owner_id só entra no SQL quando informado (muitas tabelas não têm owner_id).
+-- Cascatas: se alguma FK ON DELETE CASCADE aponta para a tabela, o lote é recusado sem
+-- p_allow_cascade; purge_cascades lista antes o que seria apagado junto.
+
+drop function if exists public.purge_batch(text, text, integer, integer, uuid);
+
+create or replace function public.purge_batch(
+  p_table text,
+  p_after_id text default null,
+  p_batch_size integer default 1000,
+  p_timeout_ms integer default 5000,
+  p_owner_id uuid default null,
+  p_allow_cascade boolean default false
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+set statement_timeout = '30s'
+as $$
+declare
+  v_table regclass := format('public.%I', p_table)::regclass;
+  v_pk text;
+  v_pk_type text;
+  v_deleted integer;
+  v_last text;
+  v_owner_filter text := '';
+  v_cascades text;
+begin
+  if p_batch_size is null or p_batch_size < 1 or p_batch_size > 50000 then
+    raise exception 'p_batch_size deve estar entre 1 e 50000';
+  end if;
+
+  select a.attname, format_type(a.atttypid, a.atttypmod) into v_pk, v_pk_type
+  from pg_index i
+  join pg_attribute a on a.attrelid = i.indrelid and a.attnum = i.indkey[0]
+  where i.indrelid = v_table and i.indisprimary and i.indnkeyatts = 1;
+  if v_pk is null then
+    raise exception 'A tabela % precisa de chave primária de uma coluna', p_table;
+  end if;
+
+  if not p_allow_cascade then
+    select string_agg(format('%s.%s', c.conrelid::regclass, a.attname), ', ' order by 1) into v_cascades
+    from pg_constraint c
+    join pg_attribute a on a.attrelid = c.conrelid and a.attnum = c.conkey[1]
+    where c.contype = 'f' and c.confdeltype = 'c' and c.confrelid = v_table;
+    if v_cascades is not null then
+      raise exception 'Apagar % dispara ON DELETE CASCADE em %; confirme com p_allow_cascade', p_table, v_cascades;
+    end if;
+  end if;
+
+  if p_owner_id is not null then
+    if not exists (
+      select 1 from pg_attribute
+      where attrelid = v_table and attname = 'owner_id' and attnum > 0 and not attisdropped
+    ) then
+      raise exception 'A tabela % não tem a coluna owner_id', p_table;
+    end if;
+    v_owner_filter := ' and owner_id = $2';
+  end if;
+
+  perform set_config('statement_timeout', greatest(p_timeout_ms, 100)::text, true);
+  perform set_config('lock_timeout', greatest(p_timeout_ms, 100)::text, true);
+
+  execute format(
+    'with alvo as (
+       select %1$I as pk from %2$s
+       where ($1 is null or %1$I > $1::%3$s)%4$s
+       order by %1$I
+       limit $3
+       for update
+     ), apagadas as (
+       delete from %2$s t using alvo where t.%1$I = alvo.pk returning t.%1$I as pk
+     )
+     select count(*), (select a.pk::text from apagadas a order by a.pk desc limit 1) from apagadas',
+    v_pk, v_table, v_pk_type, v_owner_filter
+  ) into v_deleted, v_last using p_after_id, p_owner_id, p_batch_size;
+
+  return jsonb_build_object('deleted', v_deleted, 'last_id', v_last);
+end;
+$$;
+
+-- FKs ON DELETE CASCADE disparadas ao apagar linhas de p_table, seguindo as cascatas das filhas:
+-- [{"table", "columns", "ref_table"}]
+create or replace function public.purge_cascades(p_table text)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  with recursive cascata(filha, colunas, pai, caminho) as (
+    select c.conrelid, c.conkey, c.confrelid, array[c.confrelid, c.conrelid]
+    from pg_constraint c
+    where c.contype = 'f' and c.confdeltype = 'c' and c.confrelid = format('public.%I', p_table)::regclass
+    union all
+    select c.conrelid, c.conkey, c.confrelid, p.caminho || c.conrelid
+    from cascata p
+    join pg_constraint c on c.contype = 'f' and c.confdeltype = 'c' and c.confrelid = p.filha
+    where not c.conrelid = any(p.caminho)
+  )
+  select coalesce(jsonb_agg(jsonb_build_object(
+    'table', f.relname,
+    'columns', (select jsonb_agg(a.attname order by k.ordem)
+                from unnest(x.colunas) with ordinality k(attnum, ordem)
+                join pg_attribute a on a.attrelid = x.filha and a.attnum = k.attnum),
+    'ref_table', p.relname
+  )), '[]'::jsonb)
+  from cascata x
+  join pg_class f on f.oid = x.filha
+  join pg_class p on p.oid = x.pai;
+$$;
+
+-- Maior atraso de replay entre as réplicas (segundos); null sem réplicas
+create or replace function public.purge_replication_lag()
+returns double precision
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select max(extract(epoch from coalesce(r.replay_lag, interval '0')))::double precision
+  from pg_stat_replication r;
+$$;
+
+revoke all on function public.purge_batch(text, text, integer, integer, uuid, boolean) from public, anon, authenticated;
+revoke all on function public.purge_cascades(text) from public, anon, authenticated;
+revoke all on function public.purge_replication_lag() from public, anon, authenticated;
+grant execute on function public.purge_batch(text, text, integer, integer, uuid, boolean) to service_role;
+grant execute on function public.purge_cascades(text) to service_role;
+grant execute on function public.purge_replication_lag() to service_role;
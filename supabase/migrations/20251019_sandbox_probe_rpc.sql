@@ -0,0 +1,93 @@
+-- Sondas sem efeito colateral (chamada por sandbox_probe.py)
+-- Executa um insert/update/delete numa subtransação que é sempre desfeita e devolve o que
+-- teria acontecido: as linhas resultantes (com defaults e triggers aplicados) ou o erro
+-- (código, mensagem, detalhe, dica). Substitui o "grava e depois apaga" dos scripts de
+-- diagnóstico: uma ida e volta, nada fica para trás se algo falhar no meio.
+-- security invoker: roda com o papel e o JWT de quem chama, então as políticas de RLS valem
+-- como numa escrita de verdade. Constraints adiáveis são checadas na hora (o commit nunca vem).
+-- Sequências avançam mesmo com o rollback (nextval não é transacional).
+
+create or replace function public.sandbox_probe(
+  p_table text,
+  p_operation text default 'insert',
+  p_row jsonb default '{}'::jsonb,
+  p_match jsonb default null
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  v_table regclass;
+  v_columns text;
+  v_where text;
+  v_rows jsonb;
+  v_outcome jsonb;
+  v_code text;
+  v_message text;
+  v_detail text;
+  v_hint text;
+begin
+  if p_operation not in ('insert', 'update', 'delete') then
+    raise exception 'p_operation deve ser insert, update ou delete';
+  end if;
+  if p_operation in ('update', 'delete') and (p_match is null or p_match = '{}'::jsonb) then
+    raise exception 'p_match é obrigatório em update e delete';
+  end if;
+
+  select string_agg(format('%I', key), ', ') into v_columns from jsonb_object_keys(coalesce(p_row, '{}')) as key;
+  select string_agg(format('t.%1$I is not distinct from m.%1$I', key), ' and ') into v_where
+  from jsonb_object_keys(coalesce(p_match, '{}')) as key;
+
+  begin
+    -- Tabela inexistente também volta como erro da sonda (e não como 404 do PostgREST)
+    v_table := format('public.%I', p_table)::regclass;
+    set constraints all immediate;
+
+    if p_operation = 'insert' then
+      execute format(
+        'with r as (insert into %1$s %2$s returning *) select coalesce(jsonb_agg(to_jsonb(r)), ''[]'') from r',
+        v_table,
+        case when v_columns is null then 'default values'
+             else format('(%1$s) select %1$s from jsonb_populate_record(null::%2$s, $1)', v_columns, v_table) end
+      ) into v_rows using p_row;
+    elsif p_operation = 'update' then
+      if v_columns is null then
+        raise exception 'p_row sem colunas para o update';
+      end if;
+      execute format(
+        'with r as (update %1$s as t set (%2$s) = (select %2$s from jsonb_populate_record(null::%1$s, $1))
+                    from jsonb_populate_record(null::%1$s, $2) as m where %3$s returning t.*)
+         select coalesce(jsonb_agg(to_jsonb(r)), ''[]'') from r',
+        v_table, v_columns, v_where
+      ) into v_rows using p_row, p_match;
+    else
+      execute format(
+        'with r as (delete from %1$s as t using jsonb_populate_record(null::%1$s, $1) as m where %2$s returning t.*)
+         select coalesce(jsonb_agg(to_jsonb(r)), ''[]'') from r',
+        v_table, v_where
+      ) into v_rows using p_match;
+    end if;
+
+    v_outcome := jsonb_build_object('ok', true, 'rows', v_rows);
+    -- Erro próprio só para desfazer a subtransação (e tudo que os triggers fizeram)
+    raise exception using errcode = 'VBSBX', message = 'sandbox_probe: rollback';
+  exception
+    when sqlstate 'VBSBX' then
+      null;
+    when others then
+      get stacked diagnostics v_code = returned_sqlstate, v_message = message_text,
+                              v_detail = pg_exception_detail, v_hint = pg_exception_hint;
+      v_outcome := jsonb_build_object('ok', false, 'error', jsonb_build_object(
+        'code', v_code, 'message', v_message, 'details', nullif(v_detail, ''), 'hint', nullif(v_hint, '')
+      ));
+  end;
+
+  return v_outcome;
+end;
+$$;
+
+-- Sem privilégio extra (security invoker) e sem efeito (sempre desfeita): liberada para os papéis da API
+revoke all on function public.sandbox_probe(text, text, jsonb, jsonb) from public;
+grant execute on function public.sandbox_probe(text, text, jsonb, jsonb) to anon, authenticated, service_role;
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Sonda das tabelas essenciais pela API REST
+VBSolution - Sistema CRM Completo
+
+A lista de tabelas e a sonda usadas pelo health_daemon.py, pelo check_tables.py,
+pelo test_system.py e pelos smoke tests (tests/test_smoke.py). Uma sonda é um HEAD
+?select=id&limit=1 com Prefer: count=estimated: sem corpo, e com a contagem pelo
+planejador nas tabelas grandes. 200/206 é acessível, 401/403 é acesso negado
+(RLS ou permissão) e o resto, ou nenhuma resposta, é tabela fora.
+
+A sonda não passa pelo instrumentation.http: o daemon sonda sem parar e o resumo de
+latência e o trace cresceriam sem limite. Scripts que querem o tempo no resumo
+envolvem a chamada num span().
+
+Uso:   result = probe_table("leads", session=session)
+       result["status"], result["rows"], result["seconds"], result["failure"]
+"""
+
+import time
+
+from supabase_rest import rest_url, rest_headers
+
+ESSENTIAL_TABLES = [
+    "profiles", "companies", "employees", "products", "suppliers", "inventory", "leads",
+    "deals", "activities", "projects", "work_groups", "whatsapp_atendimentos", "whatsapp_mensagens",
+]
+
+PROBE_TIMEOUT = 10
+UP_STATUSES = {200, 206}  # 206: limit=1 com contagem maior que 1
+DENIED_STATUSES = {401, 403}
+
+def total_from_range(content_range):
+    """Total do Content-Range ("0-0/123" ou "*/123"); None se desconhecido"""
+    total = (content_range or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+def probe_headers(key=None):
+    """Cabeçalhos da sonda: a chave do ambiente ou outra (ex.: a anon)"""
+    headers = rest_headers(prefer="count=estimated")
+    if key:
+        headers.update({"apikey": key, "Authorization": f"Bearer {key}"})
+    return headers
+
+def probe_table(table, headers=None, session=None, timeout=PROBE_TIMEOUT, base_url=None):
+    """Sondar uma tabela; devolve {"status", "rows", "seconds", "failure"} (status None sem resposta)"""
+    import requests
+
+    url = f"{base_url.rstrip('/')}/rest/v1/{table}" if base_url else rest_url(table)
+    started = time.perf_counter()
+    try:
+        response = (session or requests).head(url, params={"select": "id", "limit": "1"},
+                                              headers=headers or probe_headers(), timeout=timeout)
+    except requests.RequestException as exc:  # conexão recusada, timeout, DNS: a tabela conta como fora
+        return {"status": None, "rows": None, "seconds": time.perf_counter() - started, "failure": type(exc).__name__}
+    return {"status": response.status_code, "rows": total_from_range(response.headers.get("Content-Range")),
+            "seconds": time.perf_counter() - started, "failure": None}
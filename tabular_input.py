@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Leitura em streaming de planilhas e arquivos de dados para as cargas em lote
+VBSolution - Sistema CRM Completo
+
+read_rows(path) gera um dict por linha (cabeçalho normalizado em minúsculas, sem
+acentos e com _ no lugar de espaços), junto com o número da linha no arquivo,
+sem carregar o arquivo inteiro. CSV detecta o separador (; ou ,) e a codificação
+(UTF-8 com ou sem BOM, senão Latin-1, comum em exportações do Excel).
+XLSX usa openpyxl em modo somente leitura; NDJSON é um objeto JSON por linha;
+Parquet usa pyarrow, lendo um grupo de linhas por vez. Nos dois últimos os nomes
+das colunas são mantidos como estão (já são nomes de coluna). CSV e NDJSON podem
+vir comprimidos (.gz, ou .zst com zstandard), como os gerados por export_tables.py.
+
+ErrorFile grava as linhas rejeitadas (linha, erro, dados originais) num CSV.
+
+Uso:   for line_number, row in read_rows("fornecedores.csv"):
+           ...
+"""
+
+import os
+import io
+import csv
+import gzip
+import codecs
+import json
+import unicodedata
+
+CSV_SAMPLE_BYTES = 64 * 1024
+
+def normalize_header(name):
+    """'Nome Fantasia' → 'nome_fantasia', 'E-mail' → 'e_mail'"""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    text = "".join(c if c.isalnum() else "_" for c in text.strip().lower())
+    return "_".join(part for part in text.split("_") if part)
+
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+def detect_format(path):
+    base = path[:-len(suffix)] if (suffix := compression_suffix(path)) else path
+    extension = os.path.splitext(base)[1].lower().lstrip(".")
+    return {"xlsm": "xlsx", "txt": "csv", "tsv": "csv", "jsonl": "ndjson", "pq": "parquet"}.get(extension, extension)
+
+def compression_suffix(path):
+    return next((suffix for suffix in COMPRESSED_SUFFIXES if path.lower().endswith(suffix)), None)
+
+def open_binary(path):
+    """Abrir para leitura binária, descomprimindo .gz/.zst em streaming"""
+    suffix = compression_suffix(path)
+    if suffix == ".gz":
+        return gzip.open(path, "rb")
+    if suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstandard não instalado. Execute: pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+def open_text(path):
+    """Abrir o CSV como texto na primeira codificação que decodifica o começo do arquivo"""
+    with open_binary(path) as f:
+        head = f.read(CSV_SAMPLE_BYTES)
+    # A amostra pode cortar um caractere multibyte (ç, ã, é) no meio: decodificador
+    # incremental, que só exige a sequência completa se o arquivo acabou na amostra
+    complete = len(head) < CSV_SAMPLE_BYTES
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(head, final=complete)
+            break
+        except UnicodeDecodeError:
+            continue
+    return io.TextIOWrapper(open_binary(path), encoding=encoding, newline="")
+
+def read_csv(path):
+    with open_text(path) as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t|")
+    except csv.Error:
+        dialect = csv.excel
+    # Reabrir em vez de seek(0): o fluxo zstd não volta
+    with open_text(path) as f:
+        reader = csv.reader(f, dialect)
+        header = [normalize_header(h) for h in next(reader, [])]
+        for values in reader:
+            if not any(v.strip() for v in values):
+                continue
+            yield reader.line_num, dict(zip(header, (v.strip() for v in values)))
+
+def read_xlsx(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("openpyxl não instalado. Execute: pip install openpyxl")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = [normalize_header(h) for h in next(rows, ())]
+        for line_number, values in enumerate(rows, start=2):
+            if all(v is None or str(v).strip() == "" for v in values):
+                continue
+            yield line_number, {
+                column: (value.strip() if isinstance(value, str) else value)
+                for column, value in zip(header, values) if column
+            }
+    finally:
+        workbook.close()
+
+def read_ndjson(path):
+    with io.TextIOWrapper(open_binary(path), encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"{path}:{line_number}: JSON inválido ({exc})")
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}:{line_number}: cada linha precisa ser um objeto JSON")
+            yield line_number, row
+
+def read_parquet(path, batch_size=10_000):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow não instalado. Execute: pip install pyarrow")
+
+    line_number = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            line_number += 1
+            yield line_number, row
+
+READERS = {"csv": read_csv, "xlsx": read_xlsx, "ndjson": read_ndjson, "parquet": read_parquet}
+
+def read_rows(path, file_format=None):
+    """(número da linha, dict) para cada linha do arquivo, no formato da extensão ou no informado"""
+    file_format = file_format or detect_format(path)
+    if file_format not in READERS:
+        raise ValueError(f"Formato não suportado: {file_format} (use {', '.join(sorted(READERS))})")
+    return READERS[file_format](path)
+
+class ErrorFile:
+    """CSV das linhas rejeitadas: linha, erro e os dados originais em JSON (criado na primeira rejeição)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.count = 0
+
+    def write(self, line_number, error, row):
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["linha", "erro", "dados"])
+        self.writer.writerow([line_number, error, json.dumps(row, ensure_ascii=False, default=str)])
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
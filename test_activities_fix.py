@@ -4,9 +4,10 @@ Script para testar especificamente a página de atividades e identificar problem
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+
+from sandbox_probe import probe, describe
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,18 +21,13 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_activities_table():
     """Testar especificamente a tabela activities"""
     try:
         log("🔍 Testando tabela activities...")
         
         # Testar acesso básico
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -70,7 +66,7 @@ def test_activities_with_filters():
         
         for filter_query in filters:
             try:
-                response = requests.get(f"{SUPABASE_URL}/rest/v1/activities{filter_query}", headers=headers)
+                response = http("GET", f"{SUPABASE_URL}/rest/v1/activities{filter_query}", headers=headers)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -101,16 +97,14 @@ def test_activities_insert():
             "due_date": "2025-12-31T23:59:59Z"
         }
         
-        # Tentar inserir (deve falhar por falta de owner_id, mas testa estrutura)
-        response = requests.post(f"{SUPABASE_URL}/rest/v1/activities", 
-                               headers=headers, 
-                               json=test_activity)
+        # Tentar inserir (deve falhar por falta de owner_id, mas testa estrutura); nada é gravado
+        result = probe("activities", test_activity, headers=headers)
         
-        if response.status_code in [400, 422]:  # Erro esperado por owner_id obrigatório
+        if not result["ok"]:  # Erro esperado por owner_id obrigatório
             log("✅ Estrutura da tabela activities está correta (erro esperado por owner_id)")
             return True
         else:
-            log(f"⚠️ Status inesperado na inserção: {response.status_code}", "WARNING")
+            log(f"⚠️ Resultado inesperado na inserção: {describe(result)}", "WARNING")
             return False
             
     except Exception as e:
@@ -123,7 +117,7 @@ def test_activities_permissions():
         log("🔍 Testando permissões da tabela activities...")
         
         # Testar acesso sem autenticação (deve falhar com RLS ativo)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities", headers=headers)
         
         if response.status_code in [401, 403]:
             log("✅ Políticas RLS estão ativas (acesso negado sem autenticação)")
@@ -145,7 +139,7 @@ def check_activities_structure():
         log("🔍 Verificando estrutura da tabela activities...")
         
         # Verificar se a tabela tem as colunas esperadas
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -234,6 +228,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
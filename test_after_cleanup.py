@@ -4,9 +4,8 @@ Script para testar o sistema após a limpeza completa
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,15 +19,10 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def check_table_data(table_name):
     """Verificar se uma tabela está vazia (sem dados mockados)"""
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=10", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=10", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -94,7 +88,7 @@ def test_dashboard_loading():
     
     for table in dashboard_tables:
         try:
-            response = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
+            response = http("GET", f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -116,7 +110,7 @@ def test_activities_page():
     log("=" * 60)
     
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=5", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=5", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -145,7 +139,7 @@ def check_user_isolation():
     
     for table in test_tables:
         try:
-            response = requests.get(f"{SUPABASE_URL}/rest/v1/{table}", headers=headers)
+            response = http("GET", f"{SUPABASE_URL}/rest/v1/{table}", headers=headers)
             
             if response.status_code in [401, 403]:
                 log(f"✅ {table}: RLS ativo (acesso negado sem autenticação)")
@@ -206,6 +200,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
@@ -4,9 +4,8 @@ Script para testar especificamente a autenticação e criação de perfis
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,18 +19,13 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_profiles_table():
     """Testar se a tabela profiles está funcionando"""
     try:
         log("🔍 Testando tabela profiles...")
         
         # Tentar acessar a tabela profiles
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
         
         if response.status_code == 200:
             log("✅ Tabela profiles está acessível")
@@ -57,7 +51,7 @@ def test_auth_endpoint():
             "password": "123456"
         }
         
-        response = requests.post(f"{SUPABASE_URL}/auth/v1/signup", 
+        response = http("POST", f"{SUPABASE_URL}/auth/v1/signup", 
                                headers=headers, 
                                json=auth_data)
         
@@ -82,7 +76,7 @@ def test_table_structure():
         
         for table in tables_to_test:
             try:
-                response = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
+                response = http("GET", f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
                 
                 if response.status_code == 200:
                     log(f"✅ Tabela {table} está acessível")
@@ -104,7 +98,7 @@ def check_rls_policies():
         log("🔒 Verificando políticas RLS...")
         
         # Tentar acessar dados sem autenticação (deve falhar com RLS ativo)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
         
         if response.status_code in [401, 403]:
             log("✅ Políticas RLS estão ativas (acesso negado sem autenticação)")
@@ -134,7 +128,7 @@ def test_manual_profile_creation():
         }
         
         # Tentar inserir (deve falhar por UUID inválido, mas testa a estrutura)
-        response = requests.post(f"{SUPABASE_URL}/rest/v1/profiles", 
+        response = http("POST", f"{SUPABASE_URL}/rest/v1/profiles", 
                                headers=headers, 
                                json=test_profile)
         
@@ -197,6 +191,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
@@ -4,9 +4,8 @@ Script de teste para verificar a nova configuração do Supabase
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do novo Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,17 +19,12 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_connection():
     """Testar conexão básica com o Supabase"""
     try:
         log("🔗 Testando conexão básica com o Supabase...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             log("✅ Conexão básica estabelecida!")
@@ -49,7 +43,7 @@ def test_auth_endpoints():
         log("🔐 Testando endpoints de autenticação...")
         
         # Testar endpoint de signup (deve retornar erro sem dados, mas endpoint deve existir)
-        response = requests.post(f"{SUPABASE_URL}/auth/v1/signup", headers=headers)
+        response = http("POST", f"{SUPABASE_URL}/auth/v1/signup", headers=headers)
         
         if response.status_code in [400, 422]:  # Erro esperado sem dados
             log("✅ Endpoint de signup acessível")
@@ -57,7 +51,7 @@ def test_auth_endpoints():
             log(f"⚠️ Endpoint de signup retornou status {response.status_code}", "WARNING")
         
         # Testar endpoint de login
-        response = requests.post(f"{SUPABASE_URL}/auth/v1/token?grant_type=password", headers=headers)
+        response = http("POST", f"{SUPABASE_URL}/auth/v1/token?grant_type=password", headers=headers)
         
         if response.status_code in [400, 422]:  # Erro esperado sem dados
             log("✅ Endpoint de login acessível")
@@ -76,7 +70,7 @@ def test_storage():
         log("📦 Testando funcionalidade de storage...")
         
         # Listar buckets (deve retornar erro sem autenticação, mas endpoint deve existir)
-        response = requests.get(f"{SUPABASE_URL}/storage/v1/bucket", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/storage/v1/bucket", headers=headers)
         
         if response.status_code in [401, 403]:  # Erro esperado sem autenticação
             log("✅ Endpoint de storage acessível")
@@ -95,7 +89,7 @@ def test_realtime():
         log("📡 Testando funcionalidade de realtime...")
         
         # Testar endpoint de realtime (deve retornar erro sem autenticação, mas endpoint deve existir)
-        response = requests.get(f"{SUPABASE_URL}/realtime/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/realtime/v1/", headers=headers)
         
         if response.status_code in [401, 403, 404]:  # Erro esperado sem autenticação
             log("✅ Endpoint de realtime acessível")
@@ -114,7 +108,7 @@ def test_database_schema():
         log("🗄️ Testando estrutura do banco de dados...")
         
         # Listar tabelas disponíveis
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             tables = response.json()
@@ -159,7 +153,7 @@ def test_rls_policies():
         log("🔒 Testando políticas RLS...")
         
         # Tentar acessar dados sem autenticação (deve falhar)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/user_profiles", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/user_profiles", headers=headers)
         
         if response.status_code in [401, 403]:  # Erro esperado sem autenticação
             log("✅ Políticas RLS estão ativas (acesso negado sem autenticação)")
@@ -187,7 +181,7 @@ def test_frontend_integration():
         log(f"🔑 Chave anônima: {SUPABASE_ANON_KEY[:20]}...")
         
         # Testar com headers corretos
-        response = requests.get(test_url, headers=headers)
+        response = http("GET", test_url, headers=headers)
         
         if response.status_code == 200:
             log("✅ Frontend pode se conectar com as credenciais atuais")
@@ -259,4 +253,5 @@ def main():
         log("   4. Testar novamente")
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
@@ -8,12 +8,12 @@ import os
 import sys
 import json
 from datetime import datetime
+from functools import partial
 from supabase import create_client, Client
+from instrumentation import log as instrumented_log, print_summary_at_exit
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
+# As linhas deste script sempre mostraram só a hora
+log = partial(instrumented_log, time_format="%H:%M:%S")
 
 def test_suppliers_sync():
     """Testa a sincronização de fornecedores"""
@@ -168,4 +168,5 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     main()
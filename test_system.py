@@ -4,9 +4,9 @@ Script de teste para verificar o sistema CRM após a migração
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
+from table_probe import ESSENTIAL_TABLES
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,17 +20,12 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
-
 def test_connection():
     """Testar conexão com o Supabase"""
     try:
         log("🔗 Testando conexão com o Supabase...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             log("✅ Conexão estabelecida com sucesso!")
@@ -48,18 +43,14 @@ def check_tables():
     try:
         log("🔍 Verificando tabelas criadas...")
         
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/", headers=headers)
         
         if response.status_code == 200:
             tables = response.json()
             log(f"📊 Total de tabelas encontradas: {len(tables)}")
             
             # Tabelas essenciais que devem existir
-            essential_tables = [
-                'profiles', 'companies', 'employees', 'products', 'suppliers',
-                'inventory', 'leads', 'deals', 'activities', 'projects',
-                'work_groups', 'whatsapp_atendimentos', 'whatsapp_mensagens'
-            ]
+            essential_tables = ESSENTIAL_TABLES
             
             found_tables = []
             missing_tables = []
@@ -94,7 +85,7 @@ def test_rls():
         log("🔒 Testando políticas RLS...")
         
         # Tentar acessar dados sem autenticação (deve falhar)
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles", headers=headers)
         
         if response.status_code in [401, 403]:
             log("✅ Políticas RLS estão ativas (acesso negado sem autenticação)")
@@ -116,21 +107,21 @@ def test_table_structure():
         log("🏗️ Testando estrutura das tabelas...")
         
         # Testar tabela profiles
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/profiles?select=*&limit=1", headers=headers)
         if response.status_code == 200:
             log("✅ Tabela profiles está acessível")
         else:
             log(f"⚠️ Tabela profiles retornou status {response.status_code}", "WARNING")
         
         # Testar tabela companies
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/companies?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/companies?select=*&limit=1", headers=headers)
         if response.status_code == 200:
             log("✅ Tabela companies está acessível")
         else:
             log(f"⚠️ Tabela companies retornou status {response.status_code}", "WARNING")
         
         # Testar tabela activities
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/activities?select=*&limit=1", headers=headers)
         if response.status_code == 200:
             log("✅ Tabela activities está acessível")
         else:
@@ -237,6 +228,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
@@ -0,0 +1,120 @@
+"""
+Fixtures da suíte de smoke tests
+VBSolution - Sistema CRM Completo
+
+Alvo padrão: um local_standin em memória, semeado com poucas linhas pelo
+generate_synthetic_dataset (cada worker do xdist sobe o seu, então nada é
+compartilhado entre processos). Contra o projeto real: --alvo live ou
+SMOKE_TARGET=live, com SUPABASE_URL e a chave nas variáveis de ambiente.
+Contra o projeto real a suíte só lê ou usa o sandbox_probe, nada é gravado; os testes
+de comportamento dos módulos (fixture standin) sempre gravam num stand-in próprio.
+
+Execute: python -m pytest -q [-m "schema or rls"] [-n auto] [--alvo live]
+"""
+
+import os
+import sys
+import json
+import base64
+
+import pytest
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import supabase_rest  # noqa: E402
+from schema_cache import schema_from_openapi  # noqa: E402
+
+SEED_TABLES = ["companies", "profiles", "employees", "products", "leads", "activities"]
+SEED_SCALE = 0.001
+
+class SmokeClient:
+    """Sessão HTTP única (keep-alive) para a API REST e o Auth do alvo"""
+
+    def __init__(self, base_url, target):
+        self.base_url = base_url.rstrip("/")
+        self.target = target
+        self.session = requests.Session()
+        self.session.headers.update(supabase_rest.rest_headers())
+
+    @property
+    def live(self):
+        return self.target == "live"
+
+    def get(self, path="", **params):
+        return self.session.get(f"{self.base_url}/rest/v1/{path}", params=params, timeout=10)
+
+    def auth(self, method, path, **kwargs):
+        return self.session.request(method, f"{self.base_url}/auth/v1/{path}", timeout=10, **kwargs)
+
+    def key_claims(self):
+        """Payload do JWT da chave em uso (sem verificar a assinatura)"""
+        payload = supabase_rest.SUPABASE_KEY.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+def pytest_addoption(parser):
+    parser.addoption("--alvo", choices=["standin", "live"], default=os.getenv("SMOKE_TARGET", "standin"),
+                     help="standin (padrão, local) ou live (projeto em SUPABASE_URL)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--alvo") == "live":
+        return
+    skip = pytest.mark.skip(reason="só contra o projeto real (--alvo live)")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip)
+
+def start_standin():
+    from local_standin import StandIn, start_background
+    from generate_synthetic_dataset import build_plan, generate, StandInLoader
+    import sandbox_probe
+
+    standin = StandIn()
+    sandbox_probe.register_standin_rpcs(standin)
+    generate(build_plan(seed=7, scale=SEED_SCALE), StandInLoader(standin), tables=SEED_TABLES)
+    server, url = start_background(standin)
+    return server, url
+
+@pytest.fixture(scope="session")
+def api(request):
+    target = request.config.getoption("--alvo")
+    if target == "live":
+        yield SmokeClient(supabase_rest.SUPABASE_URL, target)
+        return
+
+    server, url = start_standin()
+    original_url = supabase_rest.SUPABASE_URL
+    supabase_rest.SUPABASE_URL = url  # sandbox_probe e os outros módulos montam as URLs por aqui
+    try:
+        yield SmokeClient(url, target)
+    finally:
+        supabase_rest.SUPABASE_URL = original_url
+        server.shutdown()
+
+@pytest.fixture
+def standin(monkeypatch):
+    """Stand-in vazio só deste teste, com a API REST apontada para ele (vale também com --alvo live)"""
+    from local_standin import StandIn, start_background
+    import sandbox_probe
+
+    standin = StandIn()
+    sandbox_probe.register_standin_rpcs(standin)
+    server, url = start_background(standin)
+    monkeypatch.setattr(supabase_rest, "SUPABASE_URL", url)
+    try:
+        yield standin
+    finally:
+        server.shutdown()
+
+@pytest.fixture(scope="session")
+def schema(api):
+    """Tabelas e colunas pelo OpenAPI do alvo (uma requisição por sessão)"""
+    response = api.get()
+    assert response.status_code == 200, f"API fora do ar: {response.status_code} - {response.text[:200]}"
+    return schema_from_openapi(response.json())
+
+@pytest.fixture(scope="session")
+def key_role(api):
+    return api.key_claims().get("role")
@@ -0,0 +1,100 @@
+"""
+bulk_load: conversão de tipos, colunas do COPY e carga pela API num stand-in
+VBSolution - Sistema CRM Completo
+"""
+
+import json
+import uuid
+
+import pytest
+
+import bulk_load
+from bulk_load import RowConverter, RowError, coerce, copy_columns, copy_records, table_schema
+from tabular_input import ErrorFile
+
+OWNER = "00000000-0000-0000-0000-0000000000aa"
+
+@pytest.mark.parametrize("value, column_type, expected", [
+    ("1.234,56", "numeric", "1234.56"),
+    ("1,234.56", "numeric", "1234.56"),
+    ("12,0", "integer", 12),
+    ("sim", "boolean", True),
+    ("31/01/2025", "date", "2025-01-31"),
+    ("2025-01-31T10:00:00Z", "timestamp with time zone", "2025-01-31T10:00:00+00:00"),
+    ("{a,b}", "text[]", ["a", "b"]),
+    ('{"x": 1}', "jsonb", {"x": 1}),
+    ("  ", "text", None),
+])
+def test_coerce(value, column_type, expected):
+    assert coerce(value, column_type) == expected
+
+@pytest.mark.parametrize("value, column_type", [("12,5", "integer"), ("talvez", "boolean"), ("x", "uuid"),
+                                                ("abcd", "varchar(3)")])
+def test_coerce_recusa(value, column_type):
+    with pytest.raises(RowError):
+        coerce(value, column_type)
+
+class CollectedErrors(ErrorFile):
+    def __init__(self):
+        super().__init__(None)
+        self.rows = []
+
+    def write(self, line_number, error, row):
+        self.rows.append((line_number, error))
+        self.count += 1
+
+def test_colunas_do_copy_nao_dependem_da_primeira_linha():
+    converter = RowConverter("suppliers", table_schema("suppliers"))
+    available = ["id", "owner_id", "name", "email", "city", "status", "created_at", "coluna_nova"]
+    first = converter.convert({"owner_id": OWNER, "name": "A", "created_by": OWNER})
+    columns = copy_columns(available, converter, first)
+    # email e city faltam na primeira linha mas entram (NULL nela); id/status/created_at ficam com o DEFAULT
+    assert columns == ["owner_id", "name", "email", "city"]
+
+def test_copy_rejeita_linha_que_nao_cabe_na_lista_de_colunas():
+    converter = RowConverter("suppliers", table_schema("suppliers"))
+    available = ["id", "owner_id", "name", "status"]
+    base = {"owner_id": OWNER, "name": "A", "created_by": OWNER}
+    first = converter.convert({**base, "status": "active"})
+    rows = [(1, {}, first),
+            (2, {}, converter.convert({**base, "name": "B", "status": "inactive"})),
+            (3, {}, converter.convert(base)),
+            (4, {}, converter.convert({**base, "id": str(uuid.uuid4()), "status": "active"}))]
+    columns = copy_columns(available, converter, first)
+    errors = CollectedErrors()
+    loaded = list(copy_records(iter(rows), columns, available, converter, errors))
+    assert [record["name"] for record in loaded] == ["A", "B"]
+    assert [line for line, _ in errors.rows] == [3, 4]
+    assert "status ausente" in errors.rows[0][1] and "id presente" in errors.rows[1][1]
+
+def test_carga_pela_api_com_ndjson_esparso(standin, tmp_path):
+    lines = [
+        {"owner_id": OWNER, "created_by": OWNER, "name": "Sem cidade"},
+        {"owner_id": OWNER, "created_by": OWNER, "name": "Com cidade", "city": "Recife", "rating": "4,5"},
+        {"owner_id": OWNER, "created_by": OWNER, "name": "Nota ruim", "rating": "ótima"},
+        {"owner_id": OWNER, "created_by": OWNER},
+    ]
+    path = tmp_path / "fornecedores.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding="utf-8")
+
+    summary = bulk_load.bulk_load("suppliers", str(path), batch_rows=2, workers=2)
+    assert (summary["read"], summary["loaded"], summary["rejected"]) == (4, 2, 2)
+    rows = dict(standin.conn.execute('SELECT name, city FROM "suppliers"').fetchall())
+    assert rows == {"Sem cidade": None, "Com cidade": "Recife"}
+
+def test_falha_do_gateway_sem_upsert_nao_reenvia(monkeypatch):
+    calls = []
+
+    def gateway_error(table, rows, **kwargs):
+        calls.append(len(rows))
+        return [{"rows": len(rows), "ok": False, "status": 502, "error": "Bad Gateway"}]
+
+    monkeypatch.setattr(bulk_load, "bulk_insert", gateway_error)
+    batch = [(n, {"n": n}, {"name": str(n)}) for n in range(4)]
+    inserted, requests, failures = bulk_load.insert_isolating("suppliers", batch, None, {})
+    assert (inserted, requests, calls) == (0, 1, [4])
+    assert [line for line, _, _ in failures] == [0, 1, 2, 3]
+
+    calls.clear()
+    bulk_load.insert_isolating("suppliers", batch, "id", {})
+    assert calls == [4, 2, 1, 1, 2, 1, 1]
@@ -0,0 +1,91 @@
+"""
+fixture_snapshots: snapshot → alterações → restore --limpar devolve as tabelas ao estado capturado
+VBSolution - Sistema CRM Completo
+"""
+
+import sys
+
+import pytest
+
+import fixture_snapshots
+import purge_table
+from generate_synthetic_dataset import build_plan, generate, StandInLoader
+
+TABLES = ["companies", "employees", "products"]
+
+def table_rows(standin, table):
+    columns = [name for name in standin.tables[table]["columns"]]
+    select = ", ".join(f'"{c}"' for c in columns)
+    return sorted(standin.conn.execute(f'SELECT {select} FROM "{table}"').fetchall(), key=repr)
+
+@pytest.fixture
+def seeded(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(fixture_snapshots, "SNAPSHOTS_DIR", str(tmp_path))
+    generate(build_plan(seed=11, scale=0.003), StandInLoader(standin), tables=TABLES)
+    return standin
+
+@pytest.mark.parametrize("purge_rpc", [True, False], ids=["purge_batch", "api"])
+def test_restore_com_limpeza_volta_ao_snapshot(seeded, purge_rpc):
+    if purge_rpc:
+        purge_table.register_standin_rpcs(seeded)
+    before = {table: table_rows(seeded, table) for table in TABLES}
+    assert all(before.values())
+
+    manifest = fixture_snapshots.snapshot("base", TABLES, file_format="ndjson", workers=2)
+    assert manifest["fk_order"].index("companies") < manifest["fk_order"].index("employees")
+    assert {table: manifest["tables"][table]["rows"] for table in TABLES} == {t: len(r) for t, r in before.items()}
+
+    # Depuração suja as tabelas: linhas apagadas, alteradas e sobrando
+    seeded.conn.execute('DELETE FROM "products" WHERE rowid % 2 = 0')
+    seeded.conn.execute('UPDATE "employees" SET "name" = \'alterado\'')
+    seeded.conn.execute('INSERT INTO "products" ("id", "name") VALUES (\'00000000-0000-0000-0000-00000000beef\', \'extra\')')
+
+    outside = {fk["table"] for fk in fixture_snapshots.cascades_outside(TABLES)}
+    loaded = fixture_snapshots.restore("base", clean=True, workers=2, cascade=outside)
+    assert loaded == {t: len(r) for t, r in before.items()}
+    assert {table: table_rows(seeded, table) for table in TABLES} == before
+
+def test_restore_recusa_arquivo_alterado(seeded):
+    manifest = fixture_snapshots.snapshot("base", ["companies"], file_format="ndjson", workers=1)
+    part = manifest["tables"]["companies"]["parts"][0]["file"]
+    path = fixture_snapshots.os.path.join(fixture_snapshots.snapshot_dir("base"), part)
+    with open(path, "ab") as f:
+        f.write(b"\n")
+    with pytest.raises(RuntimeError, match="alterado ou corrompido"):
+        fixture_snapshots.restore("base", clean=True)
+
+def add_deal(standin):
+    company = standin.conn.execute('SELECT id, owner_id FROM "companies" LIMIT 1').fetchone()
+    standin.conn.execute('INSERT INTO "deals" ("id", "owner_id", "company_id", "stage_id", "title") VALUES (?, ?, ?, ?, ?)',
+                         ["00000000-0000-0000-0000-0000000000d1", company[1], company[0],
+                          "00000000-0000-0000-0000-0000000000e1", "negócio fora do snapshot"])
+
+def deals(standin):
+    return standin.conn.execute('SELECT count(*) FROM "deals"').fetchone()[0]
+
+@pytest.mark.parametrize("purge_rpc", [True, False], ids=["purge_batch", "api"])
+def test_limpar_recusa_cascata_para_fora_do_snapshot(seeded, purge_rpc):
+    if purge_rpc:
+        purge_table.register_standin_rpcs(seeded)
+    fixture_snapshots.snapshot("base", ["companies"], file_format="ndjson", workers=1)
+    add_deal(seeded)
+    companies = table_rows(seeded, "companies")
+
+    with pytest.raises(RuntimeError, match=r"deals\.company_id → companies"):
+        fixture_snapshots.restore("base", clean=True)
+    assert deals(seeded) == 1
+    assert table_rows(seeded, "companies") == companies
+
+    # Listadas em --cascata, as tabelas de fora são apagadas junto (como no Postgres)
+    outside = {fk["table"] for fk in fixture_snapshots.cascades_outside(["companies"])}
+    assert "deals" in outside
+    fixture_snapshots.restore("base", clean=True, cascade=outside)
+    assert deals(seeded) == 0
+    assert table_rows(seeded, "companies") == companies
+
+def test_limpar_fora_de_banco_local_exige_live(seeded, monkeypatch):
+    fixture_snapshots.snapshot("base", ["employees"], file_format="ndjson", workers=1)
+    monkeypatch.setattr(fixture_snapshots.supabase_rest, "SUPABASE_URL", "https://projeto.supabase.co")
+    monkeypatch.setattr(sys, "argv", ["fixture_snapshots.py", "restore", "base", "--limpar"])
+    assert fixture_snapshots.main() is False
+    assert table_rows(seeded, "employees")
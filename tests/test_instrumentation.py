@@ -0,0 +1,50 @@
+"""
+Novas tentativas do instrumentation.http: só repete o que não pode duplicar linhas
+VBSolution - Sistema CRM Completo
+"""
+
+import pytest
+import requests
+
+from instrumentation import http
+
+class ScriptedSession:
+    """Sessão que devolve os status na ordem dada e conta as chamadas"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response._content = b"[]"
+        return response
+
+def call(method, session, **kwargs):
+    return http(method, "http://127.0.0.1:1/rest/v1/leads", backoff=0, session=session, **kwargs)
+
+def test_post_sem_upsert_nao_repete_502():
+    session = ScriptedSession(502, 201)
+    assert call("POST", session, json={}).status_code == 502
+    assert session.calls == 1
+
+@pytest.mark.parametrize("kwargs", [
+    {"headers": {"Prefer": "resolution=merge-duplicates,return=minimal"}},
+    {"idempotent": True},
+])
+def test_post_idempotente_repete_502(kwargs):
+    session = ScriptedSession(502, 201)
+    assert call("POST", session, json={}, **kwargs).status_code == 201
+    assert session.calls == 2
+
+def test_429_sempre_repete():
+    session = ScriptedSession(429, 201)
+    assert call("POST", session, json={}).status_code == 201
+    assert session.calls == 2
+
+def test_get_repete_503():
+    session = ScriptedSession(503, 200)
+    assert call("GET", session).status_code == 200
+    assert session.calls == 2
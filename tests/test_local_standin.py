@@ -0,0 +1,61 @@
+"""
+Comportamento do local_standin que os outros testes pressupõem
+VBSolution - Sistema CRM Completo
+"""
+
+import threading
+
+import pytest
+
+from local_standin import StandIn, StandInError
+
+ROW = {"id": "00000000-0000-0000-0000-000000000001", "name": "Fornecedor Teste",
+       "owner_id": "00000000-0000-0000-0000-0000000000aa"}
+
+def test_erro_de_tipo_no_insert_nao_trava_a_conexao():
+    standin = StandIn()
+    with pytest.raises(Exception):
+        standin.insert("suppliers", {**ROW, "name": object()}, [], {})
+    assert not standin.conn.in_transaction
+    assert standin.insert("suppliers", ROW, [], {}) == 1
+
+def test_erro_no_bulk_insert_desfaz_o_lote():
+    standin = StandIn()
+    with pytest.raises(Exception):
+        standin.bulk_insert("suppliers", ["id", "name"], [[ROW["id"], "ok"], ["outro", object()]])
+    assert not standin.conn.in_transaction
+    assert standin.conn.execute('SELECT count(*) FROM "suppliers"').fetchone()[0] == 0
+
+def test_chave_duplicada_vira_409():
+    standin = StandIn()
+    standin.insert("suppliers", ROW, [], {})
+    with pytest.raises(StandInError) as error:
+        standin.insert("suppliers", ROW, [], {})
+    assert error.value.status == 409
+    assert standin.insert("suppliers", {**ROW, "id": "00000000-0000-0000-0000-000000000002"}, [], {}) == 1
+
+def test_ensure_unique_espera_a_transacao_aberta(standin):
+    # Sem o lock, o CREATE INDEX entraria na transação da outra thread e sumiria no ROLLBACK dela
+    started, release = threading.Event(), threading.Event()
+
+    def open_transaction():
+        with standin.lock:
+            standin.conn.execute("BEGIN")
+            started.set()
+            release.wait(5)
+            standin.conn.execute("ROLLBACK")
+
+    other = threading.Thread(target=open_transaction)
+    other.start()
+    assert started.wait(5)
+    ddl = threading.Thread(target=standin.ensure_unique, args=("profiles", ["email"]))
+    ddl.start()
+    ddl.join(0.2)
+    assert ddl.is_alive()
+    release.set()
+    other.join(5)
+    ddl.join(5)
+    index = standin.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'uniq_profiles_email'"
+    ).fetchone()
+    assert index is not None
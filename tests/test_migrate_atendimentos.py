@@ -0,0 +1,59 @@
+"""
+migrate_atendimentos: execução completa no stand-in, até a fase de exclusão
+VBSolution - Sistema CRM Completo
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+
+import purge_table
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import migrate_atendimentos  # noqa: E402
+import verify_migracao_atendimentos  # noqa: E402
+
+OWNER = "00000000-0000-0000-0000-0000000000aa"
+
+def count(standin, table):
+    return standin.conn.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+
+@pytest.fixture
+def seeded(standin, tmp_path, monkeypatch):
+    """6 atendimentos fechados; os 3 primeiros já têm mensagens (com status antigo)"""
+    purge_table.register_standin_rpcs(standin)
+    verify_migracao_atendimentos.register_standin_rpcs(standin)
+    chats = sorted(str(uuid.UUID(int=i + 1)) for i in range(6))
+    standin.bulk_insert("whatsapp_atendimentos", ["id", "owner_id", "chat_id", "canal", "status", "ultima_mensagem"],
+                        [[i, OWNER, f"5511{n:09d}@s.whatsapp.net", "whatsapp", "FINALIZADO", "tchau"]
+                         for n, i in enumerate(chats)])
+    standin.bulk_insert("whatsapp_mensagens", ["id", "owner_id", "atendimento_id", "conteudo", "status"],
+                        [[str(uuid.uuid4()), OWNER, chat, "oi", "AGUARDANDO"] for chat in chats[:3] for _ in range(2)])
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["migrate_atendimentos.py", "--journal", str(tmp_path / "journal.sqlite3"), *args])
+        return migrate_atendimentos.main()
+
+    return run
+
+def test_execucao_completa_nao_apaga_as_mensagens(seeded, standin):
+    # whatsapp_mensagens.atendimento_id é ON DELETE CASCADE: a fase de exclusão é recusada
+    assert seeded() is False
+    assert count(standin, "whatsapp_atendimentos") == 6
+    assert count(standin, "whatsapp_mensagens") == 9
+    statuses = standin.conn.execute('SELECT DISTINCT status FROM "whatsapp_mensagens"').fetchall()
+    assert statuses == [("FINALIZADO",)]
+    orphans = standin.conn.execute(
+        'SELECT count(*) FROM "whatsapp_atendimentos" a WHERE NOT EXISTS '
+        '(SELECT 1 FROM "whatsapp_mensagens" m WHERE m.atendimento_id = a.id)'
+    ).fetchone()[0]
+    assert orphans == 0
+
+def test_sem_exclusao_termina_depois_da_verificacao(seeded, standin):
+    assert seeded("--sem-exclusao") is True
+    assert count(standin, "whatsapp_mensagens") == 9
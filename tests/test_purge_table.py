@@ -0,0 +1,84 @@
+"""
+purge_table: exclusão em lotes por PK pela RPC purge_batch (ou pela API, sem a RPC)
+VBSolution - Sistema CRM Completo
+"""
+
+import uuid
+
+import pytest
+
+import purge_table
+from purge_table import purge, PurgeError, PurgeRefused
+
+OWNER = "00000000-0000-0000-0000-0000000000aa"
+OTHER = "00000000-0000-0000-0000-0000000000bb"
+
+def ids(n):
+    return sorted(str(uuid.UUID(int=i + 1)) for i in range(n))
+
+def remaining(standin, table):
+    return standin.conn.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+
+@pytest.fixture(params=["rpc", "rest"])
+def via(request, standin):
+    if request.param == "rpc":
+        purge_table.register_standin_rpcs(standin)
+    return request.param
+
+def test_tabela_sem_owner_id(standin, via):
+    standin.bulk_insert("profiles", ["id", "email"], [[i, f"{i[-4:]}@exemplo.com.br"] for i in ids(120)])
+    summary = purge("profiles", batch_size=50, max_lag=0, pause=0, cascade=True)
+    assert summary["via"] == via
+    assert summary["deleted"] == 120
+    assert summary["errors"] == 0
+    assert remaining(standin, "profiles") == 0
+
+def test_so_as_linhas_do_dono(standin, via):
+    rows = [[i, OWNER if n % 3 else OTHER, "whatsapp"] for n, i in enumerate(ids(90))]
+    standin.bulk_insert("whatsapp_atendimentos", ["id", "owner_id", "canal"], rows)
+    summary = purge("whatsapp_atendimentos", owner_id=OWNER, batch_size=25, max_lag=0, pause=0, cascade=True)
+    assert summary["deleted"] == 60
+    assert remaining(standin, "whatsapp_atendimentos") == 30
+
+def test_dono_em_tabela_sem_owner_id_falha(standin):
+    purge_table.register_standin_rpcs(standin)
+    standin.bulk_insert("profiles", ["id"], [[i] for i in ids(3)])
+    with pytest.raises(PurgeError):
+        purge("profiles", owner_id=OWNER, max_lag=0, pause=0, cascade=True)
+    assert remaining(standin, "profiles") == 3
+
+def test_erro_de_programacao_nao_vira_erro_de_lote(standin, monkeypatch):
+    def quebrado(*args):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(purge_table, "rpc_batch", quebrado)
+    with pytest.raises(TypeError):
+        purge("profiles", max_lag=0, pause=0, cascade=True)
+
+def seed_chats_with_messages(standin, n):
+    chats = ids(n)
+    standin.bulk_insert("whatsapp_atendimentos", ["id", "owner_id", "canal"], [[i, OWNER, "whatsapp"] for i in chats])
+    standin.bulk_insert("whatsapp_mensagens", ["id", "owner_id", "atendimento_id", "conteudo"],
+                        [[str(uuid.uuid4()), OWNER, chat, "oi"] for chat in chats for _ in range(2)])
+
+def test_recusa_cascata_sem_confirmacao(standin, via):
+    seed_chats_with_messages(standin, 10)
+    with pytest.raises(PurgeRefused, match="whatsapp_mensagens.atendimento_id"):
+        purge("whatsapp_atendimentos", max_lag=0, pause=0)
+    assert remaining(standin, "whatsapp_atendimentos") == 10
+    assert remaining(standin, "whatsapp_mensagens") == 20
+
+def test_cascata_confirmada_apaga_as_filhas(standin, via):
+    seed_chats_with_messages(standin, 10)
+    summary = purge("whatsapp_atendimentos", batch_size=4, max_lag=0, pause=0, cascade=True)
+    assert summary["deleted"] == 10
+    assert remaining(standin, "whatsapp_mensagens") == 0
+
+def test_rpc_recusa_cascata_sem_p_allow_cascade(standin, monkeypatch):
+    # Mesmo se a checagem prévia falhar, o lote da RPC não dispara a cascata
+    purge_table.register_standin_rpcs(standin)
+    seed_chats_with_messages(standin, 3)
+    monkeypatch.setattr(purge_table, "cascading_references", lambda table, headers=None: [])
+    with pytest.raises(PurgeError, match="Todos os últimos"):
+        purge("whatsapp_atendimentos", max_lag=0, pause=0)
+    assert remaining(standin, "whatsapp_mensagens") == 6
@@ -0,0 +1,39 @@
+"""
+rls_load_test: só operações que chegaram a enviar uma requisição entram na medição
+VBSolution - Sistema CRM Completo
+"""
+
+import threading
+
+import rls_load_test
+from rls_load_test import LoadRun
+
+COLUMNS = {"id": {}, "owner_id": {}, "company_id": {}, "created_at": {}, "timestamp": {}, "title": {}, "name": {},
+           "conteudo": {}}
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+    def json(self):
+        return []
+
+def test_operacao_estrangeira_sem_outra_empresa_nao_conta(monkeypatch):
+    sent, lock = [], threading.Lock()
+
+    def fake_http(method, url, **kwargs):
+        with lock:
+            sent.append(method)
+        return Response(200 if method == "GET" else 201)
+
+    monkeypatch.setattr(rls_load_test, "http", fake_http)
+    tenant = {"company_id": "c1", "owner_id": "u1", "users": ["u1"], "user_set": {"u1"}}
+    schema = {table: {"columns": COLUMNS} for table in rls_load_test.TABLES}
+    run = LoadRun([("u1", tenant)], [tenant], schema, "segredo", duration=0.2, concurrency=2, seed=1)
+    result = run.run()
+
+    # Com uma empresa só, foreign_read/foreign_write não enviam nada e não viram latência ~0 ms
+    assert result["ops"] == len(sent) > 0
+    assert not run.latencies["foreign_read"] and not run.latencies["foreign_write"]
+    assert result["errors"] == 0
@@ -0,0 +1,22 @@
+"""
+table_probe: a sonda compartilhada pelo health_daemon, check_tables e smoke tests
+VBSolution - Sistema CRM Completo
+"""
+
+from table_probe import probe_table, UP_STATUSES
+
+def test_tabela_acessivel_com_contagem(standin):
+    standin.bulk_insert("suppliers", ["id", "name"], [[f"00000000-0000-0000-0000-00000000000{i}", "x"] for i in range(3)])
+    result = probe_table("suppliers")
+    assert result["status"] in UP_STATUSES
+    assert result["rows"] == 3
+    assert result["failure"] is None
+
+def test_tabela_inexistente(standin):
+    result = probe_table("nao_existe")
+    assert result["status"] == 404
+
+def test_sem_resposta_conta_como_fora():
+    result = probe_table("leads", base_url="http://127.0.0.1:9", timeout=1)
+    assert result["status"] is None
+    assert result["failure"] == "ConnectionError"
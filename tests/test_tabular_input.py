@@ -0,0 +1,42 @@
+"""
+tabular_input: codificação, separador e cabeçalhos na leitura em streaming
+VBSolution - Sistema CRM Completo
+"""
+
+import gzip
+import json
+
+from tabular_input import read_rows, normalize_header, CSV_SAMPLE_BYTES
+
+def write(path, text, encoding):
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+def test_cabecalho_normalizado():
+    assert normalize_header(" Nome Fantasia ") == "nome_fantasia"
+    assert normalize_header("E-mail") == "e_mail"
+    assert normalize_header("Razão Social") == "razao_social"
+
+def test_csv_latin1_com_ponto_e_virgula(tmp_path):
+    path = write(tmp_path / "f.csv", "Nome;Cidade\nAçaí Ltda;São Paulo\n", "latin-1")
+    assert list(read_rows(path)) == [(2, {"nome": "Açaí Ltda", "cidade": "São Paulo"})]
+
+def test_utf8_com_caractere_cortado_na_amostra(tmp_path):
+    # "ç" ocupa os bytes CSV_SAMPLE_BYTES-1 e CSV_SAMPLE_BYTES: a amostra termina no meio dele
+    header = "nome,descricao\n"
+    filler = "x" * (CSV_SAMPLE_BYTES - 1 - len(header) - len("a,"))
+    text = f"{header}a,{filler}ção\n"
+    path = write(tmp_path / "f.csv", text, "utf-8")
+    assert text.encode("utf-8")[CSV_SAMPLE_BYTES - 1:CSV_SAMPLE_BYTES + 1] == "ç".encode("utf-8")
+    (_, row), = read_rows(path)
+    assert row["descricao"].endswith("ção")
+
+def test_csv_utf8_com_bom_comprimido(tmp_path):
+    path = tmp_path / "f.csv.gz"
+    path.write_bytes(gzip.compress("\ufeffNome,Valor\nJoão,10\n".encode("utf-8")))
+    assert list(read_rows(str(path))) == [(2, {"nome": "João", "valor": "10"})]
+
+def test_ndjson_mantem_nomes_e_pula_linhas_vazias(tmp_path):
+    lines = [json.dumps({"Nome": "A"}), "", json.dumps({"Nome": "B", "extra": None})]
+    path = write(tmp_path / "f.ndjson", "\n".join(lines) + "\n", "utf-8")
+    assert list(read_rows(path)) == [(1, {"Nome": "A"}), (3, {"Nome": "B", "extra": None})]
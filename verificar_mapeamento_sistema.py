@@ -4,9 +4,8 @@ Script para verificar o mapeamento completo do sistema CRM
 VBSolution - Sistema CRM Completo
 """
 
-import requests
 import json
-from datetime import datetime
+from instrumentation import log, http, print_summary_at_exit
 
 # Configurações do Supabase
 SUPABASE_URL = "https://nrbsocawokmihvxfcpso.supabase.co"
@@ -20,15 +19,34 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
-def log(message, level="INFO"):
-    """Função para logging com timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] {level}: {message}")
+# Mapeamento das páginas e suas tabelas principais
+PAGE_TABLE_MAPPING = {
+    "🏠 Dashboard (Index.tsx)": ["activities", "companies", "deals", "leads", "products", "projects"],
+    "🎯 Activities (Activities.tsx)": ["activities", "profiles", "employees", "companies", "projects"],
+    "🏢 Companies (Companies.tsx)": ["companies", "profiles", "employees"],
+    "👥 Employees (Employees.tsx)": ["employees", "profiles", "companies", "work_groups"],
+    "📦 Products (Products.tsx)": ["products", "profiles", "companies", "suppliers"],
+    "📊 Projects (Projects.tsx)": ["projects", "profiles", "employees", "companies"],
+    "🎣 Leads (LeadsSales.tsx)": ["leads", "profiles", "companies", "employees"],
+    "💰 Deals (SalesFunnel.tsx)": ["deals", "profiles", "companies", "leads"],
+    "📦 Inventory (Inventory.tsx)": ["inventory", "profiles", "products", "companies"],
+    "🛒 Sales Orders (SalesOrders.tsx)": ["orders", "profiles", "customers", "products"],
+    "📱 WhatsApp (WhatsApp.tsx)": ["whatsapp_atendimentos", "whatsapp_mensagens", "profiles"],
+    "📈 Reports (Reports.tsx)": ["activities", "companies", "deals", "leads", "products", "projects"],
+    "⚙️ Settings (Settings.tsx)": ["profiles", "company_settings"],
+    "🔧 Work Groups (WorkGroups.tsx)": ["work_groups", "profiles", "employees"],
+    "🏭 Suppliers (Suppliers.tsx)": ["suppliers", "profiles", "companies"],
+    "📅 Calendar (Calendar.tsx)": ["activities", "events", "profiles"],
+    "💬 Chat (Chat.tsx)": ["messages", "profiles", "chat_rooms"],
+    "📁 Files (Files.tsx)": ["files", "profiles", "companies"],
+    "📋 Documents (Documents.tsx)": ["documents", "profiles", "companies"],
+    "👤 Collaborations (Collaborations.tsx)": ["collaborations", "profiles", "companies"]
+}
 
 def check_table_access(table_name):
     """Verificar acesso a uma tabela específica"""
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=1", headers=headers)
+        response = http("GET", f"{SUPABASE_URL}/rest/v1/{table_name}?select=*&limit=1", headers=headers)
         
         if response.status_code == 200:
             data = response.json()
@@ -48,29 +66,7 @@ def check_page_table_mapping():
     log("🔍 VERIFICANDO MAPEAMENTO COMPLETO DO SISTEMA")
     log("=" * 80)
     
-    # Mapeamento das páginas e suas tabelas principais
-    page_mapping = {
-        "🏠 Dashboard (Index.tsx)": ["activities", "companies", "deals", "leads", "products", "projects"],
-        "🎯 Activities (Activities.tsx)": ["activities", "profiles", "employees", "companies", "projects"],
-        "🏢 Companies (Companies.tsx)": ["companies", "profiles", "employees"],
-        "👥 Employees (Employees.tsx)": ["employees", "profiles", "companies", "work_groups"],
-        "📦 Products (Products.tsx)": ["products", "profiles", "companies", "suppliers"],
-        "📊 Projects (Projects.tsx)": ["projects", "profiles", "employees", "companies"],
-        "🎣 Leads (LeadsSales.tsx)": ["leads", "profiles", "companies", "employees"],
-        "💰 Deals (SalesFunnel.tsx)": ["deals", "profiles", "companies", "leads"],
-        "📦 Inventory (Inventory.tsx)": ["inventory", "profiles", "products", "companies"],
-        "🛒 Sales Orders (SalesOrders.tsx)": ["orders", "profiles", "customers", "products"],
-        "📱 WhatsApp (WhatsApp.tsx)": ["whatsapp_atendimentos", "whatsapp_mensagens", "profiles"],
-        "📈 Reports (Reports.tsx)": ["activities", "companies", "deals", "leads", "products", "projects"],
-        "⚙️ Settings (Settings.tsx)": ["profiles", "company_settings"],
-        "🔧 Work Groups (WorkGroups.tsx)": ["work_groups", "profiles", "employees"],
-        "🏭 Suppliers (Suppliers.tsx)": ["suppliers", "profiles", "companies"],
-        "📅 Calendar (Calendar.tsx)": ["activities", "events", "profiles"],
-        "💬 Chat (Chat.tsx)": ["messages", "profiles", "chat_rooms"],
-        "📁 Files (Files.tsx)": ["files", "profiles", "companies"],
-        "📋 Documents (Documents.tsx)": ["documents", "profiles", "companies"],
-        "👤 Collaborations (Collaborations.tsx)": ["collaborations", "profiles", "companies"]
-    }
+    page_mapping = PAGE_TABLE_MAPPING
     
     # Verificar cada página e suas tabelas
     total_pages = len(page_mapping)
@@ -144,7 +140,7 @@ def check_rls_status():
     
     for table in test_tables:
         try:
-            response = requests.get(f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
+            response = http("GET", f"{SUPABASE_URL}/rest/v1/{table}?select=*&limit=1", headers=headers)
             
             if response.status_code in [401, 403]:
                 log(f"{table}: ✅ RLS ativo (acesso negado sem autenticação)")
@@ -223,6 +219,7 @@ def main():
         return False
 
 if __name__ == "__main__":
+    print_summary_at_exit()
     try:
         success = main()
         exit(0 if success else 1)
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga da ingestão de mensagens do WhatsApp
+VBSolution - Sistema CRM Completo
+
+O caminho quente de produção é o upsert de uma mensagem por vez em whatsapp_mensagens
+(supabase-messages.service.ts: on_conflict=message_id, return=representation). Este
+script reproduz esse caminho num ritmo alvo com chegadas realistas:
+
+- muitos donos (os usuários do plano do generate_synthetic_dataset), cada um com as
+  suas conversas; conversas populares recebem mais mensagens (Zipf);
+- mensagens em rajadas por conversa (o cliente manda várias seguidas, a resposta vem
+  em bloco), com intervalos de 0,2 a 2 s dentro da rajada;
+- mistura de texto e mídia (imagem, áudio, vídeo, documento) com --media-ratio.
+
+As chegadas seguem o relógio (carga aberta): a latência é medida desde o instante
+previsto da mensagem, então uma fila acumulada aparece no p99 em vez de sumir. O
+resumo mostra inserts/s sustentados, p50/p95/p99 e se o ritmo alvo foi mantido.
+
+Alvo padrão: a API REST de um local_standin. Com --live, o projeto em SUPABASE_URL;
+com --dsn (ou DATABASE_URL junto de --overhead), o Postgres direto, uma conexão por
+worker. Com --overhead (só Postgres local) a carga é repetida desligando um trigger ou
+removendo um índice de cada vez, para mostrar quanto cada um custa por insert; as
+mensagens do teste são apagadas antes de cada medição, para todas partirem da mesma
+tabela, e tudo é restaurado no final.
+
+As conversas e mensagens do teste usam connection_id loadgen-<id> e são apagadas ao fim.
+
+Execute: python whatsapp_ingest_load.py --rate 200 --duration 30
+         python whatsapp_ingest_load.py --live --rate 50 --duration 60
+         python whatsapp_ingest_load.py --dsn postgresql://postgres@localhost/postgres --rate 500 --overhead
+"""
+
+import os
+import sys
+import math
+import time
+import uuid
+import queue
+import random
+import argparse
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import supabase_rest
+from instrumentation import log, http, percentile, print_summary_at_exit
+from supabase_rest import rest_url, rest_headers
+from generate_synthetic_dataset import build_plan, person_name, phone_number, sentence
+
+TABLE = "whatsapp_mensagens"
+CHATS_TABLE = "whatsapp_atendimentos"
+
+# Tipo de mídia → (peso, mime, extensão, tamanho típico em bytes)
+MEDIA_TYPES = {
+    "IMAGEM": (0.5, "image/jpeg", "jpg", 180_000),
+    "AUDIO": (0.3, "audio/ogg", "ogg", 60_000),
+    "VIDEO": (0.1, "video/mp4", "mp4", 4_000_000),
+    "DOCUMENTO": (0.1, "application/pdf", "pdf", 350_000),
+}
+CHAT_SKEW = 1.1
+BURST_GAP = (0.2, 2.0)
+BURST_WARMUP = 60.0
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", ""}
+
+# ---------------------------------------------------------------- chegadas
+
+def build_chats(plan, owners, chats_per_owner, run_tag, rng):
+    """Conversas (linhas de whatsapp_atendimentos) para os primeiros `owners` usuários do plano"""
+    users = [user for tenant in plan["tenants"] for user in tenant["users"]][:owners]
+    now = datetime.now(timezone.utc)
+    chats = []
+    for owner_id in users:
+        for _ in range(chats_per_owner):
+            phone = phone_number(rng)
+            name = person_name(rng)
+            chats.append({"id": str(uuid.uuid4()), "owner_id": owner_id, "connection_id": run_tag,
+                          "numero_cliente": phone, "chat_id": f"{phone}@s.whatsapp.net", "nome_cliente": name,
+                          "display_name": name, "status": "ATENDENDO", "canal": "whatsapp",
+                          "data_inicio": now.isoformat(), "created_at": now.isoformat(), "updated_at": now.isoformat()})
+    return chats
+
+def message_row(rng, chat, moment, remetente, media_ratio):
+    row = {"id": str(uuid.uuid4()), "owner_id": chat["owner_id"], "atendimento_id": chat["id"],
+           "message_id": f"3EB0{rng.getrandbits(64):016X}", "chat_id": chat["chat_id"],
+           "connection_id": chat["connection_id"], "remetente": remetente,
+           "status": "received" if remetente == "CLIENTE" else "sent", "lida": remetente == "ATENDENTE",
+           "timestamp": moment.isoformat(), "created_at": moment.isoformat(),
+           "tipo": "TEXTO", "message_type": "text", "conteudo": sentence(rng, rng.randrange(3, 30))}
+    if rng.random() < media_ratio:
+        kinds = list(MEDIA_TYPES)
+        kind = rng.choices(kinds, [MEDIA_TYPES[k][0] for k in kinds])[0]
+        _, mime, extension, size = MEDIA_TYPES[kind]
+        name = f"{kind.lower()}-{row['message_id'][-8:]}.{extension}"
+        row.update({"tipo": kind, "message_type": kind.lower(), "conteudo": "",
+                    "midia_url": f"https://media.exemplo.com.br/{chat['connection_id']}/{name}",
+                    "midia_tipo": mime, "midia_nome": name,
+                    "midia_tamanho": int(rng.lognormvariate(math.log(size), 0.6))})
+    return row
+
+def arrivals(rng, chats, rate, duration=None, count=None, media_ratio=0.15, burst_mean=3.0):
+    """[(segundos desde o início, linha)] em ordem: rajadas Poisson em conversas escolhidas por Zipf
+
+    As rajadas começam BURST_WARMUP segundos antes do zero, então o início e o fim da janela
+    já têm rajadas em andamento e o ritmo oferecido fica no alvo. Sem duration, gera até count.
+    """
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** CHAT_SKEW for rank in range(len(chats))))
+    start = datetime.now(timezone.utc)
+    end = duration if duration is not None else math.inf
+    wanted = count if count is not None else math.inf
+    schedule = []
+    burst_at = -BURST_WARMUP
+    # Rajadas começam em ordem, então tudo antes de burst_at já está definido
+    while burst_at < end and (len(schedule) < wanted
+                              or sum(1 for offset, _ in schedule if offset < burst_at) < wanted):
+        burst_at += rng.expovariate(rate / burst_mean)
+        chat = rng.choices(chats, cum_weights=cum_weights)[0]
+        remetente = "CLIENTE" if rng.random() < 0.6 else "ATENDENTE"
+        size = 1 + int(math.log(1 - rng.random()) / math.log(1 - 1 / burst_mean)) if burst_mean > 1 else 1
+        moment = burst_at
+        for position in range(size):
+            if position:
+                moment += rng.uniform(*BURST_GAP)
+            if 0 <= moment < end:
+                schedule.append((moment, message_row(rng, chat, start + timedelta(seconds=moment), remetente,
+                                                     media_ratio)))
+    schedule.sort(key=lambda item: item[0])
+    return schedule[:count] if count is not None else schedule
+
+# ---------------------------------------------------------------- destinos
+
+class RestSink:
+    """Upsert de uma mensagem por requisição, como o backend"""
+
+    def __init__(self, columns, upsert=True, headers=None):
+        self.columns = columns
+        self.upsert = upsert
+        self.headers = headers or rest_headers(
+            prefer="resolution=merge-duplicates,return=representation" if upsert else "return=minimal")
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            import requests
+
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def insert(self, row):
+        path = f"{TABLE}?on_conflict=message_id" if self.upsert else TABLE
+        response = http("POST", rest_url(path), retries=0, session=self.session(),
+                        json={c: v for c, v in row.items() if c in self.columns}, headers=self.headers)
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"{response.status_code} {response.text[:160]}")
+
+    def load_chats(self, chats):
+        from rest_bulk import bulk_insert
+
+        failed = [r for r in bulk_insert(CHATS_TABLE, chats) if not r["ok"]]
+        if failed:
+            raise RuntimeError(f"Falha ao criar as conversas: {failed[0]['error']}")
+
+    def cleanup(self, run_tag):
+        for table in (TABLE, CHATS_TABLE):
+            http("DELETE", rest_url(table), retries=1, params={"connection_id": f"eq.{run_tag}"}, headers=rest_headers())
+
+    def close(self):
+        pass
+
+class PostgresSink:
+    """INSERT por transação (autocommit), uma conexão por worker"""
+
+    def __init__(self, dsn, upsert=True):
+        from postgres_direct import connect
+
+        self.dsn = dsn
+        self.upsert = upsert
+        self.connect = connect
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        conn = connect(dsn)
+        try:
+            self.columns = self.table_columns(conn, TABLE)
+            self.chat_columns = self.table_columns(conn, CHATS_TABLE)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def table_columns(conn, table):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT column_name FROM information_schema.columns "
+                           "WHERE table_schema = 'public' AND table_name = %s", (table,))
+            return {name for (name,) in cursor.fetchall()}
+
+    def connection(self):
+        if not hasattr(self.local, "conn"):
+            conn = self.connect(self.dsn)
+            conn.autocommit = True
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return self.local.conn
+
+    def insert(self, row):
+        from psycopg2 import sql
+
+        values = {c: v for c, v in row.items() if c in self.columns}
+        statement = sql.SQL("INSERT INTO public.{} ({}) VALUES ({})").format(
+            sql.Identifier(TABLE), sql.SQL(", ").join(map(sql.Identifier, values)),
+            sql.SQL(", ").join(sql.Placeholder() * len(values)))
+        if self.upsert:
+            statement += sql.SQL(" ON CONFLICT (message_id) DO UPDATE SET conteudo = excluded.conteudo RETURNING *")
+        with self.connection().cursor() as cursor:
+            cursor.execute(statement, list(values.values()))
+
+    def load_chats(self, chats):
+        from psycopg2.extras import execute_values
+
+        columns = [c for c in chats[0] if c in self.chat_columns]
+        conn = self.connect(self.dsn)
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, f"INSERT INTO public.{CHATS_TABLE} ({', '.join(columns)}) VALUES %s",
+                               [[chat.get(c) for c in columns] for chat in chats])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def cleanup(self, run_tag):
+        conn = self.connect(self.dsn)
+        try:
+            with conn.cursor() as cursor:
+                for table in (TABLE, CHATS_TABLE):
+                    cursor.execute(f"DELETE FROM public.{table} WHERE connection_id = %s", (run_tag,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def close(self):
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections.clear()
+        self.local = threading.local()
+
+# ---------------------------------------------------------------- carga
+
+def run_load(sink, schedule, workers, open_loop=True):
+    """Disparar o cronograma; devolve inserts/s, latências (desde o instante previsto) e erros"""
+    tasks = queue.Queue()
+    latencies, services, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker():
+        local_latencies, local_services, local_errors = [], [], []
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            due, row = item
+            started = time.perf_counter()
+            try:
+                sink.insert(row)
+            except Exception as exc:  # conta e segue: a carga não para por um insert recusado
+                local_errors.append(str(exc))
+                continue
+            finished = time.perf_counter()
+            local_services.append((finished - started) * 1000)
+            local_latencies.append((finished - (due if due is not None else started)) * 1000)
+        with lock:
+            latencies.extend(local_latencies)
+            services.extend(local_services)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for offset, row in schedule:
+        if open_loop:
+            due = started + offset
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            tasks.put((due, row))
+        else:
+            tasks.put((None, row))
+    dispatched = time.perf_counter() - started
+    for _ in threads:
+        tasks.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    services.sort()
+    return {
+        "sent": len(schedule),
+        "inserted": len(services),
+        "errors": len(errors),
+        "sample_errors": errors[:3],
+        "seconds": elapsed,
+        "drain_seconds": elapsed - dispatched,
+        "inserts_per_second": len(services) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "service_mean_ms": sum(services) / len(services) if services else 0.0,
+    }
+
+def describe(result, target_rate=None):
+    sustained = ""
+    if target_rate:
+        achieved = result["inserts_per_second"] / target_rate
+        sustained = f" ({achieved:.0%} do alvo{', fila acumulou' if achieved < 0.95 else ''})"
+    return (f"{result['inserted']:,} inserts em {result['seconds']:.1f}s = {result['inserts_per_second']:,.0f}/s"
+            f"{sustained}, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+            f"p99 {result['p99_ms']:.1f} ms, {result['errors']} erros")
+
+# ---------------------------------------------------------------- overhead
+
+def overhead_objects(conn):
+    """Triggers de usuário e índices comuns (não únicos, fora a PK) de whatsapp_mensagens"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT tgname FROM pg_trigger WHERE tgrelid = 'public.whatsapp_mensagens'::regclass "
+                       "AND NOT tgisinternal ORDER BY tgname")
+        triggers = [name for (name,) in cursor.fetchall()]
+        cursor.execute("SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                       "WHERE i.indrelid = 'public.whatsapp_mensagens'::regclass "
+                       "AND NOT i.indisprimary AND NOT i.indisunique ORDER BY 1")
+        indexes = cursor.fetchall()
+    conn.commit()
+    return triggers, indexes
+
+def measure_overhead(dsn, make_schedule, workers, upsert, run_tag):
+    """Repetir a carga (em malha fechada) sem cada trigger/índice; devolve [(objeto, resultado)]
+
+    Antes de cada medição as mensagens do run_tag são apagadas (e a tabela aspirada):
+    sem isso cada rodada inseriria numa tabela e em índices maiores que a anterior, e o
+    custo atribuído ao objeto desligado misturaria o crescimento da tabela.
+    """
+    from postgres_direct import connect
+
+    admin = connect(dsn)
+    admin.autocommit = True
+    results = []
+
+    def measure(label):
+        with admin.cursor() as cursor:
+            cursor.execute(f"DELETE FROM public.{TABLE} WHERE connection_id = %s", (run_tag,))
+            cursor.execute(f"VACUUM ANALYZE public.{TABLE}")
+        sink = PostgresSink(dsn, upsert)
+        try:
+            result = run_load(sink, make_schedule(), workers, open_loop=False)
+        finally:
+            sink.close()
+        log(f"   {label}: {result['inserts_per_second']:,.0f}/s, {result['service_mean_ms']:.2f} ms por insert")
+        results.append((label, result))
+        return result
+
+    try:
+        triggers, indexes = overhead_objects(admin)
+        log(f"🔬 Overhead: {len(triggers)} triggers e {len(indexes)} índices em {TABLE}")
+        measure("completo")
+        for trigger in triggers:
+            with admin.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE public.{TABLE} DISABLE TRIGGER "{trigger}"')
+            try:
+                measure(f"sem trigger {trigger}")
+            finally:
+                with admin.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE public.{TABLE} ENABLE TRIGGER "{trigger}"')
+        for name, definition in indexes:
+            with admin.cursor() as cursor:
+                cursor.execute(f"DROP INDEX {name}")
+            try:
+                measure(f"sem índice {name}")
+            finally:
+                with admin.cursor() as cursor:
+                    cursor.execute(definition)
+        measure("completo (de novo)")
+    finally:
+        admin.close()
+    return results
+
+def print_overhead(results):
+    baselines = [result for label, result in results if label.startswith("completo")]
+    base_ms = sum(r["service_mean_ms"] for r in baselines) / len(baselines)
+    print("\n" + "=" * 80)
+    print("🔬 CUSTO POR TRIGGER / ÍNDICE (malha fechada)")
+    print("=" * 80)
+    print(f"{'configuração':<44} {'inserts/s':>10} {'ms/insert':>10} {'custo':>12}")
+    for label, result in results:
+        cost = base_ms - result["service_mean_ms"]
+        cost_text = "" if label.startswith("completo") else f"{cost:+.2f} ms ({cost / base_ms:+.0%})"
+        print(f"{label[:44]:<44} {result['inserts_per_second']:>10,.0f} {result['service_mean_ms']:>10.2f} {cost_text:>12}")
+
+# ---------------------------------------------------------------- CLI
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Carga de ingestão de mensagens em whatsapp_mensagens")
+    parser.add_argument("--rate", type=float, default=100.0, help="Mensagens por segundo (alvo)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--workers", type=int, default=16, help="Inserts simultâneos")
+    parser.add_argument("--owners", type=int, default=50, help="Donos (usuários) distintos")
+    parser.add_argument("--chats-per-owner", type=int, default=20)
+    parser.add_argument("--media-ratio", type=float, default=0.15, help="Fração de mensagens com mídia")
+    parser.add_argument("--burst-mean", type=float, default=3.0, help="Mensagens por rajada (média)")
+    parser.add_argument("--insert", action="store_true", help="INSERT simples em vez do upsert por message_id")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--live", action="store_true", help="REST contra o projeto em SUPABASE_URL (padrão: local_standin)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência injetada no stand-in")
+    parser.add_argument("--dsn", default=None, help="Postgres direto (padrão: REST no stand-in)")
+    parser.add_argument("--overhead", action="store_true", help="Custo de cada trigger/índice (Postgres local)")
+    parser.add_argument("--overhead-rows", type=int, default=5000, help="Inserts por medição do overhead")
+    parser.add_argument("--keep", action="store_true", help="Não apagar as mensagens do teste")
+    args = parser.parse_args()
+
+    dsn = args.dsn or (os.getenv("DATABASE_URL") if args.overhead else None)
+    if dsn and args.live:
+        log("❌ Escolha um destino: --live (REST) ou --dsn (Postgres)", "ERROR")
+        return False
+    if args.overhead:
+        if not dsn:
+            log("❌ --overhead precisa de --dsn ou DATABASE_URL", "ERROR")
+            return False
+        if (urlsplit(dsn).hostname or "") not in LOCAL_HOSTS:
+            log("❌ --overhead desliga triggers e remove índices: só em banco local", "ERROR")
+            return False
+
+    rng = random.Random(args.seed)
+    run_tag = f"loadgen-{uuid.uuid4().hex[:8]}"
+    plan = build_plan(args.seed, max(args.owners / 250, 0.004))
+    chats = build_chats(plan, args.owners, args.chats_per_owner, run_tag, rng)
+    upsert = not args.insert
+
+    server = None
+    if dsn:
+        sink = PostgresSink(dsn, upsert)
+        target = f"Postgres {urlsplit(dsn).hostname or 'local'}"
+    else:
+        if not args.live:
+            from local_standin import StandIn, start_background
+
+            server, url = start_background(StandIn(latency_ms=args.latency_ms))
+            supabase_rest.SUPABASE_URL = url
+        response = http("GET", rest_url(), retries=1, headers=rest_headers())
+        if response.status_code != 200:
+            log(f"❌ API respondeu {response.status_code}: {response.text[:200]}", "ERROR")
+            return False
+        from schema_cache import schema_from_openapi
+
+        columns = set(schema_from_openapi(response.json())[TABLE]["columns"])
+        sink = RestSink(columns, upsert)
+        target = urlsplit(supabase_rest.SUPABASE_URL).hostname if args.live else "stand-in"
+
+    try:
+        log(f"💬 {len(chats):,} conversas de {args.owners} donos em {target} ({run_tag})")
+        sink.load_chats(chats)
+
+        schedule = arrivals(rng, chats, args.rate, duration=args.duration, media_ratio=args.media_ratio,
+                            burst_mean=args.burst_mean)
+        media = sum(1 for _, row in schedule if row["tipo"] != "TEXTO")
+        log(f"🚀 {len(schedule):,} mensagens em {args.duration:g}s (alvo {args.rate:g}/s, {media / max(len(schedule), 1):.0%} "
+            f"mídia), {args.workers} workers, {'upsert' if upsert else 'insert'}")
+        result = run_load(sink, schedule, max(1, args.workers))
+        sink.close()
+        offered = len(schedule) / args.duration
+        ok = not result["errors"] and result["inserts_per_second"] >= 0.95 * offered
+        log(f"{'✅' if ok else '⚠️'} {describe(result, offered)}")
+        for message in result["sample_errors"]:
+            log(f"   ⚠️ {message}", "WARNING")
+
+        if args.overhead:
+            def make_schedule():
+                return arrivals(rng, chats, args.rate, count=args.overhead_rows, media_ratio=args.media_ratio,
+                                burst_mean=args.burst_mean)
+
+            print_overhead(measure_overhead(dsn, make_schedule, max(1, args.workers), upsert, run_tag))
+    finally:
+        if not args.keep:
+            sink.cleanup(run_tag)
+        if server is not None:
+            server.shutdown()
+
+    return ok
+
+if __name__ == "__main__":
+    print_summary_at_exit()
+    try:
+        sys.exit(0 if main() else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️ Carga interrompida pelo usuário", "WARNING")
+        sys.exit(1)